@@ -1,6 +1,8 @@
 import logging
 import warnings
 from typing import AsyncGenerator, Any
+from google.adk.agents.invocation_context import new_invocation_context_id
+from google.adk.events import Event
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
@@ -65,6 +67,19 @@ class AdkRunnerAdapter(BaseRunner):
         finally:
             session_context_var.reset(token)
 
+    async def record_turn(self, user_id: str, session_id: str, message: str, answer: str):
+        # The answer is attributed to the root agent so later turns see it as the model's own reply
+        session = await self.get_session(user_id, session_id)
+        if session is None:
+            session = await self.session_service.create_session(app_name=self.runner.app_name, user_id=user_id, session_id=session_id)
+        invocation_id = new_invocation_context_id()
+        await self.session_service.append_event(session, Event(
+            author="user", invocation_id=invocation_id, content=types.Content(role="user", parts=[types.Part(text=message)]),
+        ))
+        await self.session_service.append_event(session, Event(
+            author=self.runner.agent.name, invocation_id=invocation_id, content=types.Content(role="model", parts=[types.Part(text=answer)]),
+        ))
+
     async def get_session(self, user_id: str, session_id: str) -> Any:
         return await self.session_service.get_session(
             app_name=self.runner.app_name,
@@ -1,9 +1,13 @@
 import logging
 from typing import Any, Optional
 from google.adk.agents import LlmAgent
+from backend.core.tools.result_tools import describe_result, chart_from_result
 
 logger = logging.getLogger(__name__)
 
+# Session state key under which SqlExecutor leaves the raw query output
+SQL_RESULT_STATE_KEY = "sql_result"
+
 def create_reporter_agent(model_name: str) -> LlmAgent:
     """
     Creates a specialized Reporting Agent for synthesizing raw data into narratives.
@@ -17,7 +21,17 @@ def create_reporter_agent(model_name: str) -> LlmAgent:
             "Your goal is to take raw database results and the original user query, "
             "and transform them into a final synthesized answer. "
             "\n\n--- DATA INPUT FORMAT ---"
-            "\nYou will often receive raw data as a list of tuples, like `[('JFK', 10), ('LHR', 5)]`."
+            "\nYou will receive raw data as a header line followed by a compact JSON object: "
+            "`columns` lists the column names, `types` their types (int, float, text, datetime, bool, blob, null), "
+            "and `rows` holds one array per record with values in column order, e.g. "
+            "`{\"columns\":[\"origin\",\"flight_count\"],\"types\":[\"text\",\"int\"],\"rows\":[[\"JFK\",10],[\"LHR\",5]]}`."
+            "\n\n--- RAW DATA ---"
+            "\nThe raw data to report on (if empty, use the query output in the conversation):\n"
+            "{" + SQL_RESULT_STATE_KEY + "?}"
+            "\n\n--- LARGE RESULTS ---"
+            "\nIf the header says the result was truncated and gives a `result_handle`, the rows you see are only a preview. "
+            "For totals, averages or rankings over the whole result, call `describe_result` with the handle. "
+            "For a chart over the whole result, call `chart_from_result` and include its [CHART_JSON] block as is."
             "\n\n--- FORMATTING RULES ---"
             "\n1. **CHART**: If the user asks for a 'graph', 'chart', or 'visualization', you MUST provide a prose summary AND an ApexCharts JSON config block. "
             "Wrap the JSON in [CHART_JSON] and [/CHART_JSON] tags. Do not use markdown code fences."
@@ -27,24 +41,25 @@ def create_reporter_agent(model_name: str) -> LlmAgent:
             "\n5. **NO DATA**: If the data is empty, politely state that no results were found."
             "\n\n--- CHART CONSTRUCTION ---"
             "\n- **BAR/LINE/AREA**: "
-            "  - The first element of each tuple is the X-AXIS label. This goes into `xaxis.categories`."
+            "  - The first element of each row is the X-AXIS label. This goes into `xaxis.categories`."
             "  - The second element is the value. This goes into `series[0].data`."
             "\n- **PIE/DONUT**: "
-            "  - The first element of each tuple is the label. This goes into top-level `labels` (list of strings)."
+            "  - The first element of each row is the label. This goes into top-level `labels` (list of strings)."
             "  - The second element is the value. This goes into `series` (simple list of numbers, NOT objects)."
             "\n- **NULL HANDLING**: If a category label is null/None, replace it with the string 'Unknown'."
             "\n- To ensure readability on a dark UI, you MUST include a `theme` object set to dark mode: `\"theme\": {\"mode\": \"dark\"}`."
-            "\n- **BAR CHART EXAMPLE (Given `[('JFK', 10), ('LHR', 5)]`)**:\n"
+            "\n- **BAR CHART EXAMPLE (Given rows `[[\"JFK\",10],[\"LHR\",5]]`)**:\n"
             "[CHART_JSON]"
             '\n{"chart": {"type": "bar"}, "series": [{"name": "Flights", "data": [10, 5]}], "xaxis": {"categories": ["JFK", "LHR"]}, "theme": {"mode": "dark"}}'
             "\n[/CHART_JSON]"
-            "\n- **PIE CHART EXAMPLE (Given `[('Action', 40), ('Comedy', 20)]`)**:\n"
+            "\n- **PIE CHART EXAMPLE (Given rows `[[\"Action\",40],[\"Comedy\",20]]`)**:\n"
             "[CHART_JSON]"
             '\n{"chart": {"type": "pie"}, "series": [40, 20], "labels": ["Action", "Comedy"], "theme": {"mode": "dark"}}'
             "\n[/CHART_JSON]"
             "\n\n--- STYLE GUIDELINES ---"
-            "\n- Be concise and polite. Do not mention the raw data or the query in your response."
-        )
+            "\n- Be concise and polite. Do not mention the raw data, the query or result handles in your response."
+        ),
+        tools=[describe_result, chart_from_result]
     )
 
 async def synthesize_response(model_name: str, query: str, raw_data: Any) -> str:
@@ -1,42 +1,77 @@
-import os
 import logging
-from typing import Any
+from typing import Any, Callable, Dict, Optional
 from google.adk.agents import LlmAgent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.events import Event
 from opentelemetry import trace
 from backend.agents.adk.schema import create_schema_agent
-from backend.agents.adk.sql_sequence import create_sql_sequence_agent
+from backend.agents.adk.sql_sequence import (
+    create_sql_sequence_agent, create_schema_prompted_sql_agent, create_sql_execution_agent,
+    schema_fits_prompt, PLANNER_CALLS_SAVED, GENERATOR_CALLS_SAVED, EXECUTOR_CALLS_SAVED,
+    SQL_STATE_KEY, DETERMINISTIC_EVENT,
+)
+from backend.agents.adk.runner_pool import sub_agent_runners, DELEGATE_USER_ID
+from backend.core.database import resolve_database_id
+from backend.core.question_cache import question_cache, schema_fingerprint
 from backend.core.tools.report_tools import generate_summary_report
 from backend.core.tools.format_tools import ensure_chart_tags
+from backend.core.tools.sql_tools import ERROR_PREFIXES
 
 logger = logging.getLogger(__name__)
 
-async def run_sub_agent(agent_creator, query: str, app_name: str) -> str:
-    """Helper to run ephemeral sub-agents"""
+# Sub-agents the router delegates to: app_name -> agent creator
+SUB_AGENTS = {
+    "SchemaExplorerSubRun": create_schema_agent,
+    "SqlAgentSubRun": create_sql_sequence_agent,
+    "SqlSchemaPromptSubRun": create_schema_prompted_sql_agent,
+    "SqlCachedSubRun": create_sql_execution_agent,
+}
+
+class SqlRunRecorder:
+    """
+    Watches a SQL workflow's events: counts the model calls it made and keeps
+    the query that execute_sql_async ran without error.
+    """
+    def __init__(self):
+        self._calls: Dict[str, str] = {}
+        self.sql: Optional[str] = None
+        self.llm_calls = 0
+
+    def __call__(self, event: Event):
+        if (event.author != "user" and event.content and event.content.role == "model" and not event.partial
+                and event.custom_metadata != DETERMINISTIC_EVENT):
+            self.llm_calls += 1
+        for call in event.get_function_calls():
+            if call.name == "execute_sql_async" and call.args:
+                self._calls[call.id] = call.args.get("query")
+        for response in event.get_function_responses():
+            if response.name == "execute_sql_async" and response.id in self._calls:
+                result = (response.response or {}).get("result")
+                if isinstance(result, str) and not result.startswith(ERROR_PREFIXES):
+                    self.sql = self._calls[response.id]
+
+async def run_sub_agent(agent_creator, query: str, app_name: str, model_name: Optional[str] = None,
+                        on_event: Optional[Callable[[Event], None]] = None, state: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Runs a delegation on a pooled sub-agent runner, in a session of its own
+    that starts with `state`. `on_event` sees every event of the run.
+    """
     tracer = trace.get_tracer(__name__)
     
     # Create a span for the sub-agent execution
     # Context should propagate automatically in async
     with tracer.start_as_current_span(f"SubAgent: {app_name}", attributes={"query": query}) as span:
-        model_name = os.getenv("MODEL_NAME", "gemini-2.5-flash")
-        agent = agent_creator(model_name)
-        
-        runner = Runner(
-            agent=agent,
-            session_service=InMemorySessionService(),
-            app_name=app_name,
-            auto_create_session=True
-        )
+        runner = sub_agent_runners.get(agent_creator, app_name, model_name or sub_agent_runners.default_model)
+        session_id = sub_agent_runners.new_session_id()
         
         from google.genai import types
         user_msg = types.Content(role='user', parts=[types.Part(text=query)])
         
         response_text = ""
         try:
-            # Use dummy IDs for the internal session
             # Using run_async to preserve context
-            async for event in runner.run_async(new_message=user_msg, user_id="router_delegate", session_id="ephemeral_session"):
+            async for event in runner.run_async(new_message=user_msg, user_id=DELEGATE_USER_ID, session_id=session_id, state_delta=state):
+                if on_event:
+                    on_event(event)
                 if event.content and event.content.parts:
                     for part in event.content.parts:
                         if part.text:
@@ -46,6 +81,8 @@ async def run_sub_agent(agent_creator, query: str, app_name: str) -> str:
             span.record_exception(e)
             span.set_status(trace.Status(trace.StatusCode.ERROR))
             return f"Error: {str(e)}"
+        finally:
+            await sub_agent_runners.release(runner, session_id)
             
         return ensure_chart_tags(response_text)
 
@@ -61,12 +98,65 @@ async def delegate_to_sql_agent(query: str) -> str:
     Do not summarize it or add any commentary. Output the result directly.
     """
     logger.info(f"RootRouter delegating to SQLAgent: {query}")
-    return await run_sub_agent(create_sql_sequence_agent, query, "SqlAgentSubRun")
+    db_id = resolve_database_id()
+    schema = schema_fingerprint(db_id) if db_id else None
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("SqlWorkflow", attributes={"query": query}) as workflow_span:
+        with tracer.start_as_current_span("QuestionCache.lookup", attributes={"query": query}) as span:
+            cached = question_cache.lookup(db_id, query, schema) if schema else None
+            span.set_attribute("cache.hit", cached is not None)
+            if schema:
+                stats = question_cache.stats(db_id)
+                span.set_attribute("cache.hits", stats["hits"])
+                span.set_attribute("cache.misses", stats["misses"])
+                span.set_attribute("cache.hit_rate", stats["hit_rate"])
+            if cached:
+                span.set_attribute("cache.similarity", cached.similarity)
+                span.set_attribute("cache.question", cached.question)
+
+        llm_calls = 0
+        if cached:
+            # Validated SQL is known: skip SqlPlanner and SqlGenerator
+            logger.info(f"Question cache hit ({cached.similarity}) for: {query}")
+            recorder = SqlRunRecorder()
+            response = await run_sub_agent(create_sql_execution_agent, query, "SqlCachedSubRun", on_event=recorder, state={SQL_STATE_KEY: cached.sql})
+            llm_calls += recorder.llm_calls
+            if recorder.sql is not None:
+                _record_llm_calls(workflow_span, "cached", llm_calls, PLANNER_CALLS_SAVED + GENERATOR_CALLS_SAVED + EXECUTOR_CALLS_SAVED)
+                return response
+            logger.warning(f"Cached SQL no longer runs, answering with the full workflow: {cached.sql}")
+            question_cache.discard(db_id, cached.question)
+
+        # Small schemas go into SqlGenerator's prompt, so SqlPlanner's discovery turns are not needed
+        if schema_fits_prompt(db_id):
+            workflow, agent_creator, app_name, saved = "schema_prompt", create_schema_prompted_sql_agent, "SqlSchemaPromptSubRun", PLANNER_CALLS_SAVED
+        else:
+            workflow, agent_creator, app_name, saved = "full", create_sql_sequence_agent, "SqlAgentSubRun", 0
+        # SqlExecutor runs the SQL without a model call
+        saved += EXECUTOR_CALLS_SAVED
+        recorder = SqlRunRecorder()
+        response = await run_sub_agent(agent_creator, query, app_name, on_event=recorder)
+        _record_llm_calls(workflow_span, workflow, llm_calls + recorder.llm_calls, saved)
+        if schema and recorder.sql is not None:
+            question_cache.put(db_id, query, recorder.sql, schema)
+        return response
+
+def _record_llm_calls(span, workflow: str, llm_calls: int, saved: int):
+    """
+    Records which SQL workflow answered and its model calls. `saved` counts the
+    calls of the skipped or model-free stages at their minimum (see PLANNER_CALLS_SAVED).
+    """
+    span.set_attribute("workflow", workflow)
+    span.set_attribute("llm_calls", llm_calls)
+    span.set_attribute("llm_calls.saved", saved)
 
 def create_root_router(model_name: str) -> LlmAgent:
     """
     Creates the Root Router agent that delegates tasks to sub-agents.
+    The sub-agents run on the same model, on runners built here once.
     """
+    sub_agent_runners.prebuild(model_name, SUB_AGENTS)
     return LlmAgent(
         model=model_name,
         name="RootRouter",
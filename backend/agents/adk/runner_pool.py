@@ -0,0 +1,75 @@
+import os
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+logger = logging.getLogger(__name__)
+
+# User ID under which delegations run in the sub-agents' sessions
+DELEGATE_USER_ID = "router_delegate"
+
+class SubAgentRunnerPool:
+    """
+    Sub-agent runners built once per (app, model) and reused across delegations.
+    Agents, the Runner and its InMemorySessionService are stateless between
+    runs; each delegation gets a fresh session that is deleted afterwards, so
+    concurrent delegations never see each other's history.
+    """
+    def __init__(self, default_model: str):
+        self.default_model = default_model
+        self._runners: Dict[Tuple[str, str], Runner] = {}
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def _build(self, agent_creator: Callable[[str], Any], app_name: str, model_name: str) -> Runner:
+        runner = Runner(
+            agent=agent_creator(model_name),
+            session_service=InMemorySessionService(),
+            app_name=app_name,
+            auto_create_session=True
+        )
+        self._runners[(app_name, model_name)] = runner
+        self.built += 1
+        logger.info(f"Built sub-agent runner '{app_name}' for model {model_name}")
+        return runner
+
+    def get(self, agent_creator: Callable[[str], Any], app_name: str, model_name: str) -> Runner:
+        with self._lock:
+            runner = self._runners.get((app_name, model_name))
+            if runner is None:
+                return self._build(agent_creator, app_name, model_name)
+            self.reused += 1
+            return runner
+
+    def prebuild(self, model_name: str, sub_agents: Dict[str, Callable[[str], Any]]):
+        """
+        Builds the runners of `sub_agents` (app_name -> agent creator) ahead of the
+        first delegation and makes `model_name` the model delegations run on.
+        """
+        with self._lock:
+            self.default_model = model_name
+            for app_name, agent_creator in sub_agents.items():
+                if (app_name, model_name) not in self._runners:
+                    self._build(agent_creator, app_name, model_name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"runners": len(self._runners), "built": self.built, "reused": self.reused}
+
+    def new_session_id(self) -> str:
+        return f"delegation-{uuid.uuid4().hex}"
+
+    async def release(self, runner: Runner, session_id: str):
+        """Drops a delegation's session once its run is over."""
+        await runner.session_service.delete_session(app_name=runner.app_name, user_id=DELEGATE_USER_ID, session_id=session_id)
+
+    def clear(self):
+        with self._lock:
+            self._runners.clear()
+
+# Shared by the router's delegation tools; create_root_router prebuilds its model's runners
+sub_agent_runners = SubAgentRunnerPool(os.getenv("MODEL_NAME", "gemini-2.5-flash"))
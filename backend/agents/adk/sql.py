@@ -1,6 +1,6 @@
 from google.adk.agents import LlmAgent
 from backend.core.tools.schema_tools import list_tables, describe_table
-from backend.core.tools.sql_tools import execute_sql
+from backend.core.tools.sql_tools import execute_sql_async, execute_sql_batch_async
 
 def create_sql_agent(model_name: str) -> LlmAgent:
     """
@@ -16,8 +16,10 @@ def create_sql_agent(model_name: str) -> LlmAgent:
                     "1. SEARCH: If you don't know the schema, call 'list_tables' and 'describe_table' immediately. "
                     "   NEVER ask the user for metadata (tables, columns). You have tools for this. "
                     "2. PREPARE: Write a SQLite query based on the tool results. "
-                    "3. EXECUTE: Use 'execute_sql'. "
+                    "3. EXECUTE: Use 'execute_sql_async'. If the question needs several independent queries, "
+                    "   run them together in ONE 'execute_sql_batch_async' call instead of one call per query. "
                     "4. VERIFY: If results are empty but you expected data, or if you got a SQL error, check your column names and retry once. "
+                    "   If a query is refused as too expensive, rewrite it with filters, key joins or aggregation instead of retrying it. "
                     "RESTRICTIONS: Read-Only. No DROP/DELETE/INSERT.",
-        tools=[list_tables, describe_table, execute_sql]
+        tools=[list_tables, describe_table, execute_sql_async, execute_sql_batch_async]
     )
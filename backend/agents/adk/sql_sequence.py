@@ -1,13 +1,180 @@
+import os
+import re
 import logging
-from typing import List, Any
-from google.adk.agents import LlmAgent, SequentialAgent
+import sqlparse
+from typing import AsyncGenerator, List, Any, Optional
+from google.adk.agents import BaseAgent, LlmAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event, EventActions
+from google.adk.flows.llm_flows.functions import generate_client_function_call_id
+from google.genai import types
+from backend.core.schema_registry import schema_registry, estimate_tokens
 from backend.core.tools.schema_tools import list_tables, describe_table
-from backend.core.tools.sql_tools import execute_sql, validate_sql
+from backend.core.tools.sql_tools import execute_sql_async, execute_sql_batch_async, validate_sql_async
 
-from backend.agents.adk.reporter import create_reporter_agent
+from backend.agents.adk.reporter import SQL_RESULT_STATE_KEY, create_reporter_agent
 
 logger = logging.getLogger(__name__)
 
+# Schemas whose digest fits in this many tokens go into SqlGenerator's prompt
+# and SqlPlanner is skipped
+SCHEMA_PROMPT_TOKEN_BUDGET = int(os.getenv("SCHEMA_PROMPT_TOKEN_BUDGET", "2000"))
+
+# Model calls saved per question when a stage is skipped or runs without a
+# model: the least an LLM stage makes (tool call(s), then its answer)
+PLANNER_CALLS_SAVED = 3  # list_tables, describe_table, answer
+GENERATOR_CALLS_SAVED = 2  # validate_sql_async, answer
+EXECUTOR_CALLS_SAVED = 2  # execute_sql_async, answer; SqlExecutor is model-free
+
+# Session state key of the SQL to run: SqlGenerator's output, or set by the caller
+SQL_STATE_KEY = "validated_sql"
+
+# Marks events that did not come from a model call
+DETERMINISTIC_EVENT = {"deterministic": True}
+
+_SQL_FENCE = re.compile(r"```(?:sql)?\s*(.+?)```", re.IGNORECASE | re.DOTALL)
+# A statement starts a line: SELECT/WITH in upper case, or in any case when SQL structure follows
+_SQL_STATEMENT = re.compile(
+    r"^[ \t]*(?:(?:SELECT|WITH)\b|(?i:select\b.+?\bfrom\b|with\s+\w+\s+as\s*\())",
+    re.MULTILINE | re.DOTALL,
+)
+# A line of prose: SQL lines do not end like a sentence
+_PROSE_LINE = re.compile(r"[.!?:][ \t]*$")
+
+GENERATOR_INSTRUCTION = (
+    "You are a SQL writing expert. Your job is to write a single, valid SQLite query based on the user's question and the provided schema. "
+    "\n\n--- QUERY PATTERNS ---"
+    "\n1. **AGGREGATION/COUNTING**: If the user asks 'how many', 'count', 'graph', 'chart', or 'plot', you MUST use aggregation. This typically involves `COUNT(*)` and `GROUP BY`."
+    "\n   - Example for 'graph flights per origin': `SELECT origin, COUNT(*) AS flight_count FROM flights GROUP BY origin`"
+    "\n2. **SPECIFIC LOOKUP**: If the user asks for a specific item (e.g., 'flight 123', 'pilot named Maverick'), use a `WHERE` clause."
+    "\n   - Example for 'flight with id 5': `SELECT * FROM flights WHERE id = 5`"
+    "\n3. **GENERAL LISTING**: For general requests ('show all flights'), select a few relevant columns. Do not use `*`."
+    "\n   - Example for 'list all pilots': `SELECT id, name, license_type FROM pilots`"
+    "\n\n--- STRING ESCAPING ---"
+    "\n- If a string value contains a single quote (e.g. \"Schindler's List\"), you MUST escape it by doubling the quote (e.g. 'Schindler''s List')."
+    "\n- Do NOT use double quotes for string literals. Use single quotes only."
+    "\n\n--- VALIDATION ---"
+    "\nBefore finishing, you MUST call the `validate_sql_async` tool on your generated query. "
+    "If validation fails, you MUST correct the query and call `validate_sql_async` again. "
+    "Your final output must be ONLY the validated SQL query."
+    "\n\n--- SEVERAL QUERIES ---"
+    "\nIf the question needs several independent queries (e.g. 'average budget by genre and count movies by rating'), "
+    "validate each one on its own and output all of them, each ending with a semicolon. They run together in one batch."
+)
+
+def _schema_prompted_instruction(context: ReadonlyContext) -> str:
+    """GENERATOR_INSTRUCTION plus the active database's schema digest, in place of SqlPlanner's output."""
+    return (
+        GENERATOR_INSTRUCTION +
+        "\n\n--- SCHEMA ---"
+        "\nThe database has exactly these tables (name(column TYPE, ...), PK = primary key, -> = foreign key):\n" +
+        schema_registry.get_schema_digest() +
+        "\nFor general requests ('show all flights'), include descriptive columns like 'destination', 'origin', 'name', etc., so the answer is helpful."
+    )
+
+def schema_fits_prompt(db_id: Optional[str] = None) -> bool:
+    """True when the database's schema digest is within SCHEMA_PROMPT_TOKEN_BUDGET."""
+    digest = schema_registry.get_schema_digest(db_id)
+    return bool(digest) and estimate_tokens(digest) <= SCHEMA_PROMPT_TOKEN_BUDGET
+
+def _create_generator(model_name: str, instruction) -> LlmAgent:
+    return LlmAgent(
+        model=model_name,
+        name="SqlGenerator",
+        description="Constructs and validates a SQLite query.",
+        instruction=instruction,
+        tools=[validate_sql_async],
+        output_key=SQL_STATE_KEY
+    )
+
+def _until_prose(text: str) -> str:
+    """`text` up to its first prose line outside a string literal."""
+    kept, in_string = [], False
+    for line in text.splitlines(keepends=True):
+        if not in_string and kept and _PROSE_LINE.search(line):
+            break
+        kept.append(line)
+        # Doubled quotes ('') leave the parity unchanged
+        in_string ^= line.count("'") % 2 == 1
+    return "".join(kept)
+
+def extract_sql_statements(text: Optional[str]) -> List[str]:
+    """
+    Every statement in a stage's output: the statements of its fenced blocks,
+    or else those from the first line starting with a statement on, up to
+    prose. Statements are split with sqlparse, so blank lines and semicolons
+    inside string literals are kept.
+    """
+    if not text:
+        return []
+    fenced = _SQL_FENCE.findall(text)
+    if fenced:
+        statements = [s for block in fenced for s in sqlparse.split(block)]
+    else:
+        match = _SQL_STATEMENT.search(text)
+        if not match:
+            return []
+        # Text between or after the statements (no SELECT/WITH) is dropped
+        statements = [s for s in sqlparse.split(_until_prose(text[match.start():])) if _SQL_STATEMENT.match(s.strip())]
+    statements = [s.strip().rstrip(";").strip() for s in statements]
+    return [s for s in statements if s]
+
+def extract_sql(text: Optional[str]) -> Optional[str]:
+    """The first SQL statement in a stage's output (see extract_sql_statements)."""
+    statements = extract_sql_statements(text)
+    return statements[0] if statements else None
+
+class SqlExecutorAgent(BaseAgent):
+    """
+    Runs the validated SQL exactly once, without a model call: one statement
+    with execute_sql_async, several independent ones together with
+    execute_sql_batch_async. The SQL comes from session state (SQL_STATE_KEY)
+    or, failing that, from the latest agent message holding a statement
+    (never from the user's own text). Emits the events an LlmAgent calling the
+    tool would (function call, function response, the raw output as text).
+    The final event also stores the output in session state under
+    SQL_RESULT_STATE_KEY, which the reporter's instruction reads.
+    """
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        statements = extract_sql_statements(ctx.session.state.get(SQL_STATE_KEY))
+        if not statements:
+            for event in reversed(ctx.session.events):
+                if event.author == "user":
+                    continue
+                texts = [p.text for p in (event.content.parts if event.content else None) or [] if p.text]
+                statements = extract_sql_statements("\n".join(texts))
+                if statements:
+                    break
+
+        if not statements:
+            output = "Error: No SQL statement found."
+        else:
+            if len(statements) == 1:
+                name, args = "execute_sql_async", {"query": statements[0]}
+            else:
+                name, args = "execute_sql_batch_async", {"queries": statements}
+            call = types.FunctionCall(id=generate_client_function_call_id(), name=name, args=args)
+            yield self._event(ctx, types.Content(role="model", parts=[types.Part(function_call=call)]))
+            output = await (execute_sql_async(statements[0]) if len(statements) == 1 else execute_sql_batch_async(statements))
+            response = types.FunctionResponse(id=call.id, name=call.name, response={"result": output})
+            yield self._event(ctx, types.Content(role="user", parts=[types.Part(function_response=response)]))
+
+        yield self._event(ctx, types.Content(role="model", parts=[types.Part(text=output)]), EventActions(state_delta={SQL_RESULT_STATE_KEY: output}))
+
+    def _event(self, ctx: InvocationContext, content: types.Content, actions: Optional[EventActions] = None) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=content,
+            actions=actions or EventActions(),
+            custom_metadata=DETERMINISTIC_EVENT,
+        )
+
+def _create_executor() -> SqlExecutorAgent:
+    return SqlExecutorAgent(name="SqlExecutor", description="Executes the validated SQL query.")
+
 def create_sql_sequence_agent(model_name: str) -> SequentialAgent:
     """
     Creates a Sequence Agent that follows a 4-step SQL generation workflow.
@@ -27,43 +194,10 @@ def create_sql_sequence_agent(model_name: str) -> SequentialAgent:
     )
 
     # Step 2: Generator & Validator
-    generator = LlmAgent(
-        model=model_name,
-        name="SqlGenerator",
-        description="Constructs and validates a SQLite query.",
-        instruction=(
-            "You are a SQL writing expert. Your job is to write a single, valid SQLite query based on the user's question and the provided schema. "
-            "\n\n--- QUERY PATTERNS ---"
-            "\n1. **AGGREGATION/COUNTING**: If the user asks 'how many', 'count', 'graph', 'chart', or 'plot', you MUST use aggregation. This typically involves `COUNT(*)` and `GROUP BY`."
-            "\n   - Example for 'graph flights per origin': `SELECT origin, COUNT(*) AS flight_count FROM flights GROUP BY origin`"
-            "\n2. **SPECIFIC LOOKUP**: If the user asks for a specific item (e.g., 'flight 123', 'pilot named Maverick'), use a `WHERE` clause."
-            "\n   - Example for 'flight with id 5': `SELECT * FROM flights WHERE id = 5`"
-            "\n3. **GENERAL LISTING**: For general requests ('show all flights'), select a few relevant columns. Do not use `*`."
-            "\n   - Example for 'list all pilots': `SELECT id, name, license_type FROM pilots`"
-            "\n\n--- STRING ESCAPING ---"
-            "\n- If a string value contains a single quote (e.g. \"Schindler's List\"), you MUST escape it by doubling the quote (e.g. 'Schindler''s List')."
-            "\n- Do NOT use double quotes for string literals. Use single quotes only."
-            "\n\n--- VALIDATION ---"
-            "\nBefore finishing, you MUST call the `validate_sql` tool on your generated query. "
-            "If validation fails, you MUST correct the query and call `validate_sql` again. "
-            "Your final output must be ONLY the validated SQL query."
-        ),
-        tools=[validate_sql]
-    )
+    generator = _create_generator(model_name, GENERATOR_INSTRUCTION)
 
     # Step 3: Executor
-    executor = LlmAgent(
-        model=model_name,
-        name="SqlExecutor",
-        description="Executes the validated SQL query.",
-        instruction="Execute the SQL query provided by the previous step using 'execute_sql'. "
-                    "Call 'execute_sql' EXACTLY ONCE with the provided query. "
-                    "Output the result immediately. Do NOT retry. Do NOT fix the query. "
-                    "If execution fails, output the error message as is."
-                    "\n\nCRITICAL: Your final answer MUST be the raw output from the tool execution. "
-                    "Do not summarize or explain it. Pass the data exactly as received.",
-        tools=[execute_sql]
-    )
+    executor = _create_executor()
 
     # Step 4: Narrator (Reporting Agent)
     narrator = create_reporter_agent(model_name)
@@ -72,3 +206,29 @@ def create_sql_sequence_agent(model_name: str) -> SequentialAgent:
         name="SqlSequenceWorkflow",
         sub_agents=[planner, generator, executor, narrator]
     )
+
+def create_schema_prompted_sql_agent(model_name: str) -> SequentialAgent:
+    """
+    Creates the SQL workflow without SqlPlanner: SqlGenerator finds the active
+    database's schema digest in its instruction instead of discovering it
+    with list_tables/describe_table. For schemas that fit the token budget.
+    """
+    return SequentialAgent(
+        name="SqlSchemaPromptWorkflow",
+        sub_agents=[
+            _create_generator(model_name, _schema_prompted_instruction),
+            _create_executor(),
+            create_reporter_agent(model_name),
+        ]
+    )
+
+def create_sql_execution_agent(model_name: str) -> SequentialAgent:
+    """
+    Creates the last two steps of the SQL workflow (execute, report) for
+    questions whose validated SQL is already known, e.g. from the question
+    cache. The caller puts the SQL into session state under SQL_STATE_KEY.
+    """
+    return SequentialAgent(
+        name="SqlExecutionWorkflow",
+        sub_agents=[_create_executor(), create_reporter_agent(model_name)]
+    )
@@ -1,20 +1,27 @@
 import os
 import logging
 import asyncio
-import yaml
+import threading
 from typing import AsyncGenerator, Optional
 from dotenv import load_dotenv
+from opentelemetry import trace
 from backend.core import telemetry
-from backend.core.schema_parser import SchemaParser
+from backend.core.generic_types import StreamChunk
 from backend.core.schema_registry import schema_registry
+from backend.core.schema_intent import SchemaIntent, detect_schema_intent, answer_schema_intent
 from backend.agents.adk.router import create_root_router
 from backend.agents.adk.adapter import AdkRunnerAdapter
-from backend.core.database import register_database, database_context_var
+from backend.core.database import database_context_var
+from backend.core.config_watcher import DatabaseConfigWatcher
+from backend.core.query_budget import cancel_event_var
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Answer "what tables are there" / "describe table X" from the schema registry without the agents
+SCHEMA_FAST_PATH = os.getenv("SCHEMA_FAST_PATH", "true").lower() != "false"
+
 class AgentManager:
     """
     Manages agent initialization and chat orchestration.
@@ -28,26 +35,12 @@ class AgentManager:
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         db_config_path = os.path.join(base_dir, "data", "databases.yaml")
         
+        # Engines and schemas are only declared here; they are created on
+        # first use of each database_id so startup does not scale with tenants.
+        # The watcher re-applies databases.yaml whenever it changes.
+        self.config_watcher = DatabaseConfigWatcher(db_config_path, base_dir)
         if os.path.exists(db_config_path):
-            with open(db_config_path, "r") as f:
-                config = yaml.safe_load(f)
-            
-            for db in config.get("databases", []):
-                db_id = db["id"]
-                # Register Engine
-                # Resolve relative path for sqlite
-                conn_str = db["connection_string"]
-                # If it's a file path in connection string, make it absolute if needed? 
-                # SQLAlchemy usually handles it relative to CWD.
-                register_database(db_id, conn_str)
-                
-                # Load Schema
-                schema_file = os.path.join(base_dir, db["schema_file"])
-                if os.path.exists(schema_file):
-                    metadata = SchemaParser.parse_yaml(schema_file)
-                    schema_registry.load_schema(db_id, metadata)
-                else:
-                    logger.warning(f"Schema file not found for database {db_id}: {schema_file}")
+            self.config_watcher.reload()
         else:
             logger.warning(f"Database configuration not found at {db_config_path}")
         
@@ -56,6 +49,32 @@ class AgentManager:
         self.orchestrator = create_root_router(self.model_name)
         self.runner = AdkRunnerAdapter(agent=self.orchestrator, app_name=self.app_name)
 
+    async def _answer_schema_intent(self, user_id: str, session_id: str, message: str, intent: SchemaIntent) -> AsyncGenerator[StreamChunk, None]:
+        """
+        Streams the answer to a schema question straight from the schema registry,
+        and records the turn in the runner's session so follow-ups keep the context.
+        """
+        token = telemetry.session_context_var.set(session_id)
+        tracer = trace.get_tracer(__name__)
+        try:
+            with tracer.start_as_current_span("SchemaFastPath", attributes={"intent": intent.kind, "tables": ",".join(intent.tables)}):
+                # Span events reach the queue via call_soon_threadsafe; let them land
+                # before our chunks, since nothing else here gives the loop a turn
+                await asyncio.sleep(0)
+                # Same steps SchemaExplorer would show, minus the model round-trips
+                if intent.kind == "list_tables":
+                    yield StreamChunk(is_thinking=True, tool_name="list_tables")
+                else:
+                    for table in intent.tables:
+                        yield StreamChunk(is_thinking=True, tool_name="describe_table", tool_input={"table_name": table})
+                answer = answer_schema_intent(intent)
+                yield StreamChunk(text=answer)
+                await self.runner.record_turn(user_id, session_id, message, answer)
+            await asyncio.sleep(0)
+            yield StreamChunk(is_complete=True)
+        finally:
+            telemetry.session_context_var.reset(token)
+
     async def chat_stream(self, user_id: str, session_id: str, message: str, database_id: Optional[str] = None) -> AsyncGenerator[str, None]:
         """
         Streams responses from the runner back to the UI.
@@ -67,6 +86,10 @@ class AgentManager:
         token = None
         if database_id:
              token = database_context_var.set(database_id)
+
+        # Tripped when the client goes away so running SQL statements are interrupted
+        cancel_event = threading.Event()
+        cancel_token = cancel_event_var.set(cancel_event)
         
         # Create a combined queue for agent output + telemetry
         queue = asyncio.Queue()
@@ -75,9 +98,16 @@ class AgentManager:
         telemetry.register_session_queue(session_id, queue)
         
         # Background task to push agent chunks to the queue
+        intent = detect_schema_intent(message, schema_registry.get_table_names()) if SCHEMA_FAST_PATH else None
+        if intent is not None:
+            logger.info(f"Answering schema question from the registry ({intent.kind}): {message}")
+            stream = self._answer_schema_intent(user_id, session_id, message, intent)
+        else:
+            stream = self.runner.run_stream(user_id=user_id, session_id=session_id, message=message)
+
         async def run_agent():
             try:
-                async for chunk in self.runner.run_stream(user_id=user_id, session_id=session_id, message=message):
+                async for chunk in stream:
                     await queue.put(chunk)
             except Exception as e:
                 logger.error(f"Error in run_agent: {e}")
@@ -139,7 +169,9 @@ class AgentManager:
         finally:
             telemetry.unregister_session_queue(session_id)
             if not task.done():
+                cancel_event.set()
                 task.cancel()
+            cancel_event_var.reset(cancel_token)
             if token:
                 database_context_var.reset(token)
 
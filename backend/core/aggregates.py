@@ -0,0 +1,360 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from sqlalchemy import create_engine, text, Engine
+from sqlalchemy.orm import sessionmaker, Session
+from sqlparse import lexer, tokens as T
+from backend.core.database import get_engine, get_data_version
+from backend.core.query_budget import install_statement_budget
+from backend.core.read_only_guard import install_read_only_guard
+from backend.core.sql_fingerprint import normalize_sql, collapse_whitespace
+
+logger = logging.getLogger(__name__)
+
+# Where side tables are materialized, one SQLite file per database
+AGGREGATE_DIR = os.getenv("AGGREGATE_DIR", os.path.join("data", "aggregates"))
+
+# Prefix of side table names
+SIDE_TABLE_PREFIX = "agg_"
+
+# Aggregate functions that must not survive a rewrite
+_AGGREGATE_CALL = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(", re.IGNORECASE)
+_QUALIFIER = re.compile(r"\b[A-Za-z_]\w*\.(?=[A-Za-z_\"])")
+_QUERY_SHAPE = re.compile(
+    r"^SELECT (?P<select>.+?) FROM (?P<table>\w+)(?: (?:AS )?(?!WHERE\b|GROUP\b)(?P<alias>\w+))?"
+    r"(?: WHERE (?P<where>.+?))? GROUP BY (?P<group>.+?)(?: HAVING (?P<having>.+?))?"
+    r"(?: ORDER BY (?P<order>.+?))?(?: LIMIT (?P<limit>.+?))?$"
+)
+_UNSUPPORTED = re.compile(r"\b(JOIN|UNION|INTERSECT|EXCEPT|WITH|DISTINCT|OVER|WINDOW)\b|\(SELECT\b|,\s*\w+\s+\w+\s*GROUP BY")
+
+class AggregateDefinition(BaseModel):
+    """One materialized aggregate: `measures` (column -> SQL aggregate) of `table` grouped by `group_by`."""
+    name: str
+    table: str
+    group_by: List[str]
+    measures: Dict[str, str]
+
+    @property
+    def side_table(self) -> str:
+        return f"{SIDE_TABLE_PREFIX}{self.name}"
+
+    def build_sql(self) -> str:
+        groups = ", ".join(self.group_by)
+        measures = ", ".join(f"{expr} AS {column}" for column, expr in self.measures.items())
+        return f"SELECT {groups}, {measures} FROM {self.table} GROUP BY {groups} ORDER BY {groups}"
+
+def _normalize_expr(expr: str) -> str:
+    """Comparable form of an expression: no qualifiers, no whitespace, upper case."""
+    return re.sub(r"\s+", "", _QUALIFIER.sub("", expr)).upper()
+
+def _split_top_level(text_: str) -> List[str]:
+    """Splits on commas outside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text_:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return parts
+
+def _mask_literals(query: str) -> Tuple[str, List[str]]:
+    """Replaces string literals with placeholders so keywords inside them cannot confuse parsing."""
+    literals, parts = [], []
+    for ttype, value in lexer.tokenize(query):
+        if ttype in T.Literal.String:
+            parts.append(f"\x00{len(literals)}\x00")
+            literals.append(value)
+        else:
+            parts.append(value)
+    return "".join(parts), literals
+
+def _unmask(text_: str, literals: List[str]) -> str:
+    return re.sub(r"\x00(\d+)\x00", lambda m: literals[int(m.group(1))], text_)
+
+def _identifiers(expr: str) -> List[str]:
+    """Bare column names referenced in an expression (function names excluded)."""
+    names = []
+    for ttype, value in lexer.tokenize(_QUALIFIER.sub("", expr)):
+        if ttype in T.Name:
+            names.append(value.lower())
+    calls = {m.group(1).lower() for m in re.finditer(r"\b(\w+)\s*\(", expr)}
+    return [n for n in names if n not in calls]
+
+def _replace_measures(expr: str, measures: Dict[str, str]) -> str:
+    """Substitutes measure expressions (matched ignoring case, spacing and qualifiers) by their columns."""
+    expr = _QUALIFIER.sub("", expr)
+    # Longest first, so SUM(x) inside SUM(x) / COUNT(*) is not replaced piecemeal
+    for column, normalized in sorted(measures.items(), key=lambda m: -len(m[1])):
+        pattern = r"\s*".join(re.escape(char) for char in normalized)
+        expr = re.sub(r"\b" + pattern, column, expr, flags=re.IGNORECASE)
+    return expr
+
+def _split_alias(item: str) -> Tuple[str, Optional[str]]:
+    """Splits a select item into expression and alias ("expr AS a" or "expr a")."""
+    match = re.match(r'^(?P<expr>.+?) AS (?P<alias>"[^"]+"|\w+)$', item) or \
+        re.match(r'^(?P<expr>.*[\w)"]) (?P<alias>\w+)$', item)
+    if match:
+        return match.group("expr"), match.group("alias")
+    return item, None
+
+def rewrite_for_aggregate(query: str, definition: AggregateDefinition) -> Optional[str]:
+    """
+    Rewrites a GROUP BY query over `definition.table` to read the side table,
+    or returns None if the query does not match the definition exactly:
+    single table, GROUP BY columns equal to `group_by`, WHERE only on group
+    columns, and every aggregate one of the precomputed measures. Queries with
+    double-quoted identifiers are never rewritten.
+    """
+    masked, literals = _mask_literals(normalize_sql(query, lower_identifiers=False))
+    # The lexer reads "name" as a string, which would hide the column from the checks below
+    if any(literal.startswith('"') for literal in literals):
+        return None
+    if _UNSUPPORTED.search(masked):
+        return None
+    shape = _QUERY_SHAPE.match(masked)
+    if not shape or shape.group("table").lower() != definition.table.lower():
+        return None
+
+    groups = {g.lower() for g in definition.group_by}
+    if {_QUALIFIER.sub("", g).strip().lower() for g in _split_top_level(shape.group("group"))} != groups:
+        return None
+    where = shape.group("where")
+    if where and not set(_identifiers(where)) <= groups:
+        return None
+
+    measures = {column: _normalize_expr(expr) for column, expr in definition.measures.items()}
+    by_expr = {normalized: column for column, normalized in measures.items()}
+    items = []
+    for item in _split_top_level(shape.group("select")):
+        expr, alias = _split_alias(item)
+        normalized = _normalize_expr(expr)
+        if normalized.lower() in groups:
+            column = _QUALIFIER.sub("", expr)
+            items.append(f"{column} AS {alias}" if alias else column)
+        elif normalized in by_expr:
+            # Keep the original output column name
+            name = alias or '"' + expr.replace('"', '""') + '"'
+            items.append(f"{by_expr[normalized]} AS {name}")
+        else:
+            return None
+
+    having, order = (_replace_measures(shape.group(g), measures) if shape.group(g) else None for g in ("having", "order"))
+    # Any aggregate left over was not precomputed
+    if any(clause and _AGGREGATE_CALL.search(clause) for clause in (having, order)):
+        return None
+
+    conditions = [f"({_QUALIFIER.sub('', where)})"] if where else []
+    if having:
+        conditions.append(f"({having})")
+    sql = f"SELECT {', '.join(items)} FROM {definition.side_table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if order:
+        sql += " ORDER BY " + order
+    if shape.group("limit"):
+        sql += " LIMIT " + shape.group("limit")
+    return _unmask(sql, literals)
+
+class AggregateStore:
+    """
+    Materialized aggregates per database. Side tables live in a separate SQLite
+    file (the databases themselves are opened read-only) tagged with the data
+    version they were computed from; queries are only rewritten to them while
+    that version is current. Stale stores are rebuilt in the background.
+    """
+    def __init__(self, base_dir: str = AGGREGATE_DIR, memo_size: int = 512):
+        self.base_dir = base_dir
+        self.memo_size = memo_size
+        self._definitions: Dict[str, List[AggregateDefinition]] = {}
+        # db_id -> {"version", "engine", "session_maker"} of the live side database
+        self._stores: Dict[str, Dict[str, Any]] = {}
+        self._building = set()
+        # (db_id, collapsed SQL) -> (data version, rewritten SQL or None)
+        self._memo: "OrderedDict[Tuple[str, str], Tuple[Any, Optional[str]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Serializes side-file builds (startup warm-up and rebuilds can overlap)
+        self._build_lock = threading.Lock()
+
+    def configure(self, db_id: str, definitions: List[AggregateDefinition]):
+        with self._lock:
+            self.drop(db_id)
+            if definitions:
+                self._definitions[db_id] = definitions
+
+    def drop(self, db_id: str):
+        with self._lock:
+            self._definitions.pop(db_id, None)
+            store = self._stores.pop(db_id, None)
+            self._clear_memo(db_id)
+        if store:
+            store["engine"].dispose()
+
+    def definitions(self, db_id: str) -> List[AggregateDefinition]:
+        return self._definitions.get(db_id, [])
+
+    def _clear_memo(self, db_id: str):
+        for key in [k for k in self._memo if k[0] == db_id]:
+            del self._memo[key]
+
+    def _path(self, db_id: str) -> str:
+        return os.path.join(self.base_dir, f"{db_id}.db")
+
+    def _signature(self, db_id: str, version: Any) -> str:
+        """Identifies the data version plus the definitions a side database was built from."""
+        definitions = [d.model_dump() for d in self.definitions(db_id)]
+        payload = json.dumps({"version": list(version), "definitions": definitions}, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _stored_signature(path: str) -> Optional[str]:
+        if not os.path.exists(path):
+            return None
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                row = conn.execute("SELECT value FROM _aggregate_meta WHERE key = 'signature'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def _open(self, db_id: str, version: Any, path: str):
+        engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true", connect_args={"check_same_thread": False})
+        install_statement_budget(engine)
+        install_read_only_guard(engine)
+        with self._lock:
+            old = self._stores.get(db_id)
+            self._stores[db_id] = {"version": version, "engine": engine,
+                                   "session_maker": sessionmaker(bind=engine, autocommit=False, autoflush=False)}
+            self._clear_memo(db_id)
+        if old:
+            old["engine"].dispose()
+
+    def refresh(self, db_id: str, force: bool = False) -> bool:
+        """
+        Brings the side tables of a database up to date with its data version,
+        reusing the file from a previous run when it still matches.
+        Returns True if side tables are available afterwards.
+        """
+        definitions = self.definitions(db_id)
+        version = get_data_version(db_id)
+        if not definitions or version is None:
+            return False
+        with self._build_lock:
+            with self._lock:
+                store = self._stores.get(db_id)
+            if store and store["version"] == version and not force:
+                return True
+
+            path = self._path(db_id)
+            signature = self._signature(db_id, version)
+            if force or self._stored_signature(path) != signature:
+                os.makedirs(self.base_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                side = sqlite3.connect(tmp_path)
+                try:
+                    with get_engine(db_id).connect() as conn:
+                        for definition in definitions:
+                            result = conn.execute(text(definition.build_sql()))
+                            columns = list(result.keys())
+                            side.execute(f"CREATE TABLE {definition.side_table} ({', '.join(columns)})")
+                            side.executemany(
+                                f"INSERT INTO {definition.side_table} VALUES ({', '.join('?' * len(columns))})",
+                                result.fetchall(),
+                            )
+                    side.execute("CREATE TABLE _aggregate_meta (key TEXT PRIMARY KEY, value TEXT)")
+                    side.execute("INSERT INTO _aggregate_meta VALUES ('signature', ?)", (signature,))
+                    side.commit()
+                finally:
+                    side.close()
+                # Readers of the previous file keep their inode; new engines see the new one
+                os.replace(tmp_path, path)
+                logger.info(f"Materialized {len(definitions)} aggregates for '{db_id}'")
+            self._open(db_id, version, path)
+            return True
+
+    def refresh_in_background(self, db_id: str):
+        with self._lock:
+            if db_id in self._building or db_id not in self._definitions:
+                return
+            self._building.add(db_id)
+
+        def build():
+            try:
+                self.refresh(db_id)
+            except Exception as e:
+                logger.error(f"Failed to materialize aggregates for '{db_id}': {e}")
+            finally:
+                with self._lock:
+                    self._building.discard(db_id)
+
+        threading.Thread(target=build, name=f"aggregates-{db_id}", daemon=True).start()
+
+    def rewrite(self, db_id: Optional[str], query: str) -> Optional[str]:
+        """
+        Returns the query rewritten against the side tables when it can be answered
+        from fresh ones, otherwise None. A stale store triggers a background
+        rebuild and the query runs against the base tables meanwhile.
+        """
+        if not db_id or db_id not in self._definitions:
+            return None
+        version = get_data_version(db_id)
+        with self._lock:
+            store = self._stores.get(db_id)
+        if store is None or store["version"] != version:
+            self.refresh_in_background(db_id)
+            return None
+
+        key = (db_id, collapse_whitespace(query))
+        with self._lock:
+            memo = self._memo.get(key)
+        if memo is not None and memo[0] == version:
+            return memo[1]
+        sql = self._match(db_id, query, store["engine"])
+        with self._lock:
+            self._memo[key] = (version, sql)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return sql
+
+    def session(self, db_id: str) -> Session:
+        """Session on the side database of `db_id` (only valid after a successful rewrite)."""
+        with self._lock:
+            return self._stores[db_id]["session_maker"]()
+
+    def _match(self, db_id: str, query: str, engine: Engine) -> Optional[str]:
+        for definition in self.definitions(db_id):
+            try:
+                sql = rewrite_for_aggregate(query, definition)
+            except Exception as e:
+                logger.debug(f"Aggregate rewrite skipped for {definition.name}: {e}")
+                continue
+            if sql is None:
+                continue
+            try:
+                # The side database must accept the rewritten statement
+                with engine.connect() as conn:
+                    conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+            except Exception as e:
+                logger.debug(f"Aggregate rewrite rejected for {definition.name}: {e}")
+                continue
+            return sql
+        return None
+
+aggregate_store = AggregateStore()
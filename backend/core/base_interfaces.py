@@ -23,6 +23,11 @@ class BaseRunner(ABC):
     ) -> AsyncGenerator[StreamChunk, None]:
         pass
 
+    @abstractmethod
+    async def record_turn(self, user_id: str, session_id: str, message: str, answer: str):
+        """Appends a question answered outside the agents, and its answer, to the session history."""
+        pass
+
     @abstractmethod
     async def get_session(self, user_id: str, session_id: str) -> Any:
         """Retrieve session data for a specific user/session."""
@@ -0,0 +1,183 @@
+import os
+import asyncio
+import logging
+import yaml
+from typing import Any, Dict, List, Optional, Tuple
+from backend.core.aggregates import AggregateDefinition, aggregate_store
+from backend.core.cost_estimator import CostLimits
+from backend.core.database import declare_database, unregister_database, dispose_when_drained
+from backend.core.duckdb_database import ATTACH_MODES
+from backend.core.plan_advisor import plan_recorder
+from backend.core.pooling import PoolConfig
+from backend.core.pragmas import SqlitePragmas
+from backend.core.query_cache import query_cache, validation_cache, cost_cache, report_cache
+from backend.core.question_cache import question_cache
+from backend.core.replica import REPLICA_MODES
+from backend.core.schema_registry import schema_registry
+
+logger = logging.getLogger(__name__)
+
+# Entry fields that determine the data and schema a database serves; changing
+# anything else (pool, timeouts, pragmas, ...) keeps state derived from them
+SOURCE_FIELDS = ("connection_string", "attach", "schema_file", "aggregates")
+
+class DatabaseConfigWatcher:
+    """
+    Keeps the database and schema registries in sync with databases.yaml.
+    Only added or changed entries are (re)declared; removed or replaced
+    engines are disposed once their in-flight queries drain.
+    """
+    def __init__(self, config_path: str, base_dir: str, poll_interval: Optional[float] = None, drain_timeout: float = 30.0):
+        self.config_path = config_path
+        self.base_dir = base_dir
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("DB_CONFIG_POLL_SECONDS", "5"))
+        self.drain_timeout = drain_timeout
+        # Current configuration entries: db_id -> entry from databases.yaml
+        self.databases: Dict[str, Dict[str, Any]] = {}
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._retired: List[Tuple[Any, Any, Any]] = []
+        self._drain_tasks = set()
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self, db: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds and validates everything _declare needs from one entry, so a
+        broken entry fails the reload before any database is retired.
+        """
+        replica = db.get("replica")
+        if replica is not None and replica not in REPLICA_MODES:
+            raise ValueError(f"Unsupported replica mode '{replica}' for database '{db['id']}'")
+        attach_mode = db.get("attach_mode", "copy")
+        if attach_mode not in ATTACH_MODES:
+            raise ValueError(f"Unsupported attach mode '{attach_mode}' for database '{db['id']}'")
+        return {
+            "db_id": db["id"],
+            "db_url": db["connection_string"],
+            "schema_file": db["schema_file"],
+            "pool_config": PoolConfig(**db["pool"]) if db.get("pool") else None,
+            "statement_timeout": float(db["statement_timeout_seconds"]) if db.get("statement_timeout_seconds") is not None else None,
+            "read_only": bool(db.get("read_only", False)),
+            "cost_limits": CostLimits(**db["cost_limits"]) if db.get("cost_limits") else None,
+            "pragmas": SqlitePragmas(**db["pragmas"]) if db.get("pragmas") else None,
+            "replica": replica,
+            "attach": db.get("attach"),
+            "attach_mode": attach_mode,
+            "aggregates": [AggregateDefinition(**a) for a in db.get("aggregates") or []],
+        }
+
+    def _declare(self, spec: Dict[str, Any], keep_derived: bool = False):
+        db_id = spec["db_id"]
+        declare_database(
+            db_id, spec["db_url"], spec["pool_config"],
+            statement_timeout=spec["statement_timeout"],
+            read_only=spec["read_only"],
+            cost_limits=spec["cost_limits"],
+            pragmas=spec["pragmas"],
+            replica=spec["replica"],
+            attach=spec["attach"],
+            attach_mode=spec["attach_mode"],
+        )
+        if keep_derived:
+            return
+        aggregate_store.configure(db_id, spec["aggregates"])
+
+        schema_file = os.path.join(self.base_dir, spec["schema_file"])
+        if os.path.exists(schema_file):
+            schema_registry.declare_schema(db_id, schema_file)
+        else:
+            logger.warning(f"Schema file not found for database {db_id}: {schema_file}")
+
+    def _retire(self, db_id: str, keep_derived: bool = False):
+        """
+        Unregisters a database's engines and forgets cached results, which can
+        depend on settings like read_only and cost_limits. With keep_derived the
+        schema, question cache, recorded plans and aggregates stay, since the
+        database is re-declared on the same data.
+        """
+        retired = unregister_database(db_id)
+        query_cache.invalidate(db_id)
+        validation_cache.invalidate(db_id)
+        cost_cache.invalidate(db_id)
+        report_cache.invalidate(db_id)
+        if not keep_derived:
+            schema_registry.unload_schema(db_id)
+            question_cache.invalidate(db_id)
+            plan_recorder.reset(db_id)
+            aggregate_store.drop(db_id)
+        if any(r is not None for r in retired):
+            self._retired.append(retired)
+
+    def reload(self) -> Dict[str, List[str]]:
+        """
+        Re-reads databases.yaml and applies the difference to the registries.
+        Returns the IDs that were added, changed and removed.
+        """
+        self._file_stamp = self._stamp()
+        with open(self.config_path, "r") as f:
+            config = yaml.safe_load(f) or {}
+        new_databases = {db["id"]: db for db in config.get("databases", [])}
+        # Validate every added or changed entry first: a bad edit raises here and
+        # leaves the running configuration untouched
+        specs = {db_id: self._parse(db) for db_id, db in new_databases.items() if self.databases.get(db_id) != db}
+
+        diff = {"added": [], "changed": [], "removed": []}
+        for db_id in self.databases.keys() - new_databases.keys():
+            self._retire(db_id)
+            diff["removed"].append(db_id)
+
+        for db_id, spec in specs.items():
+            keep_derived = False
+            if db_id not in self.databases:
+                diff["added"].append(db_id)
+            else:
+                old, new = self.databases[db_id], new_databases[db_id]
+                keep_derived = all(old.get(field) == new.get(field) for field in SOURCE_FIELDS)
+                self._retire(db_id, keep_derived)
+                diff["changed"].append(db_id)
+            self._declare(spec, keep_derived)
+
+        self.databases = new_databases
+        if any(diff.values()):
+            logger.info(f"Applied databases.yaml changes: {diff}")
+        return diff
+
+    def check(self) -> Optional[Dict[str, List[str]]]:
+        """Reloads the configuration if the file changed since the last load."""
+        stamp = self._stamp()
+        if stamp is None or stamp == self._file_stamp:
+            return None
+        try:
+            return self.reload()
+        except Exception as e:
+            # Keep serving the last good configuration
+            logger.error(f"Failed to reload {self.config_path}: {e}")
+            self._file_stamp = stamp
+            return None
+
+    def drain_retired(self):
+        """Schedules disposal of engines retired by previous reloads."""
+        while self._retired:
+            engine, async_engine, duckdb_database = self._retired.pop()
+            task = asyncio.create_task(dispose_when_drained(engine, async_engine, duckdb_database, timeout=self.drain_timeout))
+            self._drain_tasks.add(task)
+            task.add_done_callback(self._drain_tasks.discard)
+
+    async def watch(self):
+        """Polls databases.yaml for changes until cancelled."""
+        if self.poll_interval <= 0:
+            return
+        logger.info(f"Watching {self.config_path} every {self.poll_interval}s")
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.check()
+            self.drain_retired()
+
+    def list_databases(self) -> List[Dict[str, Any]]:
+        """Public info about the currently loaded databases."""
+        return [{"id": db["id"], "name": db["name"], "type": db["type"]} for db in self.databases.values()]
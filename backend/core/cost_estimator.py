@@ -0,0 +1,159 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import sqlparse
+from pydantic import BaseModel, Field
+from sqlalchemy import Connection, inspect, text
+
+# Rows per lookup SQLite itself assumes for an equality on an unanalyzed index
+DEFAULT_EQ_ROWS = 10
+# Fraction of an index a range constraint is assumed to select (1/4, as in SQLite)
+RANGE_SELECTIVITY = 4
+# Row count assumed for tables without statistics (views, system tables, ...)
+UNKNOWN_TABLE_ROWS = 1000
+
+_LOOP_PATTERN = re.compile(
+    r"^(?P<kind>SCAN|SEARCH) (?:TABLE )?(?P<table>\w+)(?: AS \w+)?"
+    r"(?: USING (?P<automatic>AUTOMATIC )?(?:PARTIAL )?(?:COVERING )?"
+    r"(?:INDEX (?P<index>\w+)|INDEX|INTEGER PRIMARY KEY|PRIMARY KEY))?"
+    r"(?: \((?P<constraint>[^)]*)\))?"
+)
+_DERIVED_PATTERN = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\w+)")
+
+class CostLimits(BaseModel):
+    """Per-database query cost thresholds (the `cost_limits` section in databases.yaml)."""
+    # Queries estimated to examine more rows run with a forced LIMIT
+    limit_rows: Optional[int] = None
+    # Queries estimated to examine more rows are refused
+    reject_rows: Optional[int] = None
+    forced_limit: int = 1000
+
+class CostEstimate(BaseModel):
+    """Pre-execution estimate of a query's cost, from its plan and table statistics."""
+    # Rows examined by the most expensive loop nest
+    estimated_rows: int
+    # Tables read by a full table scan
+    full_scans: List[str] = Field(default_factory=list)
+    # How much the joins multiply the rows of the outermost loop
+    join_fanout: float = 1.0
+
+def load_index_statistics(conn: Connection) -> Dict[str, List[int]]:
+    """
+    Per index, the sqlite_stat1 numbers: total rows, then the average rows
+    per distinct value of each column prefix. Empty before ANALYZE.
+    """
+    if conn.dialect.name != "sqlite" or not inspect(conn).has_table("sqlite_stat1"):
+        return {}
+    stats = {}
+    for idx, stat in conn.execute(text("SELECT idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL")):
+        numbers = [int(n) for n in str(stat).split() if n.isdigit()]
+        if numbers:
+            stats[idx.lower()] = numbers
+    return stats
+
+def _loop_rows(match: re.Match, table_rows: int, index_stats: Dict[str, List[int]]) -> int:
+    """Rows one iteration of a plan loop is expected to visit."""
+    if match.group("kind") == "SCAN":
+        return table_rows
+    constraint = match.group("constraint") or ""
+    terms = [t.strip() for t in constraint.split(" AND ") if t.strip()]
+    equalities = sum(1 for t in terms if re.fullmatch(r"\w+=\?", t))
+    has_range = any(op in t for t in terms for op in ("<", ">"))
+
+    index = (match.group("index") or "").lower()
+    if equalities:
+        stats = index_stats.get(index)
+        if stats and len(stats) > equalities:
+            rows = stats[equalities]
+        elif not index or index.startswith("sqlite_autoindex_"):
+            # rowid / primary key / UNIQUE constraint lookups
+            rows = 1
+        else:
+            rows = DEFAULT_EQ_ROWS
+    else:
+        rows = table_rows
+    if has_range:
+        rows = rows // RANGE_SELECTIVITY
+    return max(1, min(rows, table_rows))
+
+def estimate_cost(plan: Sequence[Tuple[int, int, str]], table_rows: Dict[str, int],
+                  index_stats: Optional[Dict[str, List[int]]] = None,
+                  aliases: Optional[Dict[str, str]] = None) -> CostEstimate:
+    """
+    Estimates the cost of a query from its EXPLAIN QUERY PLAN rows (id, parent, detail).
+    Joins are nested loops, so the rows examined by one loop nest are the product
+    of the rows each loop visits per iteration; correlated subqueries run once per
+    row of their enclosing nest. `table_rows` maps lowercase table names to row
+    counts and `aliases` maps aliases to tables.
+    """
+    index_stats = index_stats or {}
+    aliases = aliases or {}
+    children: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+    for node_id, parent, detail in plan:
+        children[parent].append((node_id, detail))
+    derived: Dict[str, int] = {}
+    full_scans: List[str] = []
+    fanouts: Dict[int, float] = {}
+
+    def nest(parent: int) -> Tuple[int, int]:
+        """(rows produced by the loop nest under `parent`, most rows examined anywhere below it)"""
+        product, first, examined, correlated = 1, None, 0, []
+        for node_id, detail in children.get(parent, []):
+            loop = _LOOP_PATTERN.match(detail)
+            derived_match = _DERIVED_PATTERN.match(detail)
+            if derived_match:
+                rows, inner = nest(node_id)
+                derived[derived_match.group(1).lower()] = rows
+                examined = max(examined, inner)
+            elif detail == "SCAN CONSTANT ROW":
+                continue
+            elif loop:
+                name = loop.group("table").lower()
+                table = aliases.get(name, name)
+                size = derived.get(name, table_rows.get(table, UNKNOWN_TABLE_ROWS))
+                # Same notion as the index advisor: covering index scans do not count
+                if loop.group("kind") == "SCAN" and "COVERING" not in detail and name not in derived:
+                    full_scans.append(table)
+                rows = _loop_rows(loop, size, index_stats)
+                first = rows if first is None else first
+                product *= rows
+            elif detail.startswith("CORRELATED"):
+                correlated.append(node_id)
+            elif children.get(node_id):
+                examined = max(examined, nest(node_id)[1])
+        examined = max(examined, product)
+        for node_id in correlated:
+            examined = max(examined, product * nest(node_id)[1])
+        fanouts[parent] = product / first if first else 1.0
+        return product, examined
+
+    _, examined = nest(0)
+    return CostEstimate(
+        estimated_rows=examined,
+        full_scans=list(dict.fromkeys(full_scans)),
+        join_fanout=round(fanouts.get(0, 1.0), 2),
+    )
+
+def cost_action(estimate: CostEstimate, limits: Optional[CostLimits]) -> str:
+    """Decision for an estimate under `limits`: "run", "limit" (forced LIMIT) or "reject"."""
+    if limits is None:
+        return "run"
+    if limits.reject_rows is not None and estimate.estimated_rows > limits.reject_rows:
+        return "reject"
+    if limits.limit_rows is not None and estimate.estimated_rows > limits.limit_rows:
+        return "limit"
+    return "run"
+
+def limit_query(query: str, limit: int) -> str:
+    """Wraps a query so it returns at most `limit` rows."""
+    # Comments could swallow the closing parenthesis or hide a trailing semicolon
+    body = sqlparse.format(query, strip_comments=True).strip().rstrip(";")
+    return f"SELECT * FROM (\n{body}\n) LIMIT {int(limit)}"
+
+def describe_cost(estimate: CostEstimate) -> str:
+    parts = [f"~{estimate.estimated_rows:,} rows examined"]
+    if estimate.full_scans:
+        parts.append(f"full scan of {', '.join(estimate.full_scans)}")
+    if estimate.join_fanout > 1:
+        parts.append(f"join fan-out x{estimate.join_fanout:g}")
+    return "; ".join(parts)
@@ -1,9 +1,20 @@
-import os
+import time
+import asyncio
 import logging
-from typing import Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 from sqlalchemy import create_engine, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from contextvars import ContextVar
+from backend.core.cost_estimator import CostLimits
+from backend.core.duckdb_database import DuckDBDatabase
+from backend.core.pooling import PoolConfig, apply_uri_flags, engine_pool_kwargs, pool_status
+from backend.core.pragmas import SqlitePragmas, install_pragmas
+from backend.core.query_budget import install_statement_budget
+from backend.core.read_only_guard import install_read_only_guard
+from backend.core.replica import REPLICA_MODES, MemoryReplica, file_version, install_replica
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +25,310 @@ database_context_var: ContextVar[Optional[str]] = ContextVar("database_id", defa
 _engines: Dict[str, Engine] = {}
 _session_makers: Dict[str, sessionmaker] = {}
 
+# Registry of async engines: db_id -> AsyncEngine
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_session_makers: Dict[str, async_sessionmaker] = {}
+
+# SQLite file backing each registered database (None for in-memory/non-SQLite)
+_database_files: Dict[str, Optional[str]] = {}
+
+# Statement timeout (seconds) enforced per database, None for unlimited
+_statement_timeouts: Dict[str, Optional[float]] = {}
+
+# Databases whose connections carry the read-only authorizer
+_read_only_guards: Dict[str, bool] = {}
+
+# Pool settings each database's engines were built with, None for SQLAlchemy's defaults
+_pool_configs: Dict[str, Optional[PoolConfig]] = {}
+
+# Query cost thresholds per database, None for no gating
+_cost_limits: Dict[str, Optional[CostLimits]] = {}
+
+# Embedded DuckDB databases, queried without SQLAlchemy engines: db_id -> DuckDBDatabase
+_duckdb_databases: Dict[str, DuckDBDatabase] = {}
+
+# In-memory replicas serving a database's sessions, shared by its sync and async engines
+_replicas: Dict[str, MemoryReplica] = {}
+
+# Declared databases awaiting lazy registration: db_id -> register_database kwargs
+_database_specs: Dict[str, Dict[str, Any]] = {}
+_registration_lock = threading.RLock()
+
+# Async drivers used when a plain (synchronous) URL is handed to register_async_database
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
 # Create Base class for declarative models
 Base = declarative_base()
 
-def register_database(db_id: str, db_url: str):
+def register_database(db_id: str, db_url: str, pool_config: Optional[PoolConfig] = None, statement_timeout: Optional[float] = None, read_only: bool = False, cost_limits: Optional[CostLimits] = None, pragmas: Optional[SqlitePragmas] = None, replica: Optional[str] = None):
     """
     Registers a new database engine.
+    If a pool config is given, the engine uses an instrumented QueuePool with
+    those settings and any SQLite URI flags (e.g. mode=ro) are applied to the URL.
+    statement_timeout (seconds) is enforced on SQLite through a progress handler.
+    read_only installs a SQLite authorizer that denies any write on every connection.
+    cost_limits gate queries on their estimated cost before they run.
+    pragmas is a SQLite PRAGMA profile applied on every new connection.
+    replica="memory" serves the sessions of a SQLite file from an in-memory copy,
+    refreshed when the file changes.
     """
+    if pool_config:
+        db_url = apply_uri_flags(db_url, pool_config.uri_flags)
     logger.info(f"Registering database '{db_id}' with URL: {db_url}")
+    memory_replica = _replica_for(db_id, db_url, replica)
     engine = create_engine(
         db_url,
         connect_args={"check_same_thread": False} if db_url.startswith("sqlite") else {},
-        echo=False  # Set to True for verbose SQL logging
+        echo=False,  # Set to True for verbose SQL logging
+        # The URL still selects the dialect and pool; connections open on the replica
+        **({"creator": memory_replica.connect} if memory_replica else {}),
+        **engine_pool_kwargs(db_url, pool_config)
     )
     _engines[db_id] = engine
     _session_makers[db_id] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    _pool_configs[db_id] = pool_config
+    _database_files[db_id] = sqlite_file_path(db_url)
+    _statement_timeouts[db_id] = statement_timeout
+    _cost_limits[db_id] = cost_limits
+    if engine.dialect.name == "sqlite":
+        if memory_replica:
+            install_replica(engine, memory_replica)
+        # Before the guard: its authorizer denies PRAGMAs that set a value
+        if pragmas:
+            install_pragmas(engine, pragmas)
+        install_statement_budget(engine)
+        if read_only:
+            install_read_only_guard(engine)
+    _read_only_guards[db_id] = read_only and engine.dialect.name == "sqlite"
+
+def register_duckdb_database(db_id: str, db_url: str, statement_timeout: Optional[float] = None, read_only: bool = False, attach: Optional[str] = None, attach_mode: str = "copy"):
+    """
+    Registers an embedded DuckDB database: duckdb:///path/to/file.duckdb, or
+    duckdb:///:memory: with `attach` naming a SQLite file whose tables DuckDB
+    serves (see DuckDBDatabase for the attach modes). The SQL tools query it
+    directly through DuckDB and only let SELECT statements through.
+    """
+    path = make_url(db_url).database or ":memory:"
+    logger.info(f"Registering DuckDB database '{db_id}' with URL: {db_url}" + (f" (attaching {attach})" if attach else ""))
+    _duckdb_databases[db_id] = DuckDBDatabase(db_id, path, attach=attach, attach_mode=attach_mode, read_only=read_only)
+    _database_files[db_id] = attach or (None if path == ":memory:" else path)
+    _statement_timeouts[db_id] = statement_timeout
+    _cost_limits[db_id] = None
+    # Validation rejects anything but SELECT on DuckDB, so the keyword walk is not needed
+    _read_only_guards[db_id] = True
+
+def is_duckdb_url(db_url: str) -> bool:
+    return make_url(db_url).get_backend_name() == "duckdb"
+
+def sqlite_file_path(db_url: str) -> Optional[str]:
+    """Returns the file behind a SQLite URL, or None for in-memory and other backends."""
+    url = make_url(db_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    path = url.database
+    if path.startswith("file:"):
+        path = path[len("file:"):].split("?", 1)[0]
+    return None if path == ":memory:" or url.query.get("mode") == "memory" else path
+
+def _replica_for(db_id: str, db_url: str, replica: Optional[str]) -> Optional[MemoryReplica]:
+    """
+    Returns the replica serving the database's sessions (shared by its sync and
+    async engines), creating it on first registration. None when not configured.
+    """
+    if replica is None:
+        _replicas.pop(db_id, None)
+        return None
+    if replica not in REPLICA_MODES:
+        raise ValueError(f"Unsupported replica mode '{replica}' for database '{db_id}' (expected one of: {', '.join(sorted(REPLICA_MODES))})")
+    path = sqlite_file_path(db_url)
+    if path is None:
+        logger.warning(f"Ignoring replica '{replica}' for database '{db_id}': only SQLite files can be replicated")
+        _replicas.pop(db_id, None)
+        return None
+    with _registration_lock:
+        current = _replicas.get(db_id)
+        if current is None or current.path != path:
+            current = _replicas[db_id] = MemoryReplica(db_id, path)
+        return current
+
+def resolve_database_id(db_id: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the ID of the specified or active database, falling back to the
+    only known database like get_engine does.
+    """
+    if db_id is None:
+        db_id = database_context_var.get()
+    if db_id and (db_id in _engines or db_id in _duckdb_databases or db_id in _database_specs):
+        return db_id
+    return _single_database_id({**_engines, **_duckdb_databases})
+
+def get_database_type(db_id: Optional[str] = None) -> Optional[str]:
+    """Returns "duckdb" or the SQLAlchemy dialect name (e.g. "sqlite") of the database."""
+    db_id = resolve_database_id(db_id)
+    if db_id is None:
+        return None
+    _ensure_registered(db_id)
+    if db_id in _duckdb_databases:
+        return "duckdb"
+    engine = _engines.get(db_id)
+    return engine.dialect.name if engine is not None else None
+
+def get_duckdb_database(db_id: Optional[str] = None) -> DuckDBDatabase:
+    """Returns the embedded DuckDB database for the specified or active database."""
+    db_id = resolve_database_id(db_id)
+    _ensure_registered(db_id)
+    if db_id not in _duckdb_databases:
+        raise ValueError(f"Database ID '{db_id}' is not a DuckDB database.")
+    return _duckdb_databases[db_id]
+
+def get_statement_timeout(db_id: Optional[str] = None) -> Optional[float]:
+    """Returns the statement timeout (seconds) configured for the database, if any."""
+    db_id = resolve_database_id(db_id)
+    if db_id is None:
+        return None
+    _ensure_registered(db_id)
+    return _statement_timeouts.get(db_id)
+
+def get_cost_limits(db_id: Optional[str] = None) -> Optional[CostLimits]:
+    """Returns the query cost thresholds configured for the database, if any."""
+    db_id = resolve_database_id(db_id)
+    if db_id is None:
+        return None
+    _ensure_registered(db_id)
+    return _cost_limits.get(db_id)
+
+def is_read_only_guarded(db_id: Optional[str] = None) -> bool:
+    """True if the database's connections enforce read-only mode through the SQLite authorizer."""
+    db_id = resolve_database_id(db_id)
+    if db_id is None:
+        return False
+    _ensure_registered(db_id)
+    return _read_only_guards.get(db_id, False)
+
+def get_data_version(db_id: Optional[str] = None) -> Optional[Tuple[int, ...]]:
+    """
+    Returns a token that changes whenever the database's data changes on disk.
+    For SQLite this is the mtime and size of the database file and its WAL.
+    (PRAGMA data_version is per-connection, so it cannot be compared across pooled
+    connections.) Returns None when no file backs the database.
+    """
+    db_id = resolve_database_id(db_id)
+    if db_id is None:
+        return None
+    _ensure_registered(db_id)
+    path = _database_files.get(db_id)
+    # The file, not an in-memory replica of it, is the source of truth
+    return file_version(path) if path else None
+
+def declare_database(db_id: str, db_url: str, pool_config: Optional[PoolConfig] = None, statement_timeout: Optional[float] = None, read_only: bool = False, cost_limits: Optional[CostLimits] = None, pragmas: Optional[SqlitePragmas] = None, replica: Optional[str] = None, attach: Optional[str] = None, attach_mode: str = "copy"):
+    """
+    Declares a database without creating its engines.
+    The sync and async engines are registered on the first request for this ID.
+    DuckDB URLs take `attach` / `attach_mode` (see register_duckdb_database).
+    """
+    if is_duckdb_url(db_url):
+        _database_specs[db_id] = {"db_url": db_url, "statement_timeout": statement_timeout, "read_only": read_only, "attach": attach, "attach_mode": attach_mode}
+        return
+    _database_specs[db_id] = {"db_url": db_url, "pool_config": pool_config, "statement_timeout": statement_timeout, "read_only": read_only, "cost_limits": cost_limits, "pragmas": pragmas, "replica": replica}
+
+def unregister_database(db_id: str) -> Tuple[Optional[Engine], Optional[AsyncEngine], Optional[DuckDBDatabase]]:
+    """
+    Removes a database so no new sessions can be opened against it.
+    Returns the retired (engine, async_engine, duckdb_database) for dispose_when_drained.
+    """
+    with _registration_lock:
+        _database_specs.pop(db_id, None)
+        _session_makers.pop(db_id, None)
+        _async_session_makers.pop(db_id, None)
+        _database_files.pop(db_id, None)
+        _statement_timeouts.pop(db_id, None)
+        _read_only_guards.pop(db_id, None)
+        _cost_limits.pop(db_id, None)
+        _pool_configs.pop(db_id, None)
+        # Retired engines keep their replica alive until they are disposed
+        _replicas.pop(db_id, None)
+        return _engines.pop(db_id, None), _async_engines.pop(db_id, None), _duckdb_databases.pop(db_id, None)
+
+def _in_flight(engine: Optional[Engine]) -> int:
+    """Number of connections currently checked out of an engine's pool."""
+    if engine is None or not hasattr(engine.pool, "checkedout"):
+        return 0
+    return engine.pool.checkedout()
+
+async def dispose_when_drained(engine: Optional[Engine], async_engine: Optional[AsyncEngine], duckdb_database: Optional[DuckDBDatabase] = None,
+                               timeout: float = 30.0, poll_interval: float = 0.1):
+    """
+    Disposes retired engines (and closes a retired DuckDB database) once their
+    in-flight queries have returned their connections, or after `timeout`
+    seconds at the latest.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if (_in_flight(engine) == 0 and _in_flight(async_engine.sync_engine if async_engine else None) == 0
+                and (duckdb_database is None or duckdb_database.in_flight() == 0)):
+            break
+        await asyncio.sleep(poll_interval)
+    else:
+        logger.warning("Disposing retired engine with queries still in flight (drain timeout reached)")
+
+    if engine is not None:
+        engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if duckdb_database is not None:
+        duckdb_database.close()
+
+def _ensure_registered(db_id: Optional[str]):
+    """Materializes the engines of a declared database on first use."""
+    if not db_id or db_id not in _database_specs:
+        return
+    if (db_id in _engines and db_id in _async_engines) or db_id in _duckdb_databases:
+        return
+    with _registration_lock:
+        spec = _database_specs[db_id]
+        if is_duckdb_url(spec["db_url"]):
+            if db_id not in _duckdb_databases:
+                register_duckdb_database(db_id, **spec)
+            return
+        if db_id not in _engines:
+            register_database(db_id, **spec)
+        if db_id not in _async_engines:
+            register_async_database(db_id, **spec)
+
+def _resolve_and_register(db_id: Optional[str]) -> Optional[str]:
+    """resolve_database_id plus _ensure_registered, for running in a worker thread."""
+    db_id = resolve_database_id(db_id)
+    _ensure_registered(db_id)
+    return db_id
+
+async def prepare_database_async(db_id: Optional[str] = None) -> Optional[str]:
+    """
+    Does the blocking work a query may need before it runs, in a worker thread
+    instead of on the event loop: registering a declared database (which can
+    copy a replica or DuckDB tables) and refreshing a stale in-memory replica.
+    Returns the resolved database ID.
+    """
+    if db_id is None:
+        db_id = database_context_var.get()
+    registered = db_id in _duckdb_databases or db_id in _engines
+    materialized = db_id in _duckdb_databases or (db_id in _engines and db_id in _async_engines)
+    if not registered or (db_id in _database_specs and not materialized):
+        db_id = await asyncio.to_thread(_resolve_and_register, db_id)
+    replica = _replicas.get(db_id) if db_id else None
+    if replica is not None and replica.is_stale():
+        await asyncio.to_thread(replica.refresh_if_changed)
+    return db_id
+
+def _single_database_id(registry: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the only known database ID (registered or declared), if there is exactly one.
+    """
+    known = set(registry) | set(_database_specs)
+    if len(known) != 1:
+        return None
+    db_id = next(iter(known))
+    _ensure_registered(db_id)
+    return db_id if db_id in registry else None
 
 def get_engine(db_id: Optional[str] = None) -> Engine:
     """
@@ -36,11 +336,13 @@ def get_engine(db_id: Optional[str] = None) -> Engine:
     """
     if db_id is None:
         db_id = database_context_var.get()
+    _ensure_registered(db_id)
     
     if not db_id or db_id not in _engines:
         # Fallback to the first registered engine if only one exists (backward compatibility)
-        if len(_engines) == 1:
-            return next(iter(_engines.values()))
+        default_id = _single_database_id(_engines)
+        if default_id:
+            return _engines[default_id]
         raise ValueError(f"No active database context and no default found. (Context: {db_id})")
     
     return _engines[db_id]
@@ -51,15 +353,106 @@ def get_session(db_id: Optional[str] = None) -> Session:
     """
     if db_id is None:
         db_id = database_context_var.get()
+    _ensure_registered(db_id)
         
     if not db_id or db_id not in _session_makers:
          # Fallback logic for single-DB setup
-        if len(_session_makers) == 1:
-            return next(iter(_session_makers.values()))()
+        default_id = _single_database_id(_session_makers)
+        if default_id:
+            return _session_makers[default_id]()
         raise ValueError(f"Cannot create session: Database ID '{db_id}' not registered.")
 
     return _session_makers[db_id]()
 
+def _to_async_url(db_url: str) -> str:
+    """Rewrites a synchronous connection string to use the matching async driver."""
+    url = make_url(db_url)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+def register_async_database(db_id: str, db_url: str, pool_config: Optional[PoolConfig] = None, statement_timeout: Optional[float] = None, read_only: bool = False, cost_limits: Optional[CostLimits] = None, pragmas: Optional[SqlitePragmas] = None, replica: Optional[str] = None):
+    """
+    Registers an async database engine (e.g. aiosqlite for SQLite) so queries
+    can be awaited without blocking the event loop.
+    """
+    if pool_config:
+        db_url = apply_uri_flags(db_url, pool_config.uri_flags)
+    async_url = _to_async_url(db_url)
+    logger.info(f"Registering async database '{db_id}' with URL: {async_url}")
+    memory_replica = _replica_for(db_id, db_url, replica)
+    engine = create_async_engine(
+        async_url,
+        echo=False,
+        **({"async_creator": memory_replica.connect_async} if memory_replica else {}),
+        **engine_pool_kwargs(async_url, pool_config, is_async=True)
+    )
+    if engine.dialect.name == "sqlite":
+        if memory_replica:
+            install_replica(engine.sync_engine, memory_replica, is_async=True)
+        if pragmas:
+            install_pragmas(engine.sync_engine, pragmas, is_async=True)
+        install_statement_budget(engine.sync_engine, is_async=True)
+        if read_only:
+            install_read_only_guard(engine.sync_engine, is_async=True)
+    _read_only_guards[db_id] = read_only and engine.dialect.name == "sqlite"
+    _statement_timeouts[db_id] = statement_timeout
+    _cost_limits[db_id] = cost_limits
+    _async_engines[db_id] = engine
+    _async_session_makers[db_id] = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    _pool_configs[db_id] = pool_config
+
+def get_async_engine(db_id: Optional[str] = None) -> AsyncEngine:
+    """
+    Returns the async engine for the specified or active database.
+    """
+    if db_id is None:
+        db_id = database_context_var.get()
+    _ensure_registered(db_id)
+
+    if not db_id or db_id not in _async_engines:
+        default_id = _single_database_id(_async_engines)
+        if default_id:
+            return _async_engines[default_id]
+        raise ValueError(f"No active async database context and no default found. (Context: {db_id})")
+
+    return _async_engines[db_id]
+
+def get_async_session(db_id: Optional[str] = None) -> AsyncSession:
+    """
+    Returns a new async database session for the active database.
+    """
+    if db_id is None:
+        db_id = database_context_var.get()
+    _ensure_registered(db_id)
+
+    if not db_id or db_id not in _async_session_makers:
+        default_id = _single_database_id(_async_session_makers)
+        if default_id:
+            return _async_session_makers[default_id]()
+        raise ValueError(f"Cannot create async session: Database ID '{db_id}' not registered.")
+
+    return _async_session_makers[db_id]()
+
+def get_pool_status(db_id: str) -> Dict[str, Any]:
+    """
+    Returns live connection pool statistics for a registered database.
+    Declared databases whose engines have not been created yet report no pools.
+    """
+    if db_id in _duckdb_databases:
+        # Embedded: every call opens a cursor on the shared DuckDB instance
+        return {"database_id": db_id, "materialized": True, "engine": "duckdb", "mode": _duckdb_databases[db_id].mode}
+    if db_id not in _engines:
+        if db_id in _database_specs:
+            return {"database_id": db_id, "materialized": False}
+        raise ValueError(f"Database ID '{db_id}' not registered.")
+
+    config = _pool_configs.get(db_id)
+    status = {"database_id": db_id, "materialized": True, "sync": pool_status(_engines[db_id].pool, config)}
+    if db_id in _async_engines:
+        status["async"] = pool_status(_async_engines[db_id].pool, config)
+    return status
+
 def get_db():
     """Dependency for getting a database session (fastapi style)."""
     db = get_session()
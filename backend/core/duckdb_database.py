@@ -0,0 +1,253 @@
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set
+import duckdb
+import pyarrow as pa
+from backend.core.query_budget import StatementBudget
+from backend.core.replica import file_version
+
+logger = logging.getLogger(__name__)
+
+# How a SQLite file is served through DuckDB: "copy" (the default) loads its
+# tables into DuckDB's columnar storage (reloaded when the file changes), "scan"
+# attaches it with DuckDB's sqlite extension (reads the live file)
+ATTACH_MODES = {"scan", "copy"}
+
+# The only statements a read-only DuckDB database runs (SELECT covers WITH, VALUES, etc.)
+READ_ONLY_STATEMENTS = {duckdb.StatementType.SELECT, duckdb.StatementType.EXPLAIN}
+
+# How often a running statement's budget is checked (DuckDB has no progress handler)
+BUDGET_POLL_INTERVAL = 0.05
+
+# Rows of a SQLite table held in memory at a time while copying it into DuckDB
+COPY_BATCH_ROWS = 50_000
+
+# SQLite storage classes (typeof) and the Python values they come back as
+_STORAGE_CLASSES = {"integer": int, "real": float, "blob": bytes, "text": str}
+
+def _arrow_type(kinds: Set[type]) -> pa.DataType:
+    """
+    Arrow type for a SQLite column holding values of `kinds`. SQLite columns are
+    dynamically typed (an INTEGER column can hold REALs), so the type comes from
+    the stored values, not the declaration.
+    """
+    if kinds <= {int}:
+        return pa.int64()
+    if kinds <= {int, float}:
+        return pa.float64()
+    if kinds <= {bytes}:
+        return pa.binary()
+    return pa.string()
+
+def _arrow_column(values: List[Any], type_: pa.DataType) -> pa.Array:
+    if type_ == pa.float64():
+        values = [float(v) if v is not None else None for v in values]
+    elif type_ == pa.string():
+        values = [str(v) if v is not None else None for v in values]
+    return pa.array(values, type=type_)
+
+def _column_types(source: sqlite3.Connection, table: str, columns: List[str]) -> List[pa.DataType]:
+    """Arrow type of each column, from the storage classes it holds (one scan, nothing fetched)."""
+    quoted = ['"' + column.replace('"', '""') + '"' for column in columns]
+    checks = [f"MAX(typeof({column}) = '{storage}')" for column in quoted for storage in _STORAGE_CLASSES]
+    flags = source.execute(f'SELECT {", ".join(checks)} FROM "{table}"').fetchone()
+    kinds = len(_STORAGE_CLASSES)
+    return [
+        _arrow_type({kind for kind, present in zip(_STORAGE_CLASSES.values(), flags[i * kinds:(i + 1) * kinds]) if present})
+        for i in range(len(columns))
+    ]
+
+def copy_sqlite_tables(conn: duckdb.DuckDBPyConnection, path: str) -> List[str]:
+    """
+    Loads every table of a SQLite file into DuckDB, COPY_BATCH_ROWS rows at a
+    time. Returns the table names.
+    """
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = [row[0] for row in source.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        for name in tables:
+            cursor = source.execute(f'SELECT * FROM "{name}"')
+            columns = [d[0] for d in cursor.description]
+            schema = pa.schema([pa.field(col, type_) for col, type_ in zip(columns, _column_types(source, name, columns))])
+            conn.register("_sqlite_source", schema.empty_table())
+            try:
+                conn.execute(f'CREATE TABLE "{name}" AS SELECT * FROM _sqlite_source')
+            finally:
+                conn.unregister("_sqlite_source")
+            while True:
+                rows = cursor.fetchmany(COPY_BATCH_ROWS)
+                if not rows:
+                    break
+                batch = pa.table([_arrow_column([row[i] for row in rows], field.type) for i, field in enumerate(schema)], schema=schema)
+                conn.register("_sqlite_source", batch)
+                try:
+                    conn.execute(f'INSERT INTO "{name}" SELECT * FROM _sqlite_source')
+                finally:
+                    conn.unregister("_sqlite_source")
+        return tables
+    finally:
+        source.close()
+
+class _Cursor:
+    """A DuckDB cursor that tells the connection it came from when it is closed."""
+    def __init__(self, connection: "_Connection", cursor: duckdb.DuckDBPyConnection):
+        self._connection = connection
+        self._cursor = cursor
+        self._closed = False
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._cursor.close()
+            self._connection.release()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+class _Connection:
+    """
+    A DuckDB connection and the number of cursors open on it. Closing the
+    connection fails the statements of its cursors, so a retired connection
+    is only closed once they are all closed.
+    """
+    def __init__(self, conn: duckdb.DuckDBPyConnection):
+        self.conn = conn
+        self.open_cursors = 0
+        self.retired = False
+        self._lock = threading.Lock()
+
+    def cursor(self) -> _Cursor:
+        with self._lock:
+            self.open_cursors += 1
+        try:
+            return _Cursor(self, self.conn.cursor())
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self.open_cursors -= 1
+            close = self.retired and self.open_cursors == 0
+        if close:
+            self.conn.close()
+
+    def retire(self, force: bool = False):
+        """Closes the connection now if nothing runs on it (or `force`), else when its last cursor closes."""
+        with self._lock:
+            self.retired = True
+            close = force or self.open_cursors == 0
+        if close:
+            self.conn.close()
+
+class DuckDBDatabase:
+    """
+    Embedded DuckDB database for analytical queries: a DuckDB file, or an
+    in-memory DuckDB serving the tables of a SQLite file (`attach`). Queries
+    run on per-call cursors, so one instance is shared by all threads.
+    """
+    def __init__(self, db_id: str, path: str = ":memory:", attach: Optional[str] = None, attach_mode: str = "copy", read_only: bool = True):
+        if attach_mode not in ATTACH_MODES:
+            raise ValueError(f"Unsupported attach mode '{attach_mode}' for database '{db_id}' (expected one of: {', '.join(sorted(ATTACH_MODES))})")
+        self.db_id = db_id
+        self.path = path
+        self.attach = attach
+        self.attach_mode = attach_mode
+        self.read_only = read_only
+        # "native", "scan" or "copy": how the data is actually being served
+        self.mode: Optional[str] = None
+        self._lock = threading.Lock()
+        self._version = file_version(attach) if attach else None
+        self._connection = _Connection(self._open())
+
+    def _open(self) -> duckdb.DuckDBPyConnection:
+        conn = duckdb.connect(self.path, read_only=self.read_only and self.path != ":memory:")
+        self.mode = "native"
+        if self.attach and self.attach_mode == "scan":
+            try:
+                conn.execute("INSTALL sqlite")
+                conn.execute("LOAD sqlite")
+                conn.execute(f"ATTACH '{self.attach.replace(chr(39), chr(39) * 2)}' AS source (TYPE sqlite, READ_ONLY)")
+                conn.execute("USE source")
+                self.mode = "scan"
+            except duckdb.Error as e:
+                logger.warning(f"DuckDB sqlite extension unavailable for '{self.db_id}' ({e}); copying the tables instead")
+        if self.attach and self.mode == "native":
+            tables = copy_sqlite_tables(conn, self.attach)
+            self.mode = "copy"
+            logger.info(f"Copied {len(tables)} tables of '{self.attach}' into DuckDB for '{self.db_id}'")
+        if self.read_only:
+            # Queries may only read the configured data: no file access, extensions or setting changes
+            conn.execute("SET enable_external_access = false")
+            conn.execute("SET lock_configuration = true")
+        return conn
+
+    def _reload_if_changed(self):
+        # "scan" reads the live file; copied tables are reloaded when it changes
+        if self.mode != "copy" or file_version(self.attach) == self._version:
+            return
+        with self._lock:
+            version = file_version(self.attach)
+            if version == self._version:
+                return
+            # Cursors on the old connection finish on the old copy, then it is closed
+            old, self._connection = self._connection, _Connection(self._open())
+            self._version = version
+        old.retire()
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Connection for one call; close it when done."""
+        self._reload_if_changed()
+        return self._connection.cursor()
+
+    def in_flight(self) -> int:
+        """Number of cursors currently open on the database."""
+        return self._connection.open_cursors
+
+    def close(self):
+        """Closes the database; statements still running on its cursors fail (see dispose_when_drained)."""
+        with self._lock:
+            self._connection.retire(force=True)
+
+    def check_read_only(self, cursor: duckdb.DuckDBPyConnection, query: str) -> bool:
+        """True if every statement of `query` only reads."""
+        statements = cursor.extract_statements(query)
+        return bool(statements) and all(s.type in READ_ONLY_STATEMENTS for s in statements)
+
+    def table_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Estimated row count and index count of each table in the current schema."""
+        cursor = self.cursor()
+        try:
+            result = cursor.execute(
+                "SELECT table_name, estimated_size, index_count FROM duckdb_tables() "
+                "WHERE database_name = current_database() AND schema_name = current_schema() AND NOT temporary"
+            ).fetchall()
+            return {name: {"estimated_rows": rows, "index_count": indexes} for name, rows, indexes in result}
+        finally:
+            cursor.close()
+
+@contextmanager
+def interrupt_on_budget(cursor: duckdb.DuckDBPyConnection, budget: StatementBudget):
+    """Interrupts the cursor's running statement when its StatementBudget trips."""
+    if budget.deadline is None and budget.cancel_event is None:
+        yield
+        return
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(BUDGET_POLL_INTERVAL):
+            if budget.check():
+                cursor.interrupt()
+                return
+
+    watcher = threading.Thread(target=watch, name="duckdb-budget", daemon=True)
+    watcher.start()
+    try:
+        yield
+    finally:
+        done.set()
+        watcher.join()
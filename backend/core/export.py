@@ -0,0 +1,157 @@
+import io
+import json
+import logging
+import datetime
+import threading
+import decimal
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence
+import pyarrow as pa
+from sqlalchemy import text
+from backend.core.database import get_async_session, prepare_database_async
+from backend.core.query_budget import StatementBudget, BUDGET_OPTION
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor (and encoded) per chunk
+EXPORT_CHUNK_ROWS = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+# Shared encoder: json.dumps with custom options builds a new encoder per call
+_json_encode = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+
+def encode_ndjson(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """One JSON object per row, newline terminated. Values keep full precision."""
+    lines = [_json_encode(dict(zip(keys, row))) for row in rows]
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+def _infer_column(values: List[Any]) -> pa.Array:
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite columns are dynamically typed; mixed values are exported as text
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    return array.cast(pa.string()) if pa.types.is_null(array.type) else array
+
+def _coerce_column(values: List[Any], type_: pa.DataType) -> pa.Array:
+    """Converts a later chunk to the column type fixed by the first chunk."""
+    try:
+        return pa.array(values, type=type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    if pa.types.is_string(type_):
+        return pa.array([None if v is None else str(v) for v in values], type=type_)
+    try:
+        return _infer_column(values).cast(type_, safe=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        logger.warning(f"Export: values not convertible to {type_} were replaced by nulls")
+        return pa.nulls(len(values), type=type_)
+
+class ArrowStreamEncoder:
+    """
+    Incremental Arrow IPC writer. The schema is inferred from the first
+    chunk (all-null columns become strings); later chunks are cast to it.
+    By default batches are buffered and returned as IPC stream bytes; with a
+    `sink` (e.g. an open file and new_writer=pa.ipc.new_file) they are written there.
+    """
+    def __init__(self, keys: Sequence[str], sink: Optional[Any] = None, new_writer: Callable = pa.ipc.new_stream):
+        self.keys = list(keys)
+        self.schema: Optional[pa.Schema] = None
+        self._buffered = sink is None
+        self._sink = io.BytesIO() if sink is None else sink
+        self._new_writer = new_writer
+        self._writer = None
+
+    def _drain(self) -> bytes:
+        if not self._buffered:
+            return b""
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        columns = [[row[i] for row in rows] for i in range(len(self.keys))]
+        if self.schema is None:
+            arrays = [_infer_column(values) for values in columns]
+            self.schema = pa.schema([pa.field(k, a.type) for k, a in zip(self.keys, arrays)])
+            self._writer = self._new_writer(self._sink, self.schema)
+        else:
+            arrays = [_coerce_column(values, field.type) for values, field in zip(columns, self.schema)]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        return self._drain()
+
+    def close(self) -> bytes:
+        if self._writer is None:
+            # Empty result: still emit a valid stream with an all-string schema
+            self.schema = pa.schema([pa.field(k, pa.string()) for k in self.keys])
+            self._writer = self._new_writer(self._sink, self.schema)
+        self._writer.close()
+        return self._drain()
+
+async def stream_query(query: str, db_id: str, fmt: str = "ndjson", chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """
+    Streams the full result of an already validated query as NDJSON or Arrow IPC.
+    Rows come from a server-side cursor one chunk at a time, and the next chunk
+    is only fetched once the consumer (the HTTP response) has taken the previous
+    one, so memory stays bounded by the chunk size and slow clients apply backpressure.
+    """
+    await prepare_database_async(db_id)
+    session = get_async_session(db_id)
+    # Exports have no time limit, but a statement still running when the client
+    # goes away is aborted through the budget's cancel flag
+    cancel_event = threading.Event()
+    budget = StatementBudget(None, cancel_event)
+    try:
+        result = await session.stream(text(query), execution_options={BUDGET_OPTION: budget})
+        keys = list(result.keys())
+        encoder = ArrowStreamEncoder(keys) if fmt == "arrow" else None
+        row_count = 0
+        while True:
+            rows = await result.fetchmany(chunk_rows)
+            if not rows:
+                break
+            row_count += len(rows)
+            yield encoder.encode(rows) if encoder else encode_ndjson(keys, rows)
+        if encoder:
+            yield encoder.close()
+        await result.close()
+        logger.info(f"Exported {row_count} rows from '{db_id}' as {fmt}")
+    except BaseException:
+        # Includes the cancellation/close of the generator on disconnect
+        cancel_event.set()
+        raise
+    finally:
+        await session.close()
+
+def stream_table(table: pa.Table, fmt: str = "ndjson", chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Streams an Arrow table (e.g. a memory-mapped spilled result) as NDJSON or
+    Arrow IPC. Arrow batches are slices of the table, so nothing is copied.
+    """
+    if fmt == "arrow":
+        sink = io.BytesIO()
+        writer = pa.ipc.new_stream(sink, table.schema)
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+        writer.close()
+        yield sink.getvalue()
+        return
+
+    for batch in table.to_batches(max_chunksize=chunk_rows):
+        yield encode_ndjson(batch.schema.names, list(zip(*(column.to_pylist() for column in batch.columns))))
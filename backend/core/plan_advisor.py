@@ -0,0 +1,316 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlparse import lexer, tokens as T
+from backend.core.sql_fingerprint import fingerprint_sql, collapse_whitespace
+
+# Tables with at least this many rows are "large": full scans of them are flagged
+LARGE_TABLE_ROWS = int(os.getenv("PLAN_LARGE_TABLE_ROWS", "1000"))
+
+# Widest index the advisor proposes (covering variants included)
+MAX_INDEX_COLUMNS = 5
+
+ADVISOR_INDEX_PREFIX = "advisor_"
+
+_SCAN_PATTERN = re.compile(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+_INDEX_PATTERN = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_CLAUSES = {"SELECT": "select", "FROM": "from", "ON": "on", "WHERE": "where",
+            "GROUP BY": "group", "ORDER BY": "order", "HAVING": "having", "LIMIT": "limit"}
+_EQ_OPERATORS = {"=", "==", "IS", "IN"}
+_RANGE_OPERATORS = {"<", ">", "<=", ">=", "BETWEEN", "LIKE", "GLOB"}
+
+class PlanRecorder:
+    """
+    Keeps the EXPLAIN QUERY PLAN of recently validated queries and how often
+    each was seen, per database. Entries are keyed by whitespace-collapsed
+    SQL (cheap to compute on every call); reports group them by fingerprint.
+    """
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        # (db_id, collapsed SQL) -> {"query", "count", "plan", "last_seen"}
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, db_id: Optional[str], query: str, plan: Sequence[str]):
+        if not db_id or self.max_entries <= 0:
+            return
+        key = (db_id, collapse_whitespace(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {"query": query.strip(), "count": 0}
+            entry.update(count=entry["count"] + 1, plan=list(plan), last_seen=time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, db_id: Optional[str], query: str):
+        """Counts another run of an already recorded query (e.g. a validation cache hit)."""
+        if not db_id:
+            return
+        with self._lock:
+            entry = self._entries.get((db_id, collapse_whitespace(query)))
+            if entry is not None:
+                entry["count"] += 1
+                entry["last_seen"] = time.time()
+
+    def workload(self, db_id: str) -> List[Dict[str, Any]]:
+        """Recorded queries of a database grouped by fingerprint, most frequent first."""
+        with self._lock:
+            entries = [dict(e) for (d, _), e in self._entries.items() if d == db_id]
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            fingerprint = fingerprint_sql(entry["query"])
+            group = grouped.get(fingerprint)
+            if group is None:
+                grouped[fingerprint] = {"fingerprint": fingerprint, **entry}
+            else:
+                group["count"] += entry["count"]
+        return sorted(grouped.values(), key=lambda g: -g["count"])
+
+    def reset(self, db_id: Optional[str] = None):
+        with self._lock:
+            if db_id is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == db_id]:
+                    del self._entries[key]
+
+plan_recorder = PlanRecorder(max_entries=int(os.getenv("PLAN_CAPTURE_SIZE", "512")))
+
+def full_scans(plan: Sequence[str], aliases: Dict[str, str]) -> List[str]:
+    """Tables read by a full table scan (covering index scans are not counted)."""
+    tables = []
+    for detail in plan:
+        match = _SCAN_PATTERN.match(detail)
+        if match and not match.group(2):
+            name = match.group(1).lower()
+            tables.append(aliases.get(name, name))
+    return tables
+
+def _meaningful_tokens(query: str) -> List[Tuple[Any, str]]:
+    return [(ttype, value) for ttype, value in lexer.tokenize(query)
+            if ttype not in T.Whitespace and ttype not in T.Newline and ttype not in T.Comment]
+
+def column_usage(query: str, schema: Dict[str, List[str]]) -> Tuple[Dict[str, str], Dict[str, Dict[str, List[str]]]]:
+    """
+    Lexical analysis of how a query uses the columns of `schema` (table -> columns).
+    Returns the alias map (alias -> table) and, per table, the columns compared
+    to constants ("eq"/"range"), used in joins ("join"), GROUP BY/ORDER BY
+    ("order") and anywhere else ("other"). Lowercase throughout.
+    """
+    tokens = _meaningful_tokens(query)
+    aliases: Dict[str, str] = {}
+    usage: Dict[str, Dict[str, List[str]]] = {}
+
+    # Pass 1: tables and aliases in FROM/JOIN
+    clause = None
+    for i, (ttype, value) in enumerate(tokens):
+        upper = value.upper()
+        if ttype in T.Keyword:
+            clause = "from" if upper.endswith("JOIN") else _CLAUSES.get(upper, clause)
+            continue
+        if clause == "from" and ttype in T.Name and value.lower() in schema:
+            table = value.lower()
+            aliases[table] = table
+            usage.setdefault(table, {"eq": [], "range": [], "join": [], "order": [], "other": []})
+            j = i + 1
+            if j < len(tokens) and tokens[j][1].upper() == "AS":
+                j += 1
+            if j < len(tokens) and tokens[j][0] in T.Name:
+                aliases[tokens[j][1].lower()] = table
+
+    def resolve(i: int) -> Optional[Tuple[str, str]]:
+        """(table, column) for a column reference starting or ending at token i."""
+        ttype, value = tokens[i]
+        if ttype not in T.Name or (i + 1 < len(tokens) and tokens[i + 1][1] in ("(", ".")):
+            return None
+        column = value.lower()
+        if i >= 2 and tokens[i - 1][1] == "." and tokens[i - 2][1].lower() in aliases:
+            table = aliases[tokens[i - 2][1].lower()]
+            return (table, column) if column in schema[table] else None
+        owners = [t for t in usage if column in schema[t]]
+        return (owners[0], column) if len(owners) == 1 else None
+
+    def add(kind: str, table: str, column: str):
+        if column not in usage[table][kind]:
+            usage[table][kind].append(column)
+
+    # Pass 2: column references by clause
+    clause = None
+    for i, (ttype, value) in enumerate(tokens):
+        if ttype in T.Keyword:
+            clause = "from" if value.upper().endswith("JOIN") else _CLAUSES.get(value.upper(), clause)
+            continue
+        ref = resolve(i)
+        if ref is None or clause == "from":
+            continue
+        table, column = ref
+        if clause in ("where", "on", "having") and i + 1 < len(tokens):
+            operator = tokens[i + 1][1].upper()
+            if operator in _EQ_OPERATORS or operator in _RANGE_OPERATORS:
+                # Right-hand side: another column (join) or a constant
+                k = i + 2
+                if k + 2 < len(tokens) and tokens[k + 1][1] == ".":
+                    k += 2
+                other = resolve(k) if k < len(tokens) else None
+                if other is not None:
+                    add("join", table, column)
+                    add("join", *other)
+                elif clause != "having":
+                    add("eq" if operator in _EQ_OPERATORS else "range", table, column)
+                continue
+        if clause in ("group", "order"):
+            add("order", table, column)
+        else:
+            add("other", table, column)
+    return aliases, usage
+
+def _rowid_column(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    """The INTEGER PRIMARY KEY (rowid alias) column of a table, if any."""
+    pk = [row for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5]]
+    if len(pk) == 1 and pk[0][2].upper() == "INTEGER":
+        return pk[0][1].lower()
+    return None
+
+def _existing_index_prefixes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, ...]]:
+    prefixes = []
+    for index in conn.execute(f'PRAGMA index_list("{table}")'):
+        columns = [row[2].lower() for row in conn.execute(f'PRAGMA index_info("{index[1]}")') if row[2]]
+        prefixes.append(tuple(columns))
+    return prefixes
+
+def candidate_indexes(usage: Dict[str, Dict[str, List[str]]], conn: sqlite3.Connection, covering_ok: bool = True) -> List[Tuple[str, Tuple[str, ...]]]:
+    """Index candidates (table, columns) derived from column usage, minus those that already exist."""
+    candidates = []
+    for table, used in usage.items():
+        rowid = _rowid_column(conn, table)
+        keys = []
+        if used["eq"] or used["range"]:
+            keys.append(used["eq"] + used["range"][:1] + ([] if used["range"] else used["order"]))
+        for column in used["join"]:
+            keys.append([column] + [c for c in used["eq"] if c != column])
+        if used["order"] and not used["eq"] and not used["range"]:
+            keys.append(used["order"])
+
+        referenced = []
+        for kind in ("eq", "range", "join", "order", "other"):
+            referenced += [c for c in used[kind] if c not in referenced and c != rowid]
+        existing = _existing_index_prefixes(conn, table)
+        for key in keys:
+            key = tuple(dict.fromkeys(c for c in key if c != rowid))[:MAX_INDEX_COLUMNS]
+            if not key:
+                continue
+            variants = [key]
+            covering = key + tuple(c for c in referenced if c not in key)
+            if covering_ok and covering != key and len(covering) <= MAX_INDEX_COLUMNS:
+                variants.append(covering)
+            for columns in variants:
+                if any(prefix[:len(columns)] == columns for prefix in existing):
+                    continue
+                if (table, columns) not in candidates:
+                    candidates.append((table, columns))
+    return candidates
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    return f"{ADVISOR_INDEX_PREFIX}{table}_{'_'.join(columns)}"[:60]
+
+def index_sql(table: str, columns: Sequence[str]) -> str:
+    cols = ", ".join(f'"{c}"' for c in columns)
+    return f'CREATE INDEX IF NOT EXISTS "{index_name(table, columns)}" ON "{table}" ({cols})'
+
+def load_schema(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """table -> lowercase column names for the user tables of a database."""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    return {t.lower(): [row[1].lower() for row in conn.execute(f'PRAGMA table_info("{t}")')] for t in tables}
+
+def table_sizes(conn: sqlite3.Connection, schema: Dict[str, List[str]]) -> Dict[str, int]:
+    return {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in schema}
+
+def _scratch_copy(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Empty in-memory copy of the schema (and the planner statistics in sqlite_stat1),
+    so hypothetical indexes can be created and tried without touching the database.
+    """
+    scratch = sqlite3.connect(":memory:")
+    for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"):
+        scratch.execute(sql)
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    if has_stats:
+        scratch.execute("ANALYZE sqlite_master")
+        scratch.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"))
+        scratch.execute("ANALYZE sqlite_master")
+    return scratch
+
+def _explain(conn: sqlite3.Connection, query: str) -> List[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+
+def advise(conn: sqlite3.Connection, workload: Sequence[Dict[str, Any]], large_table_rows: int = LARGE_TABLE_ROWS) -> Dict[str, Any]:
+    """
+    Analyzes a workload (dicts with "query" and "count") against the database
+    behind `conn` (a sqlite3 connection; only read). Flags full scans of large
+    tables and recommends the candidate indexes that SQLite's planner actually
+    picks when they are created on a schema-only scratch copy.
+    """
+    schema = load_schema(conn)
+    sizes = table_sizes(conn, schema)
+    scratch = _scratch_copy(conn)
+
+    analyzed = []
+    candidates: List[Tuple[str, Tuple[str, ...]]] = []
+    for item in workload:
+        query = item["query"]
+        aliases, usage = column_usage(query, schema)
+        plan = item.get("plan") or _explain(conn, query)
+        scans = [t for t in full_scans(plan, aliases) if sizes.get(t, 0) >= large_table_rows]
+        entry = {"fingerprint": item.get("fingerprint") or fingerprint_sql(query), "query": query,
+                 "count": item.get("count", 1), "plan": plan,
+                 "full_scans": [{"table": t, "rows": sizes[t]} for t in scans]}
+        analyzed.append(entry)
+        if scans:
+            wildcard = re.search(r"SELECT\s+(\w+\.)?\*", query, re.IGNORECASE) is not None
+            for candidate in candidate_indexes(usage, conn, covering_ok=not wildcard):
+                if candidate not in candidates:
+                    candidates.append(candidate)
+
+    # What-if: create every candidate on the scratch copy and keep the ones the planner uses
+    for table, columns in candidates:
+        scratch.execute(index_sql(table, columns))
+    by_name = {index_name(table, columns): (table, columns) for table, columns in candidates}
+    recommendations: Dict[str, Dict[str, Any]] = {}
+    for entry in analyzed:
+        if not entry["full_scans"]:
+            continue
+        entry["plan_with_indexes"] = _explain(scratch, entry["query"])
+        for detail in entry["plan_with_indexes"]:
+            match = _INDEX_PATTERN.search(detail)
+            if not match or match.group(1) not in by_name:
+                continue
+            table, columns = by_name[match.group(1)]
+            rec = recommendations.setdefault(match.group(1), {"name": match.group(1), "table": table, "columns": list(columns),
+                                                               "sql": index_sql(table, columns), "queries": [], "weight": 0})
+            if entry["fingerprint"] not in rec["queries"]:
+                rec["queries"].append(entry["fingerprint"])
+                rec["weight"] += entry["count"]
+
+    # An index whose columns prefix another recommended index is redundant
+    for name, rec in list(recommendations.items()):
+        for other in recommendations.values():
+            if other is not rec and other["table"] == rec["table"] and \
+                    len(other["columns"]) > len(rec["columns"]) and other["columns"][:len(rec["columns"])] == rec["columns"]:
+                for fingerprint in rec["queries"]:
+                    if fingerprint not in other["queries"]:
+                        other["queries"].append(fingerprint)
+                        other["weight"] += next(e["count"] for e in analyzed if e["fingerprint"] == fingerprint)
+                del recommendations[name]
+                break
+    scratch.close()
+
+    return {
+        "queries": analyzed,
+        "recommendations": sorted(recommendations.values(), key=lambda r: -r["weight"]),
+    }
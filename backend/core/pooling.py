@@ -0,0 +1,125 @@
+import time
+import threading
+from urllib.parse import urlencode
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import Pool, QueuePool, AsyncAdaptedQueuePool
+
+class PoolConfig(BaseModel):
+    """Per-database connection pool settings (the `pool` section in databases.yaml)."""
+    size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30.0
+    recycle: int = -1
+    pre_ping: bool = False
+    # SQLite URI flags, e.g. {"mode": "ro"} or {"immutable": 1}
+    uri_flags: Dict[str, Any] = Field(default_factory=dict)
+
+class PoolWaitStats:
+    """Thread-safe accumulator for time spent waiting on pool checkouts."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "avg_wait_ms": round(self.total_wait * 1000 / attempts, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+class _WaitTimingMixin:
+    """Times every pool checkout so connection starvation becomes visible."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def is_memory_url(db_url: str) -> bool:
+    """True for SQLite in-memory URLs, which must not use a multi-connection pool."""
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def apply_uri_flags(db_url: str, uri_flags: Dict[str, Any]) -> str:
+    """
+    Rewrites a SQLite URL into `file:` URI form carrying the given flags,
+    e.g. sqlite:///data/movies.db -> sqlite:///file:data/movies.db?mode=ro&uri=true
+    """
+    if not uri_flags:
+        return db_url
+    url = make_url(db_url)
+    if url.get_backend_name() != "sqlite" or is_memory_url(db_url):
+        return db_url
+
+    database = url.database
+    if not database.startswith("file:"):
+        database = f"file:{database}"
+    query = dict(url.query)
+    query.update({k: str(v) for k, v in uri_flags.items()})
+    query["uri"] = "true"
+    # Built by hand because URL.render_as_string() percent-encodes the "file:" prefix
+    return f"{url.drivername}:///{database}?{urlencode(query, doseq=True)}"
+
+def engine_pool_kwargs(db_url: str, config: Optional[PoolConfig], is_async: bool = False) -> Dict[str, Any]:
+    """Builds the create_engine pool arguments for a database."""
+    if config is None or is_memory_url(db_url):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": config.size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.timeout,
+        "pool_recycle": config.recycle,
+        "pool_pre_ping": config.pre_ping,
+    }
+
+def pool_status(pool: Pool, config: Optional[PoolConfig] = None) -> Dict[str, Any]:
+    """Returns live statistics for a connection pool built from `config`."""
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # QueuePool counts overflow from -size; only positive values are extra connections
+            "overflow": max(0, pool.overflow()),
+        })
+        if config is not None:
+            status["max_overflow"] = config.max_overflow
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.as_dict())
+    return status
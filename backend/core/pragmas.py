@@ -0,0 +1,60 @@
+import logging
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+class SqlitePragmas(BaseModel):
+    """Per-database SQLite performance profile (the `pragmas` section in databases.yaml)."""
+    # Bytes of the database file read through a memory map (0 disables)
+    mmap_size: Optional[int] = None
+    # Page cache size: pages if positive, KiB if negative
+    cache_size: Optional[int] = None
+    temp_store: Optional[Literal["default", "file", "memory"]] = None
+    query_only: Optional[bool] = None
+    journal_mode: Optional[Literal["delete", "truncate", "persist", "memory", "wal", "off"]] = None
+    synchronous: Optional[Literal["off", "normal", "full", "extra"]] = None
+
+    def statements(self) -> List[str]:
+        """PRAGMA statements for the configured settings (values are validated, so safe to inline)."""
+        statements = []
+        for name, value in self.model_dump(exclude_none=True).items():
+            if isinstance(value, bool):
+                value = "ON" if value else "OFF"
+            statements.append(f"PRAGMA {name} = {value}")
+        return statements
+
+def _apply(conn, statements: List[str]):
+    for statement in statements:
+        try:
+            conn.execute(statement).fetchall()
+        except Exception as e:
+            # e.g. journal_mode=wal on a read-only file; the other settings still apply
+            logger.warning(f"Could not apply '{statement}': {e}")
+
+async def _apply_async(conn, statements: List[str]):
+    for statement in statements:
+        try:
+            cursor = await conn.execute(statement)
+            await cursor.fetchall()
+        except Exception as e:
+            logger.warning(f"Could not apply '{statement}': {e}")
+
+def install_pragmas(engine, pragmas: SqlitePragmas, is_async: bool = False):
+    """
+    Applies a PRAGMA profile on every new connection of `engine` (a sync Engine,
+    or the sync_engine of an AsyncEngine). Must be installed before the read-only
+    guard, whose authorizer denies PRAGMAs that set a value.
+    """
+    statements = pragmas.statements()
+    if not statements:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if is_async:
+            # aiosqlite owns the sqlite3 connection in its worker thread
+            dbapi_connection.run_async(lambda conn: _apply_async(conn, statements))
+        else:
+            _apply(dbapi_connection, statements)
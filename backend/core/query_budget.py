@@ -0,0 +1,89 @@
+import time
+import threading
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Set per /chat request; tripped when the client disconnects so running statements stop
+cancel_event_var: ContextVar[Optional[threading.Event]] = ContextVar("cancel_event", default=None)
+
+# Execution option carrying the StatementBudget for a statement
+BUDGET_OPTION = "statement_budget"
+
+# SQLite VM instructions between progress handler calls
+PROGRESS_HANDLER_STEPS = 1000
+
+class StatementBudget:
+    """
+    Time budget and cancellation flag for one statement.
+    Checked from SQLite's progress handler, which aborts the statement
+    (OperationalError: interrupted) as soon as check() returns non-zero.
+    """
+    def __init__(self, timeout: Optional[float] = None, cancel_event: Optional[threading.Event] = None):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.cancel_event = cancel_event if cancel_event is not None else cancel_event_var.get()
+        # "timeout" or "cancelled" once the statement has been aborted
+        self.outcome: Optional[str] = None
+
+    def check(self) -> int:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.outcome = "cancelled"
+            return 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.outcome = "timeout"
+            return 1
+        return 0
+
+    def error_message(self) -> Optional[str]:
+        """Structured error for the agent, or None if the statement was not aborted."""
+        if self.outcome == "timeout":
+            return (
+                f"Error: Query exceeded budget (statement timeout of {self.timeout:g}s). "
+                "Simplify the query: add WHERE filters or a LIMIT, aggregate earlier, or avoid large joins."
+            )
+        if self.outcome == "cancelled":
+            return "Error: Query cancelled because the client disconnected."
+        return None
+
+class _BudgetSlot:
+    """Mutable holder for the budget of whatever statement a connection is running."""
+    __slots__ = ("budget",)
+
+    def __init__(self):
+        self.budget: Optional[StatementBudget] = None
+
+    def __call__(self) -> int:
+        budget = self.budget
+        return budget.check() if budget is not None else 0
+
+def install_statement_budget(engine, is_async: bool = False):
+    """
+    Installs a SQLite progress handler on every connection of `engine`
+    (a sync Engine, or the sync_engine of an AsyncEngine) that enforces
+    the StatementBudget passed via the `statement_budget` execution option.
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        slot = connection_record.info["budget_slot"] = _BudgetSlot()
+        if is_async:
+            # aiosqlite owns the sqlite3 connection in its worker thread
+            dbapi_connection.run_async(lambda conn: conn.set_progress_handler(slot, PROGRESS_HANDLER_STEPS))
+        else:
+            dbapi_connection.set_progress_handler(slot, PROGRESS_HANDLER_STEPS)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        slot = conn.info.get("budget_slot")
+        if slot is not None:
+            # Stays in place until checkin so fetching rows is covered too
+            slot.budget = context.execution_options.get(BUDGET_OPTION) if context is not None else None
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        slot = connection_record.info.get("budget_slot")
+        if slot is not None:
+            slot.budget = None
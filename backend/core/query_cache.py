@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from backend.core.sql_fingerprint import fingerprint_sql, collapse_whitespace
+
+class QueryResultCache:
+    """
+    LRU + TTL cache keyed by (db_id, normalized SQL).
+    Each entry remembers the data version it was computed against and is
+    discarded as soon as the database reports a different version.
+    """
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0, key_fn: Callable[[str], str] = fingerprint_sql):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.key_fn = key_fn
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Hashable, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db_id: str, query: str, data_version: Hashable) -> Optional[Any]:
+        key = (db_id, self.key_fn(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, value = entry
+                if version == data_version and time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, db_id: str, query: str, data_version: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        key = (db_id, self.key_fn(query))
+        with self._lock:
+            self._entries[key] = (data_version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, db_id: Optional[str] = None):
+        """Drops all entries, or only those of one database."""
+        with self._lock:
+            if db_id is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == db_id]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+# execute_sql outputs
+query_cache = QueryResultCache(
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300")),
+)
+
+# validate_sql outcomes. Validity does not depend on literal contents, so the
+# key skips sqlparse and a hit costs a whitespace split plus a dict lookup.
+# Schema changes rewrite the database file and therefore change the data version.
+validation_cache = QueryResultCache(
+    max_entries=int(os.getenv("VALIDATION_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("VALIDATION_CACHE_TTL_SECONDS", "3600")),
+    key_fn=collapse_whitespace,
+)
+
+# Pre-execution cost estimates; like validity, they do not depend on literal contents
+cost_cache = QueryResultCache(
+    max_entries=int(os.getenv("COST_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("COST_CACHE_TTL_SECONDS", "3600")),
+    key_fn=collapse_whitespace,
+)
+
+# generate_summary_report results, keyed by counting mode ("exact" or "estimated")
+report_cache = QueryResultCache(
+    max_entries=64,
+    ttl_seconds=float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "3600")),
+    key_fn=lambda mode: mode,
+)
@@ -0,0 +1,253 @@
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+from pydantic import BaseModel
+from backend.core.schema_registry import schema_registry
+
+logger = logging.getLogger(__name__)
+
+# Where the cache is persisted, one JSON file per database
+QUESTION_CACHE_DIR = os.getenv("QUESTION_CACHE_DIR", os.path.join("data", "question_cache"))
+
+# Cosine similarity (TF-IDF) above which a cached question counts as a paraphrase
+QUESTION_CACHE_THRESHOLD = float(os.getenv("QUESTION_CACHE_THRESHOLD", "0.8"))
+
+_WORD = re.compile(r"[a-z0-9_]+(?:\.[0-9]+)?")
+_SQL_LITERAL = re.compile(r"'((?:[^']|'')*)'|\b([0-9]+(?:\.[0-9]+)?)\b")
+
+# Words that do not change which SQL answers a question
+_STOPWORDS = frozenset(
+    "a an the of for and is are was were be been do does did "
+    "please can could would you me i us we our my what which who how there their it its "
+    "this that these those all any".split()
+)
+
+# Interchangeable phrasings folded onto one token
+_SYNONYMS = {
+    "show": "list", "display": "list", "give": "list", "get": "list", "find": "list", "fetch": "list",
+    "many": "count", "number": "count", "total": "count",
+    "per": "by", "each": "by", "every": "by",
+    "graph": "chart", "plot": "chart", "visualize": "chart", "visualise": "chart",
+}
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize_question(question: str) -> List[str]:
+    """Lower-cased, stemmed content words of a question; synonyms are folded together."""
+    tokens = []
+    for word in _WORD.findall(question.lower()):
+        if word in _STOPWORDS:
+            continue
+        word = _stem(word)
+        tokens.append(_SYNONYMS.get(word, word))
+    return tokens
+
+def normalize_question(question: str) -> str:
+    return " ".join(tokenize_question(question))
+
+def _features(tokens: List[str]) -> List[str]:
+    """Words plus word pairs, so "from jfk to lax" and "from lax to jfk" differ."""
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+def _anchors(tokens: List[str], literals: set) -> List[str]:
+    """The question's words that the SQL filters on, each with the word before it ("from_jfk")."""
+    return sorted({f"{tokens[i - 1]}_{t}" if i else t for i, t in enumerate(tokens) if t in literals})
+
+def _literal_tokens(sql: str) -> set:
+    tokens = set()
+    for string, number in _SQL_LITERAL.findall(sql):
+        tokens.update(tokenize_question(string.replace("''", "'")) if string else [number])
+    return tokens
+
+class SchemaFingerprint(BaseModel):
+    """What cached SQL depends on: the shape of the schema and the words naming its tables and columns."""
+    signature: str
+    terms: Set[str] = set()
+
+def schema_fingerprint(db_id: Optional[str] = None) -> SchemaFingerprint:
+    tables = schema_registry.get_tables(db_id)
+    shape = sorted((t.name, sorted((c.name, c.type) for c in t.columns)) for t in tables)
+    terms = set()
+    for name in [t.name for t in tables] + [c.name for t in tables for c in t.columns]:
+        terms.update(tokenize_question(name.replace("_", " ")))
+        terms.update(tokenize_question(name))
+    return SchemaFingerprint(signature=hashlib.sha256(json.dumps(shape).encode()).hexdigest()[:16], terms=terms)
+
+class CachedSql(BaseModel):
+    """A cached question whose validated SQL answers the question looked up."""
+    question: str
+    sql: str
+    similarity: float
+
+class QuestionSqlCache:
+    """
+    Per-database cache from questions to SQL that has been validated and run.
+    Lookups match paraphrases lexically: TF-IDF vectors of the normalized
+    question, compared by cosine similarity. A hit also requires that
+    values the cached question put into its SQL (names, numbers) appear in
+    the new question, that both questions use the same content words, and
+    that both name the same tables and columns, so "flights from JFK" never
+    answers "flights from LAX", nor "per origin" "per destination", "per
+    origin excluding weekends" or the other way round.
+    Entries are persisted to one JSON file per database and dropped when the
+    schema they were written against changes.
+    """
+    def __init__(self, cache_dir: str = QUESTION_CACHE_DIR, threshold: float = QUESTION_CACHE_THRESHOLD, max_entries: int = 1000):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # db_id -> normalized question -> entry
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._stats: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, db_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{db_id}.json")
+
+    def _load_locked(self, db_id: str) -> Dict[str, Dict[str, Any]]:
+        entries = self._entries.get(db_id)
+        if entries is None:
+            entries = {}
+            try:
+                with open(self._path(db_id), "r") as f:
+                    entries = {e["key"]: e for e in json.load(f)}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable question cache for {db_id}: {e}")
+            self._entries[db_id] = entries
+        return entries
+
+    def _save_locked(self, db_id: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(list(self._entries[db_id].values()), f)
+            os.replace(tmp_path, self._path(db_id))
+        except OSError as e:
+            logger.warning(f"Could not persist question cache for {db_id}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _vector(tokens: List[str], idf: Dict[str, float], unseen_idf: float) -> Dict[str, float]:
+        counts = Counter(tokens)
+        vector = {t: n * idf.get(t, unseen_idf) for t, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def _accepts(self, entry: Dict[str, Any], tokens: List[str], terms: Set[str]) -> bool:
+        # A word only one of the questions has ("weekend", "top", a number) is a filter
+        # or limit the other's SQL lacks or adds, so both must use the same words
+        return (
+            set(entry["anchors"]) <= set(_features(tokens))
+            and set(tokens) == set(entry["tokens"])
+            and terms.intersection(tokens) == terms.intersection(entry["tokens"])
+        )
+
+    def lookup(self, db_id: str, question: str, schema: SchemaFingerprint) -> Optional[CachedSql]:
+        tokens = tokenize_question(question)
+        key = " ".join(tokens)
+        with self._lock:
+            entries = self._load_locked(db_id)
+            stats = self._stats.setdefault(db_id, Counter())
+            stats["lookups"] += 1
+            stale = [k for k, e in entries.items() if e["schema"] != schema.signature]
+            for k in stale:
+                del entries[k]
+            if stale:
+                self._save_locked(db_id)
+
+            best, best_score = None, 0.0
+            if key in entries and self._accepts(entries[key], tokens, schema.terms):
+                best, best_score = entries[key], 1.0
+            elif tokens:
+                # IDF over the cached questions; only entries sharing a word can score
+                df = Counter(t for e in entries.values() for t in set(_features(e["tokens"])))
+                idf = {t: math.log((1 + len(entries)) / (1 + n)) + 1 for t, n in df.items()}
+                # Words no cached question has are as telling as the rarest ones
+                unseen_idf = math.log(1 + len(entries)) + 1
+                query = self._vector(_features(tokens), idf, unseen_idf)
+                for entry in entries.values():
+                    if not query.keys() & set(entry["tokens"]):
+                        continue
+                    candidate = self._vector(_features(entry["tokens"]), idf, unseen_idf)
+                    score = sum(w * candidate.get(t, 0.0) for t, w in query.items())
+                    if score > best_score and self._accepts(entry, tokens, schema.terms):
+                        best, best_score = entry, score
+
+            if best is None or best_score < self.threshold:
+                stats["misses"] += 1
+                return None
+            stats["hits"] += 1
+            best["hits"] += 1
+            return CachedSql(question=best["question"], sql=best["sql"], similarity=round(best_score, 3))
+
+    def put(self, db_id: str, question: str, sql: str, schema: SchemaFingerprint):
+        tokens = tokenize_question(question)
+        if not tokens or self.max_entries <= 0:
+            return
+        key = " ".join(tokens)
+        # Values the question itself names and the SQL filters on must match on lookup
+        anchors = _anchors(tokens, _literal_tokens(sql))
+        with self._lock:
+            entries = self._load_locked(db_id)
+            hits = entries[key]["hits"] if key in entries else 0
+            entries[key] = {
+                "key": key, "question": question, "tokens": tokens, "sql": sql, "anchors": anchors,
+                "schema": schema.signature, "hits": hits, "created_at": time.time(),
+            }
+            while len(entries) > self.max_entries:
+                # Least used, then oldest, goes first
+                del entries[min(entries, key=lambda k: (entries[k]["hits"], entries[k]["created_at"]))]
+            self._stats.setdefault(db_id, Counter())["stores"] += 1
+            self._save_locked(db_id)
+
+    def discard(self, db_id: str, question: str):
+        """Drops the entry of one question, e.g. after its SQL stopped working."""
+        with self._lock:
+            entries = self._load_locked(db_id)
+            key = normalize_question(question)
+            if entries.pop(key, None) is not None:
+                self._save_locked(db_id)
+
+    def invalidate(self, db_id: Optional[str] = None):
+        """Forgets all entries (on disk too), or only those of one database."""
+        with self._lock:
+            db_ids = [db_id] if db_id is not None else list(self._entries)
+            for d in db_ids:
+                self._entries[d] = {}
+                self._save_locked(d)
+
+    def stats(self, db_id: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._load_locked(db_id)
+            stats = self._stats.get(db_id, Counter())
+            lookups = stats["lookups"]
+            return {
+                "entries": len(entries),
+                "lookups": lookups,
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "stores": stats["stores"],
+                "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+# Validated SQL of questions the SQL workflow answered, per database
+question_cache = QuestionSqlCache(
+    max_entries=int(os.getenv("QUESTION_CACHE_SIZE", "1000")),
+)
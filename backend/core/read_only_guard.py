@@ -0,0 +1,72 @@
+import sqlite3
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Authorizer actions a read-only connection may compile. Everything else
+# (INSERT/UPDATE/DELETE, CREATE/DROP/ALTER, ATTACH/DETACH, ANALYZE, ...) is denied.
+ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+    sqlite3.SQLITE_TRANSACTION,
+}
+
+# Pragmas that take an argument but only read (schema introspection).
+# Any other pragma is allowed only without an argument, i.e. as a query.
+READ_PRAGMAS = {
+    "table_info", "table_xinfo", "table_list", "index_list", "index_info", "index_xinfo",
+    "foreign_key_list", "foreign_key_check", "integrity_check", "quick_check",
+}
+
+# Connection.info flag marking connections that carry the authorizer
+GUARD_INFO_KEY = "read_only_guard"
+
+READ_ONLY_ERROR = "Error: Mutable operation is not allowed in Read-Only mode (denied by the database)."
+
+def read_only_authorizer(action: int, arg1, arg2, db_name, trigger_name) -> int:
+    """
+    sqlite3 authorizer callback that only lets read statements compile.
+    SQLite calls it while preparing each statement, so a write is rejected
+    ("not authorized") before it runs, and also when it is only EXPLAINed.
+    """
+    if action in ALLOWED_ACTIONS:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and (arg2 is None or arg1.lower() in READ_PRAGMAS):
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+def is_authorizer_denial(error: Exception) -> bool:
+    """True if a database error was raised by the read-only authorizer."""
+    return "not authorized" in str(error)
+
+def install_read_only_guard(engine, is_async: bool = False):
+    """
+    Installs the read-only authorizer on every connection of `engine`
+    (a sync Engine, or the sync_engine of an AsyncEngine).
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info[GUARD_INFO_KEY] = True
+        if is_async:
+            # aiosqlite owns the sqlite3 connection in its worker thread
+            dbapi_connection.run_async(lambda conn: conn.set_authorizer(read_only_authorizer))
+        else:
+            dbapi_connection.set_authorizer(read_only_authorizer)
+
+@contextmanager
+def guard_suspended(conn):
+    """
+    Lifts the authorizer of a sync SQLAlchemy Connection for the statements run
+    inside the block. Only for fixed internal statements, never for user SQL:
+    some read-only features (e.g. the dbstat virtual table) write SQLite's
+    in-memory schema while being set up, which the authorizer denies.
+    """
+    guarded = conn.info.get(GUARD_INFO_KEY, False)
+    if guarded:
+        conn.connection.driver_connection.set_authorizer(None)
+    try:
+        yield conn
+    finally:
+        if guarded:
+            conn.connection.driver_connection.set_authorizer(read_only_authorizer)
@@ -0,0 +1,125 @@
+import os
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Optional, Tuple
+import aiosqlite
+from sqlalchemy import event, exc
+
+logger = logging.getLogger(__name__)
+
+# Supported values of the `replica` option in databases.yaml
+REPLICA_MODES = {"memory"}
+
+def file_version(path: str) -> Tuple[int, ...]:
+    """mtime and size of a SQLite file and its WAL; changes whenever the data does."""
+    version = []
+    for candidate in (path, f"{path}-wal"):
+        try:
+            stat = os.stat(candidate)
+            version.extend((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.extend((0, 0))
+    return tuple(version)
+
+class _ReplicaConnection(sqlite3.Connection):
+    """sqlite3 connection that remembers which snapshot it was opened on."""
+    replica_generation: Optional[int] = None
+
+class MemoryReplica:
+    """
+    Snapshot of a SQLite file in a shared-cache in-memory database, kept alive by
+    an anchor connection. Engines open their connections on the current snapshot
+    through `connect` / `connect_async`. When the file changes, `refresh_if_changed`
+    copies it into a new snapshot (under a new name) and connections still on the
+    old one are replaced by the pool at their next checkout (see install_replica).
+    """
+    def __init__(self, db_id: str, path: str):
+        self.db_id = db_id
+        self.path = path
+        self._name = f"replica_{db_id}_{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._anchor: Optional[sqlite3.Connection] = None
+        self._version: Optional[Tuple[int, ...]] = None
+        # (uri, generation) of the current snapshot, swapped atomically
+        self._current: Tuple[Optional[str], int] = (None, 0)
+        with self._lock:
+            self._refresh_locked()
+
+    @property
+    def generation(self) -> int:
+        return self._current[1]
+
+    def _refresh_locked(self):
+        version = file_version(self.path)
+        generation = self._current[1] + 1
+        uri = f"file:{self._name}_{generation}?mode=memory&cache=shared"
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            # The backup API copies a consistent snapshot even while the file is being written
+            source.backup(anchor)
+        except BaseException:
+            anchor.close()
+            raise
+        finally:
+            source.close()
+        old, self._anchor = self._anchor, anchor
+        self._version = version
+        self._current = (uri, generation)
+        if old is not None:
+            # Connections still on the old snapshot keep it alive until they close
+            old.close()
+        logger.info(f"Loaded in-memory replica of '{self.db_id}' (snapshot {generation})")
+
+    def is_stale(self) -> bool:
+        """True if the file changed since the current snapshot was taken."""
+        return file_version(self.path) != self._version
+
+    def refresh_if_changed(self) -> bool:
+        """Takes a new snapshot if the file changed since the last one. Returns True if it did."""
+        if file_version(self.path) == self._version:
+            return False
+        with self._lock:
+            if file_version(self.path) == self._version:
+                return False
+            self._refresh_locked()
+            return True
+
+    def connect(self) -> sqlite3.Connection:
+        """DB-API connection on the current snapshot (create_engine `creator`)."""
+        uri, generation = self._current
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=_ReplicaConnection)
+        conn.replica_generation = generation
+        return conn
+
+    async def connect_async(self) -> aiosqlite.Connection:
+        """aiosqlite connection on the current snapshot (create_async_engine `async_creator`)."""
+        uri, generation = self._current
+        pending = aiosqlite.connect(uri, uri=True, check_same_thread=False)
+        # As SQLAlchemy does for its own aiosqlite connections, so the worker thread cannot block exit
+        worker = pending if isinstance(pending, threading.Thread) else pending._thread
+        worker.daemon = True
+        conn = await pending
+        conn.replica_generation = generation
+        return conn
+
+    def is_current(self, driver_connection) -> bool:
+        return getattr(driver_connection, "replica_generation", None) == self.generation
+
+def install_replica(engine, replica: MemoryReplica, is_async: bool = False):
+    """
+    Keeps the connections of `engine` (a sync Engine, or the sync_engine of an
+    AsyncEngine) on the replica's current snapshot: a connection opened on an
+    older snapshot is reported as disconnected so the pool replaces it.
+    Sync checkouts also refresh the snapshot if the file changed. Async
+    checkouts run on the event loop, where the copy would block it, so async
+    callers refresh first through prepare_database_async.
+    """
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if not is_async:
+            replica.refresh_if_changed()
+        if not replica.is_current(connection_record.driver_connection):
+            raise exc.DisconnectionError("In-memory replica was refreshed")
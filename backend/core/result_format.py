@@ -0,0 +1,76 @@
+import os
+import json
+import datetime
+import decimal
+from typing import Any, List, Optional, Sequence
+
+# "columnar" (default) or "records" (legacy list of dicts)
+RESULT_FORMAT = os.getenv("RESULT_FORMAT", "columnar")
+
+# Decimals kept for floats >= 1, significant digits kept for smaller floats
+FLOAT_DECIMALS = 2
+FLOAT_DIGITS = 4
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, (float, decimal.Decimal)):
+        return "float"
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return "datetime"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "blob"
+    return "text"
+
+def _column_type(rows: Sequence[Sequence[Any]], index: int) -> str:
+    """Type of a column, from its non-null values. Mixed int/float columns are float."""
+    types = {_value_type(row[index]) for row in rows if row[index] is not None}
+    if not types:
+        return "null"
+    if types <= {"int", "float"}:
+        return "float" if "float" in types else "int"
+    return types.pop() if len(types) == 1 else "text"
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, (float, decimal.Decimal)):
+        value = float(value)
+        value = round(value, FLOAT_DECIMALS) if abs(value) >= 1 else float(f"{value:.{FLOAT_DIGITS}g}")
+        return int(value) if value.is_integer() and abs(value) < 2 ** 53 else value
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<blob {len(value)} bytes>"
+    return str(value)
+
+def encode_columnar(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """
+    Compact JSON encoding of a result set: column names and types once,
+    then each row as an array in column order, e.g.
+    {"columns":["origin","n"],"types":["text","int"],"rows":[["JFK",10],["LHR",5]]}
+    """
+    keys = list(keys)
+    payload = {
+        "columns": keys,
+        "types": [_column_type(rows, i) for i in range(len(keys))],
+        "rows": [[_encode_value(v) for v in row] for row in rows],
+    }
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+def encode_records(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """Legacy encoding: a Python list of dicts, repeating every column name per row."""
+    return str([dict(zip(keys, row)) for row in rows])
+
+def encode_rows(keys: Sequence[str], rows: Sequence[Sequence[Any]], result_format: Optional[str] = None) -> str:
+    """Encodes rows with the configured RESULT_FORMAT."""
+    if (result_format or RESULT_FORMAT) == "records":
+        return encode_records(keys, rows)
+    return encode_columnar(keys, rows)
+
+def decode_columnar(payload: str) -> List[dict]:
+    """Turns a columnar payload back into a list of row dicts."""
+    data = json.loads(payload)
+    return [dict(zip(data["columns"], row)) for row in data["rows"]]
@@ -0,0 +1,168 @@
+import os
+import time
+import uuid
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import pyarrow as pa
+from backend.core.export import ArrowStreamEncoder
+
+# Largest result written to a spill file; bigger results only report a COUNT (0 disables spilling)
+SPILL_MAX_ROWS = int(os.getenv("RESULT_SPILL_MAX_ROWS", "1000000"))
+
+class SpillWriter:
+    """Writes one result, chunk by chunk, to an Arrow IPC file."""
+    def __init__(self, store: "ResultStore", handle: str, path: str, keys: Sequence[str]):
+        self.store = store
+        self.handle = handle
+        self.path = path
+        self.keys = list(keys)
+        self.row_count = 0
+        self._file = open(path, "wb")
+        self._encoder = ArrowStreamEncoder(keys, sink=self._file, new_writer=pa.ipc.new_file)
+
+    def write(self, rows: Sequence[Sequence[Any]]):
+        if rows:
+            self._encoder.encode(rows)
+            self.row_count += len(rows)
+
+    def commit(self) -> str:
+        """Finishes the file and makes it readable under the handle."""
+        self._encoder.close()
+        self._file.close()
+        self.store._register(self.handle, self.path, self.keys, self.row_count)
+        return self.handle
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+class ResultStore:
+    """
+    Full query results spilled to Arrow IPC files under short handles, so agents
+    can pass a preview plus the handle instead of the rows. Deferred results are
+    only written when their handle is first opened. Files are read through a
+    memory map (zero-copy) and expire after `ttl_seconds`; at most `max_files`
+    are kept.
+    """
+    def __init__(self, spill_dir: str, ttl_seconds: float = 3600.0, max_files: int = 64):
+        self.spill_dir = spill_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_files = max_files
+        # handle -> {"path", "columns", "row_count", "created_at"}
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # handle -> lock serializing its deferred load, so a handle opened twice
+        # runs its query once while loads of other handles proceed in parallel
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def _new_handle() -> str:
+        return f"res_{uuid.uuid4().hex[:12]}"
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.spill_dir, f"{handle}.arrow")
+
+    def writer(self, keys: Sequence[str]) -> SpillWriter:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        handle = self._new_handle()
+        return SpillWriter(self, handle, self._path(handle), keys)
+
+    def defer(self, keys: Sequence[str], row_count: int, loader: Callable[[SpillWriter], None]) -> str:
+        """
+        Hands out a handle for a result that is not written yet: `loader` fills a
+        SpillWriter (e.g. by re-running the query) when the handle is first opened.
+        """
+        handle = self._new_handle()
+        self._register(handle, self._path(handle), list(keys), row_count, loader)
+        return handle
+
+    def _register(self, handle: str, path: str, keys: List[str], row_count: int, loader: Optional[Callable[[SpillWriter], None]] = None):
+        with self._lock:
+            self._results[handle] = {"path": path, "columns": keys, "row_count": row_count, "created_at": time.monotonic(), "loader": loader}
+            expired = self._expire_locked()
+        for path in expired:
+            self._remove_file(path)
+
+    def _expire_locked(self) -> List[str]:
+        now = time.monotonic()
+        expired = [h for h, r in self._results.items() if now - r["created_at"] >= self.ttl_seconds]
+        while len(self._results) - len(expired) > self.max_files:
+            expired.append(next(h for h in self._results if h not in expired))
+        for h in expired:
+            self._load_locks.pop(h, None)
+        return [self._results.pop(h)["path"] for h in expired]
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _lookup(self, handle: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            expired = self._expire_locked()
+            result = self._results.get(handle)
+        for path in expired:
+            self._remove_file(path)
+        return result
+
+    def info(self, handle: str) -> Optional[Dict[str, Any]]:
+        """Columns and row count of a stored result, or None if unknown or expired."""
+        result = self._lookup(handle)
+        if result is None:
+            return None
+        return {"handle": handle, "columns": result["columns"], "row_count": result["row_count"]}
+
+    def open_table(self, handle: str) -> pa.Table:
+        """
+        Memory-maps a stored result. The table's buffers point into the page cache,
+        so reading it copies nothing. Raises KeyError for unknown or expired handles.
+        """
+        result = self._lookup(handle)
+        if result is None:
+            raise KeyError(f"Result handle '{handle}' not found or expired.")
+        if result["loader"] is not None:
+            result = self._load(handle)
+        return pa.ipc.open_file(pa.memory_map(result["path"])).read_all()
+
+    def _load(self, handle: str) -> Dict[str, Any]:
+        """Writes a deferred result. Raises KeyError if it expired or its loader failed."""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(handle, threading.Lock())
+        with load_lock:
+            result = self._lookup(handle)
+            if result is None:
+                raise KeyError(f"Result handle '{handle}' not found or expired.")
+            if result["loader"] is None:
+                return result
+            os.makedirs(self.spill_dir, exist_ok=True)
+            writer = SpillWriter(self, handle, result["path"], result["columns"])
+            try:
+                result["loader"](writer)
+            except Exception as e:
+                writer.abort()
+                raise KeyError(f"Result handle '{handle}' could not be loaded: {e}") from e
+            writer.commit()
+            with self._lock:
+                # Later opens see the committed file and skip the lock
+                self._load_locks.pop(handle, None)
+            return dict(result, row_count=writer.row_count, loader=None)
+
+    def discard(self, handle: str):
+        with self._lock:
+            result = self._results.pop(handle, None)
+            self._load_locks.pop(handle, None)
+        if result:
+            self._remove_file(result["path"])
+
+result_store = ResultStore(
+    spill_dir=os.getenv("RESULT_SPILL_DIR", os.path.join(tempfile.gettempdir(), "db_agent_results")),
+    ttl_seconds=float(os.getenv("RESULT_SPILL_TTL_SECONDS", "3600")),
+    max_files=int(os.getenv("RESULT_SPILL_MAX_FILES", "64")),
+)
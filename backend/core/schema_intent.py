@@ -0,0 +1,115 @@
+import re
+import logging
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+from backend.core.schema_parser import TableMetadata
+from backend.core.schema_registry import schema_registry
+
+logger = logging.getLogger(__name__)
+
+# Politeness around the question that does not change its intent
+_PREFIX = r"(?:(?:hi|hey|hello|ok|okay)[, ]+)?(?:please |can you |could you |would you |can i |could i )?(?:please )?"
+_SUFFIX = r"(?: please)?"
+_DB = r"(?:the |this |our |your )?(?:database|db|schema)"
+_TABLE = r"(?:the )?(?P<table>[a-z_][a-z0-9_]*)(?: table)?"
+
+# Questions that ask for the list of tables, and nothing else
+LIST_PATTERNS = [
+    rf"(?:what|which) tables (?:are there|are available|exist|do (?:you|we|i) have|can i (?:query|use|ask about))(?: in {_DB})?",
+    rf"(?:what|which) tables (?:are|exist) in {_DB}",
+    rf"(?:what|which) tables does {_DB} (?:have|contain)",
+    rf"what tables",
+    rf"(?:list|show|give)(?: me)?(?: all)?(?: of)?(?: the)?(?: available)? tables(?: (?:available|in {_DB}))?",
+]
+
+# Questions about one table's columns; the named table must exist
+DESCRIBE_PATTERNS = [
+    rf"(?:describe|explain) {_TABLE}",
+    rf"(?:show|list|give|what are)(?: me)?(?: all)?(?: the)? (?:columns|fields) (?:of|in|for) {_TABLE}",
+    rf"what (?:columns|fields) (?:are in|are there in|does) {_TABLE}(?: have| contain)?",
+    rf"(?:show|give|what is|what's)(?: me)?(?: the)? (?:schema|structure|columns) (?:of|for) {_TABLE}",
+]
+
+# Questions about every table's columns
+DESCRIBE_ALL_PATTERNS = [
+    rf"(?:describe|explain|show|give)(?: me)? (?:all|all the|every|each)(?: of the)? tables",
+    rf"(?:describe|explain|show|give|what is|what's)(?: me)? {_DB}(?: structure)?",
+    rf"(?:describe|explain|show|give|what is|what's)(?: me)? (?:the )?(?:database |db )?(?:schema|structure)(?: of {_DB})?",
+]
+
+class SchemaIntent(BaseModel):
+    """A schema question answerable from the schema registry alone."""
+    kind: Literal["list_tables", "describe_table"]
+    tables: List[str] = []
+
+def _normalize(message: str) -> str:
+    text = " ".join(message.lower().split())
+    return text.rstrip("?.! ").strip()
+
+def _resolve_table(name: str, table_names: List[str]) -> Optional[str]:
+    """Matches a table named in a question, allowing singular/plural ("flight" for flights)."""
+    by_lower = {t.lower(): t for t in table_names}
+    for candidate in (name, f"{name}s", name[:-1] if name.endswith("s") else None):
+        if candidate and candidate in by_lower:
+            return by_lower[candidate]
+    return None
+
+def _full_match(patterns: List[str], text: str) -> Optional[re.Match]:
+    for pattern in patterns:
+        match = re.fullmatch(f"{_PREFIX}{pattern}{_SUFFIX}", text)
+        if match:
+            return match
+    return None
+
+def detect_schema_intent(message: str, table_names: List[str]) -> Optional[SchemaIntent]:
+    """
+    Rule-based detection of "what tables are there" and "describe table X"
+    questions. Only whole-message matches count, so anything more (filters,
+    counts, charts) still goes to the agents. Returns None when unsure.
+    """
+    if not table_names:
+        return None
+    text = _normalize(message)
+    if _full_match(LIST_PATTERNS, text):
+        return SchemaIntent(kind="list_tables")
+    if _full_match(DESCRIBE_ALL_PATTERNS, text):
+        return SchemaIntent(kind="describe_table", tables=list(table_names))
+    match = _full_match(DESCRIBE_PATTERNS, text)
+    if match:
+        table = _resolve_table(match.group("table"), table_names)
+        if table:
+            return SchemaIntent(kind="describe_table", tables=[table])
+    return None
+
+def _cell(value: Optional[str]) -> str:
+    return (value or "").replace("|", "\\|").replace("\n", " ")
+
+def render_table_list(tables: List[TableMetadata]) -> str:
+    lines = ["### Available Tables", ""]
+    for table in tables:
+        lines.append(f"- **{table.name}**" + (f": {table.description}" if table.description else ""))
+    lines += ["", "Ask me to describe any of them to see their columns."]
+    return "\n".join(lines)
+
+def render_table_description(table: TableMetadata) -> str:
+    """One table in the SchemaExplorer layout: header, italic description, column table."""
+    lines = [f"### Table: {table.name}"]
+    if table.description:
+        lines.append(f"*{table.description}*")
+    lines += ["", "| Name | Type | Description |", "| --- | --- | --- |"]
+    for column in table.columns:
+        notes = []
+        if column.primary_key:
+            notes.append("Primary key.")
+        if column.foreign_key:
+            notes.append(f"References `{column.foreign_key}`.")
+        description = " ".join(filter(None, [column.description, *notes]))
+        lines.append(f"| {_cell(column.name)} | {_cell(column.type)} | {_cell(description)} |")
+    return "\n".join(lines)
+
+def answer_schema_intent(intent: SchemaIntent, db_id: Optional[str] = None) -> str:
+    tables = schema_registry.get_tables(db_id)
+    if intent.kind == "list_tables":
+        return render_table_list(tables)
+    by_name = {t.name: t for t in tables}
+    return "\n\n---\n\n".join(render_table_description(by_name[name]) for name in intent.tables if name in by_name)
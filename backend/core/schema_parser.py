@@ -1,7 +1,16 @@
+import os
 import yaml
+import pickle
+import hashlib
+import logging
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
+# Bump when the cached representation of SchemaMetadata changes
+SCHEMA_CACHE_VERSION = 1
+
 class ColumnMetadata(BaseModel):
     name: str
     type: str
@@ -25,3 +34,41 @@ class SchemaParser:
             data = yaml.safe_load(f)
         
         return SchemaMetadata(**data)
+
+    @staticmethod
+    def _cache_path(file_path: str, cache_dir: str) -> str:
+        """Cache file name derived from the schema path, size and mtime."""
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}:{SCHEMA_CACHE_VERSION}"
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return os.path.join(cache_dir, f"{os.path.basename(file_path)}.{digest}.pickle")
+
+    @staticmethod
+    def parse_yaml_cached(file_path: str, cache_dir: Optional[str] = None) -> SchemaMetadata:
+        """
+        Parses a schema YAML file, reusing the compiled metadata from a previous
+        boot when the file is unchanged. Skips both YAML parsing and pydantic validation on a hit.
+        """
+        cache_dir = cache_dir or os.getenv("SCHEMA_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(file_path)), ".schema_cache")
+        cache_path = SchemaParser._cache_path(file_path, cache_dir)
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    metadata = pickle.load(f)
+                if isinstance(metadata, SchemaMetadata):
+                    return metadata
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable schema cache {cache_path}: {e}")
+
+        metadata = SchemaParser.parse_yaml(file_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(metadata, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # Read-only filesystems just lose the cache
+            logger.warning(f"Could not write schema cache {cache_path}: {e}")
+        return metadata
@@ -1,10 +1,43 @@
+import math
+import logging
+import threading
 from typing import List, Optional, Dict
-from backend.core.schema_parser import SchemaMetadata, TableMetadata
+from backend.core.schema_parser import SchemaParser, SchemaMetadata, TableMetadata
 from backend.core.database import database_context_var
 
+logger = logging.getLogger(__name__)
+
+def render_schema_digest(tables: List[TableMetadata]) -> str:
+    """
+    The schema in as few tokens as possible: one line per table with its
+    columns, types and keys, e.g. "flights(id INTEGER PK, pilot_id INTEGER -> pilots.id)".
+    """
+    lines = []
+    for table in tables:
+        columns = []
+        for column in table.columns:
+            text = f"{column.name} {column.type}"
+            if column.primary_key:
+                text += " PK"
+            if column.foreign_key:
+                text += f" -> {column.foreign_key}"
+            columns.append(text)
+        line = f"{table.name}({', '.join(columns)})"
+        if table.description:
+            line += f" -- {table.description}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
 class SchemaRegistry:
     _instance = None
     _schemas: Dict[str, SchemaMetadata] = {}
+    # Schema files declared for lazy loading: db_id -> path
+    _schema_files: Dict[str, str] = {}
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -15,14 +48,38 @@ class SchemaRegistry:
         """Loads and stores the schema metadata for a specific database."""
         self._schemas[db_id] = metadata
 
+    def declare_schema(self, db_id: str, schema_file: str):
+        """Records a schema file to be parsed on the first lookup for this database."""
+        self._schema_files[db_id] = schema_file
+
+    def unload_schema(self, db_id: str):
+        """Forgets a database's schema (loaded or declared)."""
+        with self._lock:
+            self._schemas.pop(db_id, None)
+            self._schema_files.pop(db_id, None)
+
+    def _ensure_loaded(self, db_id: Optional[str]):
+        """Parses a declared schema file on first use."""
+        if not db_id or db_id in self._schemas or db_id not in self._schema_files:
+            return
+        with self._lock:
+            if db_id in self._schemas:
+                return
+            logger.info(f"Loading schema for database '{db_id}' from {self._schema_files[db_id]}")
+            self._schemas[db_id] = SchemaParser.parse_yaml_cached(self._schema_files[db_id])
+
     def get_tables(self, db_id: Optional[str] = None) -> List[TableMetadata]:
         """Returns all table definitions for the active database."""
         if db_id is None:
             db_id = database_context_var.get()
+        self._ensure_loaded(db_id)
         
-        # Fallback for single-DB setup or if only one schema is loaded
-        if (not db_id or db_id not in self._schemas) and len(self._schemas) == 1:
-            db_id = next(iter(self._schemas))
+        # Fallback for single-DB setup or if only one schema is loaded/declared
+        if not db_id or db_id not in self._schemas:
+            known = set(self._schemas) | set(self._schema_files)
+            if len(known) == 1:
+                db_id = next(iter(known))
+                self._ensure_loaded(db_id)
 
         if db_id and db_id in self._schemas:
             return self._schemas[db_id].tables
@@ -32,6 +89,10 @@ class SchemaRegistry:
         """Returns a list of all table names for the active database."""
         return [t.name for t in self.get_tables(db_id)]
 
+    def get_schema_digest(self, db_id: Optional[str] = None) -> str:
+        """Returns the compact one-line-per-table digest of the active database's schema."""
+        return render_schema_digest(self.get_tables(db_id))
+
     def get_table(self, table_name: str, db_id: Optional[str] = None) -> Optional[TableMetadata]:
         """Returns metadata for a specific table in the active database."""
         tables = self.get_tables(db_id)
@@ -0,0 +1,39 @@
+import hashlib
+import sqlparse
+
+def normalize_sql(query: str, lower_identifiers: bool = True) -> str:
+    """
+    Normalizes a SQL statement for cache keys: comments removed, keywords
+    upper-cased, identifiers lower-cased (unless lower_identifiers is False),
+    whitespace collapsed and the trailing semicolon dropped.
+    String literals are left untouched.
+    """
+    formatted = sqlparse.format(query, strip_comments=True, keyword_case="upper",
+                                identifier_case="lower" if lower_identifiers else None)
+    parts = []
+    pending_space = False
+    for statement in sqlparse.parse(formatted):
+        for token in statement.flatten():
+            if token.is_whitespace:
+                pending_space = True
+                continue
+            if pending_space and parts:
+                parts.append(" ")
+            parts.append(token.value)
+            pending_space = False
+    return "".join(parts).rstrip("; ")
+
+def fingerprint_sql(query: str) -> str:
+    """Short stable hash of the normalized statement."""
+    return hashlib.sha1(normalize_sql(query).encode("utf-8")).hexdigest()
+
+def collapse_whitespace(query: str) -> str:
+    """
+    Cheap normalization (no parsing) for keys where literal content does not
+    matter, such as validation results: whitespace runs collapsed, trailing
+    semicolons dropped.
+    """
+    if "--" in query:
+        # Line comments end at a newline, so newlines are significant
+        return query.strip().rstrip("; ")
+    return " ".join(query.split()).rstrip("; ")
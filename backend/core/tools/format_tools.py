@@ -13,22 +13,24 @@ def ensure_chart_tags(response_text: str) -> str:
 
     # Pattern to find a JSON object, possibly wrapped in ```json ... ```
     pattern = re.compile(r'```json\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*?\})', re.DOTALL)
-    match = pattern.search(response_text)
-
-    if match:
+    for match in pattern.finditer(response_text):
         # The actual JSON content will be in group 1 if wrapped in markdown,
         # or group 2 if it's a raw JSON object.
         json_str = match.group(1) or match.group(2)
         
         try:
             # Validate if it's actually JSON before wrapping
-            json.loads(json_str)
-            tagged_block = f"\n[CHART_JSON]\n{json_str.strip()}\n[/CHART_JSON]\n"
-            
-            # Replace the original matched block (markdown fence or raw) with the tagged version
-            return response_text.replace(match.group(0), tagged_block)
+            data = json.loads(json_str)
         except (json.JSONDecodeError, TypeError):
-            # Not a valid JSON block, do nothing
-            return response_text
+            # Not a valid JSON block, keep looking
+            continue
+
+        # Skip JSON that is not a chart config (e.g. a columnar query result)
+        if not isinstance(data, dict) or not ("chart" in data or "series" in data):
+            continue
+
+        tagged_block = f"\n[CHART_JSON]\n{json_str.strip()}\n[/CHART_JSON]\n"
+        # Replace the original matched block (markdown fence or raw) with the tagged version
+        return response_text.replace(match.group(0), tagged_block)
             
     return response_text
@@ -1,34 +1,185 @@
+import os
 import logging
-from typing import Dict, Any
-from sqlalchemy import text
-from backend.core.database import get_engine
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+from sqlalchemy import inspect, text, select, func, table, Connection, Engine
+from backend.core.database import get_engine, get_database_type, get_duckdb_database, resolve_database_id, get_data_version
+from backend.core.query_cache import report_cache
+from backend.core.read_only_guard import guard_suspended
 
 logger = logging.getLogger(__name__)
 
-def generate_summary_report() -> Dict[str, Any]:
+# Parallel COUNT(*) queries for tables without catalog statistics
+SUMMARY_COUNT_WORKERS = int(os.getenv("SUMMARY_COUNT_WORKERS", "4"))
+
+def _sqlite_row_estimates(conn: Connection) -> Dict[str, int]:
+    # sqlite_stat1 only exists after ANALYZE; the first number of `stat` is the row count
+    # of the table (idx NULL) or of one of its indexes (smaller for partial indexes)
+    if not inspect(conn).has_table("sqlite_stat1"):
+        return {}
+    estimates: Dict[str, int] = {}
+    for tbl, stat in conn.execute(text("SELECT tbl, stat FROM sqlite_stat1")):
+        rows = int(str(stat).split()[0])
+        estimates[tbl] = max(rows, estimates.get(tbl, 0))
+    return estimates
+
+def _postgres_row_estimates(conn: Connection) -> Dict[str, int]:
+    # reltuples is -1 for tables never vacuumed or analyzed
+    result = conn.execute(text(
+        "SELECT c.relname, c.reltuples FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND n.nspname = current_schema() AND c.reltuples >= 0"
+    ))
+    return {name: int(rows) for name, rows in result}
+
+def _sqlite_table_sizes(conn: Connection) -> Dict[str, int]:
+    # dbstat is a compile-time option; tables and their indexes are summed
+    with guard_suspended(conn):
+        result = conn.execute(text(
+            "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+        )).fetchall()
+    return {name: int(size) for name, size in result}
+
+def _postgres_table_sizes(conn: Connection) -> Dict[str, int]:
+    result = conn.execute(text(
+        "SELECT c.relname, pg_total_relation_size(c.oid) FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+    ))
+    return {name: int(size) for name, size in result}
+
+# Catalog readers per SQLAlchemy dialect; other dialects fall back to exact counts and no sizes
+CATALOG_ROW_ESTIMATES: Dict[str, Callable[[Connection], Dict[str, int]]] = {
+    "sqlite": _sqlite_row_estimates,
+    "postgresql": _postgres_row_estimates,
+}
+CATALOG_TABLE_SIZES: Dict[str, Callable[[Connection], Dict[str, int]]] = {
+    "sqlite": _sqlite_table_sizes,
+    "postgresql": _postgres_table_sizes,
+}
+
+def _read_catalog(readers: Dict[str, Callable[[Connection], Dict[str, int]]], conn: Connection) -> Dict[str, int]:
+    reader = readers.get(conn.dialect.name)
+    if reader is None:
+        return {}
+    try:
+        return reader(conn)
+    except Exception as e:
+        logger.debug(f"Catalog statistics unavailable ({conn.dialect.name}): {e}")
+        conn.rollback()
+        return {}
+
+def _exact_count(engine: Engine, name: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table(name))).scalar()
+
+def _exact_counts(engine: Engine, tables: List[str]) -> Dict[str, int]:
+    """COUNT(*) of each table, one pooled connection per worker."""
+    if not tables:
+        return {}
+    workers = max(1, min(SUMMARY_COUNT_WORKERS, len(tables)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-count") as pool:
+        counts = pool.map(lambda name: _exact_count(engine, name), tables)
+        return dict(zip(tables, counts))
+
+def _duckdb_exact_counts(db_id: str, tables: List[str]) -> Dict[str, int]:
+    if not tables:
+        return {}
+    # One scan: DuckDB answers COUNT(*) from its row groups
+    query = " UNION ALL ".join(
+        "SELECT '{}', COUNT(*) FROM \"{}\"".format(name.replace("'", "''"), name.replace('"', '""')) for name in tables
+    )
+    cursor = get_duckdb_database(db_id).cursor()
+    try:
+        return dict(cursor.execute(query).fetchall())
+    finally:
+        cursor.close()
+
+def _build_duckdb_report(db_id: str, exact_counts: bool) -> Dict[str, Any]:
+    database = get_duckdb_database(db_id)
+    statistics = database.table_statistics()
+    tables = sorted(statistics)
+    # Native tables know their row count; attached SQLite tables report 0
+    estimated = database.mode != "scan" and not exact_counts
+    counted = {} if estimated else _duckdb_exact_counts(db_id, tables)
+    refreshed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    details = {}
+    for name in tables:
+        details[name] = {
+            "row_count": counted.get(name, statistics[name]["estimated_rows"]),
+            "row_count_source": "exact" if name in counted else "statistics",
+            "size_bytes": None,
+            "index_count": statistics[name]["index_count"],
+            "refreshed_at": refreshed_at,
+        }
+    return {
+        "status": "success",
+        "database": db_id,
+        "dialect": "duckdb",
+        "table_counts": {name: d["row_count"] for name, d in details.items()},
+        "total_tables": len(tables),
+        "tables": details,
+    }
+
+def _build_report(db_id: str, exact_counts: bool) -> Dict[str, Any]:
+    if get_database_type(db_id) == "duckdb":
+        return _build_duckdb_report(db_id, exact_counts)
+    engine = get_engine(db_id)
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        tables = sorted(inspector.get_table_names())
+        index_counts = {name: len(inspector.get_indexes(name)) for name in tables}
+        estimates = {} if exact_counts else _read_catalog(CATALOG_ROW_ESTIMATES, conn)
+        sizes = _read_catalog(CATALOG_TABLE_SIZES, conn)
+
+    counted = _exact_counts(engine, [name for name in tables if name not in estimates])
+    refreshed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    details = {}
+    for name in tables:
+        details[name] = {
+            "row_count": counted.get(name, estimates.get(name)),
+            "row_count_source": "exact" if name in counted else "statistics",
+            "size_bytes": sizes.get(name),
+            "index_count": index_counts[name],
+            "refreshed_at": refreshed_at,
+        }
+    return {
+        "status": "success",
+        "database": db_id,
+        "dialect": engine.dialect.name,
+        "table_counts": {name: d["row_count"] for name, d in details.items()},
+        "total_tables": len(tables),
+        "tables": details,
+    }
+
+def generate_summary_report(exact_counts: bool = False) -> Dict[str, Any]:
     """
-    Scans all tables in the database and returns a summary of record counts.
-    Useful for high-level status reports and dashboarding.
+    Summarizes all tables in the database: row count, size, index count and
+    when the figures were computed. Useful for high-level status reports and dashboarding.
+    Row counts come from the database's statistics when it has them
+    (row_count_source "statistics", an estimate) and from COUNT(*) otherwise.
+    Args:
+        exact_counts: Count every table with COUNT(*) even if statistics exist.
     """
-    engine = get_engine()
-    summary = {}
-    
     try:
-        with engine.connect() as conn:
-            # 1. Get all tables
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-            tables = [row[0] for row in result.fetchall()]
-            
-            # 2. Get counts for each table
-            for table in tables:
-                count_result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                summary[table] = count_result.scalar()
-                
-        return {
-            "status": "success",
-            "table_counts": summary,
-            "total_tables": len(tables)
-        }
+        db_id = resolve_database_id()
+        if db_id is None:
+            return {"status": "error", "message": "No database selected."}
+        mode = "exact" if exact_counts else "estimated"
+        version: Optional[Any] = get_data_version(db_id)
+        if version is not None:
+            cached = report_cache.get(db_id, mode, version)
+            if cached is not None:
+                return cached
+
+        report = _build_report(db_id, exact_counts)
+        if version is not None:
+            report_cache.put(db_id, mode, version, report)
+        return report
     except Exception as e:
         logger.error(f"Error generating summary report: {e}")
         return {"status": "error", "message": str(e)}
@@ -0,0 +1,92 @@
+import json
+from typing import Any, Dict, List
+import pyarrow as pa
+import pyarrow.compute as pc
+from opentelemetry import trace
+from backend.core.result_store import result_store
+
+# Categories kept in a chart built from a stored result
+MAX_CHART_CATEGORIES = 20
+
+def _column_summary(column: pa.ChunkedArray) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"type": str(column.type), "nulls": column.null_count}
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        min_max = pc.min_max(column).as_py()
+        mean = pc.mean(column).as_py()
+        summary.update({
+            "min": min_max["min"],
+            "max": min_max["max"],
+            "mean": round(mean, 2) if mean is not None else None,
+            "sum": pc.sum(column).as_py(),
+        })
+    else:
+        counts = pc.value_counts(column.drop_null())
+        top = sorted(counts.to_pylist(), key=lambda c: -c["counts"])[:5]
+        summary.update({
+            "distinct": pc.count_distinct(column).as_py(),
+            "top": [[c["values"], c["counts"]] for c in top],
+        })
+    return summary
+
+def describe_result(result_handle: str) -> str:
+    """
+    Summarizes the FULL result stored under a result_handle (from an execute_sql
+    output that was truncated): row count, plus per column the min/max/mean/sum
+    for numbers or the distinct count and most frequent values otherwise.
+    Args:
+        result_handle: The handle from the execute_sql output, e.g. "res_1a2b3c4d5e6f".
+    Returns:
+        A JSON object with "row_count" and "columns", or an error message.
+    """
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("Tool: describe_result", attributes={"result_handle": result_handle}):
+        try:
+            table = result_store.open_table(result_handle)
+        except KeyError as e:
+            return f"Error: {e.args[0]}"
+        summary = {
+            "row_count": table.num_rows,
+            "columns": {name: _column_summary(table.column(name)) for name in table.column_names},
+        }
+        return json.dumps(summary, default=str)
+
+def chart_from_result(result_handle: str, label_column: str, value_column: str, chart_type: str = "bar", aggregate: str = "sum") -> str:
+    """
+    Builds an ApexCharts config from the FULL result stored under a result_handle,
+    grouping rows by `label_column` and aggregating `value_column`.
+    Args:
+        result_handle: The handle from the execute_sql output.
+        label_column: Column used for the categories (x-axis or pie labels).
+        value_column: Numeric column to aggregate per category.
+        chart_type: "bar", "line", "area", "pie" or "donut".
+        aggregate: "sum", "mean", "count", "min" or "max".
+    Returns:
+        The chart config wrapped in [CHART_JSON] tags (top 20 categories by value), or an error message.
+    """
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("Tool: chart_from_result", attributes={"result_handle": result_handle, "chart_type": chart_type}):
+        if aggregate not in ("sum", "mean", "count", "min", "max"):
+            return f"Error: Unsupported aggregate '{aggregate}'."
+        try:
+            table = result_store.open_table(result_handle)
+        except KeyError as e:
+            return f"Error: {e.args[0]}"
+        for column in (label_column, value_column):
+            if column not in table.column_names:
+                return f"Error: Column '{column}' not in result (columns: {', '.join(table.column_names)})."
+
+        grouped = table.group_by(label_column).aggregate([(value_column, aggregate)])
+        value_name = f"{value_column}_{aggregate}"
+        grouped = grouped.sort_by([(value_name, "descending")]).slice(0, MAX_CHART_CATEGORIES)
+
+        labels: List[str] = ["Unknown" if v is None else str(v) for v in grouped.column(label_column).to_pylist()]
+        values = [round(v, 2) if isinstance(v, float) else v for v in grouped.column(value_name).to_pylist()]
+
+        if chart_type in ("pie", "donut"):
+            config = {"chart": {"type": chart_type}, "series": values, "labels": labels}
+        else:
+            config = {"chart": {"type": chart_type}, "series": [{"name": value_column, "data": values}], "xaxis": {"categories": labels}}
+        config["theme"] = {"mode": "dark"}
+        return f"[CHART_JSON]\n{json.dumps(config)}\n[/CHART_JSON]"
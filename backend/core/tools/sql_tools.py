@@ -1,48 +1,352 @@
+import os
+import time
+import asyncio
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
 import sqlparse
 from sqlalchemy import text
 from opentelemetry import trace
 from opentelemetry.trace import Status, StatusCode
-from backend.core.database import get_session
+from backend.core.database import get_session, get_async_session, prepare_database_async, resolve_database_id, get_data_version, get_statement_timeout, get_cost_limits, is_read_only_guarded, get_database_type, get_duckdb_database
+from backend.core.query_cache import QueryResultCache, query_cache, validation_cache, cost_cache
+from backend.core.query_budget import StatementBudget, BUDGET_OPTION
+from backend.core.plan_advisor import plan_recorder, column_usage
+from backend.core.duckdb_database import interrupt_on_budget
+from backend.core.cost_estimator import CostEstimate, estimate_cost, load_index_statistics, cost_action, limit_query, describe_cost
+from backend.core.aggregates import aggregate_store
+from backend.core.read_only_guard import READ_ONLY_ERROR, is_authorizer_denial
+from backend.core.result_format import encode_rows
+from backend.core.result_store import result_store, SPILL_MAX_ROWS
+from backend.core.export import EXPORT_CHUNK_ROWS
 from backend.core.telemetry import session_context_var
+from backend.core.tools.report_tools import generate_summary_report
 
 logger = logging.getLogger(__name__)
 
 # Security: Block mutable keywords for this Read-Only milestone
 FORBIDDEN_KEYWORDS = {"DROP", "DELETE", "INSERT", "UPDATE", "ALTER", "TRUNCATE", "GRANT", "REVOKE"}
 
+# When to run the sqlparse keyword walk: "auto" (only for databases without
+# the read-only authorizer), "always" or "never"
+KEYWORD_CHECK = os.getenv("SQL_KEYWORD_CHECK", "auto")
+
+# Maximum number of rows included in the tool output
+MAX_RESULT_ROWS = 50
+
+# How failed validations and executions start their output
+ERROR_PREFIXES = ("Error", "Syntax Error", "Database Error")
+
+# execute_sql_batch limits: queries per call and queries running at once
+MAX_BATCH_QUERIES = 8
+BATCH_MAX_WORKERS = int(os.getenv("SQL_BATCH_WORKERS", "4"))
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="sql-batch")
+
+def _check_read_only(query: str) -> Optional[str]:
+    """
+    Static analysis shared by the sync and async validators.
+    Returns an error message if the query is empty or mutable, otherwise None.
+    """
+    parsed = sqlparse.parse(query)
+    if not parsed:
+        return "Error: No SQL statement found."
+
+    for statement in parsed:
+        for token in statement.flatten():
+            if token.ttype == sqlparse.tokens.Keyword.DML or token.ttype == sqlparse.tokens.Keyword.DDL:
+                 if token.value.upper() in FORBIDDEN_KEYWORDS:
+                     return f"Error: Mutable operation '{token.value.upper()}' is not allowed in Read-Only mode."
+            if token.value.upper() in FORBIDDEN_KEYWORDS:
+                 return f"Error: Forbidden keyword '{token.value.upper()}' detected."
+    return None
+
+def _needs_keyword_check() -> bool:
+    """Whether validation must fall back to the keyword walk for the active database."""
+    if KEYWORD_CHECK == "always":
+        return True
+    if KEYWORD_CHECK == "never":
+        return False
+    return not is_read_only_guarded()
+
+def _check_query(query: str) -> Optional[str]:
+    """
+    Static checks run before EXPLAIN. Databases guarded by the SQLite authorizer
+    reject writes while the statement is prepared, so the keyword walk is skipped.
+    """
+    if not query.strip():
+        return "Error: No SQL statement found."
+    if _needs_keyword_check():
+        return _check_read_only(query)
+    return None
+
+def _explain_error(db_err: Exception) -> str:
+    if is_authorizer_denial(db_err):
+        return READ_ONLY_ERROR
+    return f"Syntax Error: {str(db_err)}"
+
+def _count_sql(query: str) -> str:
+    """Wraps a query so SQLite counts its rows without returning them."""
+    return f"SELECT COUNT(*) FROM ({query.strip().rstrip(';')}) AS _preview_count"
+
+def _format_results(keys: Sequence[str], rows: Sequence[Any], total_rows: Optional[int] = None, result_handle: Optional[str] = None) -> str:
+    """
+    Formats fetched rows into the textual tool output.
+    `rows` holds at most MAX_RESULT_ROWS + 1 rows; the extra row only signals truncation.
+    """
+    if not rows:
+        return "Query executed successfully but returned no results."
+
+    limited_rows = rows[:MAX_RESULT_ROWS]
+
+    output = f"Returned {len(limited_rows)} rows"
+    if len(rows) > MAX_RESULT_ROWS:
+        if total_rows is not None:
+            output += f" (truncated from {total_rows} total"
+        else:
+            output += " (truncated from total"
+        if result_handle:
+            output += f"; full result stored as result_handle {result_handle}"
+        output += ")."
+    output += ":\n" + encode_rows(keys, limited_rows)
+    return output
+
+def _write_chunks(writer, fetchmany):
+    while True:
+        chunk = fetchmany(EXPORT_CHUNK_ROWS)
+        if not chunk:
+            return
+        writer.write(chunk)
+
+def _result_loader(db_id: str, sql: str, version: Optional[Hashable], aggregate: bool = False):
+    """
+    Re-runs a truncated query into a spill file when its result_handle is first
+    opened, so the tools only ever fetch the preview.
+    """
+    def load(writer):
+        if get_data_version(db_id) != version:
+            raise RuntimeError("the data changed since the query ran; run it again")
+        budget = StatementBudget(get_statement_timeout(db_id))
+        if get_database_type(db_id) == "duckdb":
+            cursor = get_duckdb_database(db_id).cursor()
+            try:
+                with interrupt_on_budget(cursor, budget):
+                    cursor.execute(sql)
+                    _write_chunks(writer, cursor.fetchmany)
+            finally:
+                cursor.close()
+            return
+        session = aggregate_store.session(db_id) if aggregate else get_session(db_id)
+        try:
+            result = session.execute(text(sql), execution_options={BUDGET_OPTION: budget, "stream_results": True})
+            _write_chunks(writer, result.fetchmany)
+        finally:
+            session.close()
+    return load
+
+def _defer_result(keys: Sequence[str], total_rows: Optional[int], loader) -> Optional[str]:
+    """Result handle for a truncated result, or None if it is larger than SPILL_MAX_ROWS or spilling is disabled."""
+    if SPILL_MAX_ROWS <= 0 or total_rows is None or total_rows > SPILL_MAX_ROWS:
+        return None
+    return result_store.defer(keys, total_rows, loader)
+
+def _estimate_cost(query: str) -> CostEstimate:
+    """EXPLAIN QUERY PLAN plus table and index statistics, on the sync engine."""
+    session = get_session()
+    try:
+        plan = session.execute(text(f"EXPLAIN QUERY PLAN {query}")).fetchall()
+        index_stats = load_index_statistics(session.connection())
+    finally:
+        session.close()
+    counts = generate_summary_report().get("table_counts", {})
+    table_rows = {table.lower(): rows for table, rows in counts.items() if rows is not None}
+    aliases, _ = column_usage(query, {table: [] for table in table_rows})
+    return estimate_cost([(row[0], row[1], row[-1]) for row in plan], table_rows, index_stats, aliases)
+
+def _gate_query(query: str, span) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Applies the active database's cost limits before execution.
+    Returns (error, sql, note): the refusal message for a query that is too
+    expensive, otherwise the SQL to run (with a forced LIMIT if needed) and a
+    note to prepend to the output.
+    """
+    limits = get_cost_limits()
+    if limits is None:
+        return None, query, None
+    db_id = resolve_database_id()
+    version = get_data_version(db_id)
+    estimate = cost_cache.get(db_id, query, version) if version is not None else None
+    if estimate is None:
+        estimate = _estimate_cost(query)
+        if version is not None:
+            cost_cache.put(db_id, query, version, estimate)
+
+    action = cost_action(estimate, limits)
+    span.set_attribute("cost.estimated_rows", estimate.estimated_rows)
+    span.set_attribute("cost.full_scans", estimate.full_scans)
+    span.set_attribute("cost.join_fanout", estimate.join_fanout)
+    span.set_attribute("cost.action", action)
+    if action == "reject":
+        return (
+            f"Error: Query too expensive to run ({describe_cost(estimate)}; the limit is {limits.reject_rows:,}). "
+            "Refine it: filter on indexed columns, join on keys, or aggregate."
+        ), query, None
+    if action == "limit":
+        note = (
+            f"Note: LIMIT {limits.forced_limit} was enforced because the query is expensive ({describe_cost(estimate)}). "
+            "Add filters or aggregate for complete results.\n"
+        )
+        return None, limit_query(query, limits.forced_limit), note
+    return None, query, None
+
+def _cache_lookup(cache: QueryResultCache, query: str, span) -> Tuple[Optional[str], Optional[Tuple[str, Hashable]]]:
+    """
+    Checks a fingerprint cache for the active database and records hit/miss
+    counters on the span. Returns the cached value (if any) and the
+    (db_id, data_version) slot under which a fresh value should be stored.
+    """
+    db_id = resolve_database_id()
+    version = get_data_version(db_id)
+    if db_id is None or version is None:
+        # No file to derive a data version from, so entries cannot be invalidated
+        span.set_attribute("cache.enabled", False)
+        return None, None
+
+    cached = cache.get(db_id, query, version)
+    stats = cache.stats()
+    span.set_attribute("cache.hit", cached is not None)
+    span.set_attribute("cache.hits", stats["hits"])
+    span.set_attribute("cache.misses", stats["misses"])
+    return cached, (db_id, version)
+
+def _run_validation_duckdb(query: str) -> str:
+    """Statement-type check plus EXPLAIN on the embedded DuckDB database."""
+    error = _check_query(query)
+    if error:
+        return error
+
+    database = get_duckdb_database()
+    cursor = database.cursor()
+    try:
+        # DuckDB has no authorizer: parse the statements and only let reads through
+        if not database.check_read_only(cursor, query):
+            return READ_ONLY_ERROR
+        cursor.execute(f"EXPLAIN {query}")
+        return "VALID"
+    except Exception as db_err:
+        return f"Syntax Error: {str(db_err)}"
+    finally:
+        cursor.close()
+
+def _run_validation(query: str) -> str:
+    """Keyword check plus EXPLAIN QUERY PLAN on the sync engine."""
+    if get_database_type() == "duckdb":
+        return _run_validation_duckdb(query)
+
+    # 1. Check for Prohibited Keywords (Static Analysis)
+    error = _check_query(query)
+    if error:
+        return error
+
+    # 2. Check Syntax using SQLite EXPLAIN (Dynamic Analysis)
+    session = get_session()
+    try:
+        # Use EXPLAIN QUERY PLAN to validate syntax without executing
+        plan = session.execute(text(f"EXPLAIN QUERY PLAN {query}")).fetchall()
+        # Keep the plan for the index advisor
+        plan_recorder.record(resolve_database_id(), query, [row[-1] for row in plan])
+        return "VALID"
+    except Exception as db_err:
+        return _explain_error(db_err)
+    finally:
+        session.close()
+
+async def _run_validation_async(query: str) -> str:
+    """Keyword check plus EXPLAIN QUERY PLAN on the async engine."""
+    if get_database_type() == "duckdb":
+        # DuckDB calls are blocking; keep them off the event loop
+        return await asyncio.to_thread(_run_validation_duckdb, query)
+
+    error = _check_query(query)
+    if error:
+        return error
+
+    session = get_async_session()
+    try:
+        plan = (await session.execute(text(f"EXPLAIN QUERY PLAN {query}"))).fetchall()
+        plan_recorder.record(resolve_database_id(), query, [row[-1] for row in plan])
+        return "VALID"
+    except Exception as db_err:
+        return _explain_error(db_err)
+    finally:
+        await session.close()
+
+def _execute_duckdb(query: str, span, cache_slot: Optional[Tuple[str, Hashable]]) -> str:
+    """Runs a validated query on the embedded DuckDB database (execute_sql for type duckdb)."""
+    span.set_attribute("db.engine", "duckdb")
+    cursor = get_duckdb_database().cursor()
+    budget = StatementBudget(get_statement_timeout())
+    try:
+        logger.debug(f"Executing SQL (DuckDB): {query}")
+        with interrupt_on_budget(cursor, budget):
+            cursor.execute(query)
+            keys = [column[0] for column in cursor.description or []]
+            rows = cursor.fetchmany(MAX_RESULT_ROWS + 1)
+
+            total_rows, result_handle = len(rows), None
+            if total_rows > MAX_RESULT_ROWS:
+                # Count the rest without fetching it; the full result is only written if its handle is opened
+                try:
+                    total_rows = cursor.execute(_count_sql(query)).fetchone()[0]
+                except Exception as count_err:
+                    logger.warning(f"Row count failed, reporting preview only: {count_err}")
+                    total_rows = None
+                db_id = resolve_database_id()
+                result_handle = _defer_result(keys, total_rows, _result_loader(db_id, query, get_data_version(db_id)))
+
+        span.set_attribute("row_count", total_rows if total_rows is not None else len(rows))
+        span.set_attribute("row_count_exact", total_rows is not None)
+        span.set_attribute("result.spilled", result_handle is not None)
+
+        output = _format_results(keys, rows, total_rows, result_handle)
+        # Handles expire with the result store, so outputs carrying one are not cached
+        if cache_slot and result_handle is None:
+            query_cache.put(cache_slot[0], query, cache_slot[1], output)
+        return output
+
+    except Exception as e:
+        budget_error = budget.error_message()
+        if budget_error:
+            logger.warning(f"SQL Execution aborted ({budget.outcome}): {query}")
+            span.set_attribute("budget.outcome", budget.outcome)
+            span.set_status(Status(StatusCode.ERROR, budget_error))
+            return budget_error
+        logger.error(f"SQL Execution failed: {e}")
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR))
+        return f"Database Error: {str(e)}"
+    finally:
+        cursor.close()
+
 def validate_sql(query: str) -> str:
     """
     Validates a SQL query for syntax and prohibited keywords.
     Returns "VALID" if safe, or an error message if invalid/unsafe.
     """
     tracer = trace.get_tracer(__name__)
-    
+
     with tracer.start_as_current_span("Tool: validate_sql", attributes={"query": query}) as span:
         try:
-            # 1. Check for Prohibited Keywords (Static Analysis)
-            parsed = sqlparse.parse(query)
-            if not parsed:
-                return "Error: No SQL statement found."
-            
-            for statement in parsed:
-                for token in statement.flatten():
-                    if token.ttype == sqlparse.tokens.Keyword.DML or token.ttype == sqlparse.tokens.Keyword.DDL:
-                         if token.value.upper() in FORBIDDEN_KEYWORDS:
-                             return f"Error: Mutable operation '{token.value.upper()}' is not allowed in Read-Only mode."
-                    if token.value.upper() in FORBIDDEN_KEYWORDS:
-                         return f"Error: Forbidden keyword '{token.value.upper()}' detected."
-
-            # 2. Check Syntax using SQLite EXPLAIN (Dynamic Analysis)
-            session = get_session()
-            try:
-                # Use EXPLAIN QUERY PLAN to validate syntax without executing
-                session.execute(text(f"EXPLAIN QUERY PLAN {query}"))
-                return "VALID"
-            except Exception as db_err:
-                return f"Syntax Error: {str(db_err)}"
-            finally:
-                session.close()
+            cached, cache_slot = _cache_lookup(validation_cache, query, span)
+            if cached is not None:
+                if cached == "VALID":
+                    plan_recorder.touch(cache_slot[0], query)
+                return cached
+
+            outcome = _run_validation(query)
+            if cache_slot:
+                validation_cache.put(cache_slot[0], query, cache_slot[1], outcome)
+            return outcome
 
         except Exception as e:
             logger.error(f"SQL validation error: {e}")
@@ -50,54 +354,269 @@ def validate_sql(query: str) -> str:
             span.set_status(Status(StatusCode.ERROR))
             return f"Error: Validation failed. {str(e)}"
 
+def _execute_validated(query: str, span, cache_slot: Optional[Tuple[str, Hashable]]) -> str:
+    """Runs a query that already passed the cache lookup and validation (shared by both execute tools)."""
+    if get_database_type() == "duckdb":
+        return _execute_duckdb(query, span, cache_slot)
+
+    # 2. Execute, against precomputed aggregates when they answer the query
+    db_id = resolve_database_id()
+    sql = aggregate_store.rewrite(db_id, query)
+    span.set_attribute("aggregate.rewritten", sql is not None)
+    note = None
+    session_is_aggregate = sql is not None
+    session = aggregate_store.session(db_id) if session_is_aggregate else get_session()
+    budget = StatementBudget(get_statement_timeout())
+    try:
+        if sql is None:
+            # Refuse or cap queries the cost limits deem too expensive
+            error, sql, note = _gate_query(query, span)
+            if error:
+                span.set_status(Status(StatusCode.ERROR, error))
+                return error
+
+        print(f"\n--- EXECUTING SQL ---\n{sql}\n---------------------\n")
+        result = session.execute(text(sql), execution_options={BUDGET_OPTION: budget, "stream_results": True})
+
+        # 3. Fetch only the preview (plus one row to detect truncation)
+        keys = list(result.keys())
+        rows = result.fetchmany(MAX_RESULT_ROWS + 1)
+
+        total_rows, result_handle = len(rows), None
+        result.close()
+        if total_rows > MAX_RESULT_ROWS:
+            # 4. Let SQLite count the rest instead of materializing them in Python
+            try:
+                total_rows = session.execute(text(_count_sql(sql)), execution_options={BUDGET_OPTION: budget}).scalar()
+            except Exception as count_err:
+                logger.warning(f"Row count failed, reporting preview only: {count_err}")
+                total_rows = None
+            # Agents only see the preview and a handle; the full result is spilled if the handle is opened
+            loader = _result_loader(db_id, sql, get_data_version(db_id), aggregate=session_is_aggregate)
+            result_handle = _defer_result(keys, total_rows, loader)
+
+        # Add result summary to span
+        span.set_attribute("row_count", total_rows if total_rows is not None else len(rows))
+        span.set_attribute("row_count_exact", total_rows is not None)
+        span.set_attribute("result.spilled", result_handle is not None)
+
+        output = (note or "") + _format_results(keys, rows, total_rows, result_handle)
+        if cache_slot and result_handle is None:
+            query_cache.put(cache_slot[0], query, cache_slot[1], output)
+        return output
+
+    except Exception as e:
+        budget_error = budget.error_message()
+        if budget_error:
+            logger.warning(f"SQL Execution aborted ({budget.outcome}): {query}")
+            span.set_attribute("budget.outcome", budget.outcome)
+            span.set_status(Status(StatusCode.ERROR, budget_error))
+            return budget_error
+        logger.error(f"SQL Execution failed: {e}")
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR))
+        return f"Database Error: {str(e)}"
+    finally:
+        session.close()
+
 def execute_sql(query: str) -> str:
     """
     Executes a READ-ONLY SQL query against the database.
     Args:
         query: The SQL query to execute.
     Returns:
-        A string representation of the results (Markdown table or list), or an error message.
+        A row-count header followed by the rows as compact columnar JSON
+        ({"columns": [...], "types": [...], "rows": [[...], ...]}), or an error message.
     """
     tracer = trace.get_tracer(__name__)
-    
+
     with tracer.start_as_current_span("Tool: execute_sql", attributes={"query": query}) as span:
+        cached, cache_slot = _cache_lookup(query_cache, query, span)
+        if cached is not None:
+            return cached
+
         # 1. Validate first
         validation = validate_sql(query)
         if validation != "VALID":
             span.set_status(Status(StatusCode.ERROR, validation))
             return validation
 
+        return _execute_validated(query, span, cache_slot)
+
+async def validate_sql_async(query: str) -> str:
+    """
+    Validates a SQL query for syntax and prohibited keywords without blocking the event loop.
+    Returns "VALID" if safe, or an error message if invalid/unsafe.
+    """
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("Tool: validate_sql_async", attributes={"query": query}) as span:
+        await prepare_database_async()
+        try:
+            cached, cache_slot = _cache_lookup(validation_cache, query, span)
+            if cached is not None:
+                if cached == "VALID":
+                    plan_recorder.touch(cache_slot[0], query)
+                return cached
+
+            outcome = await _run_validation_async(query)
+            if cache_slot:
+                validation_cache.put(cache_slot[0], query, cache_slot[1], outcome)
+            return outcome
+
+        except Exception as e:
+            logger.error(f"SQL validation error: {e}")
+            span.record_exception(e)
+            span.set_status(Status(StatusCode.ERROR))
+            return f"Error: Validation failed. {str(e)}"
+
+def _runs_synchronously(query: str) -> bool:
+    """True if the query goes to DuckDB or is answered from an aggregate table, which only the sync path serves."""
+    return get_database_type() == "duckdb" or aggregate_store.rewrite(resolve_database_id(), query) is not None
+
+async def execute_sql_async(query: str) -> str:
+    """
+    Executes a READ-ONLY SQL query against the database using the async engine,
+    so other streams keep flowing while the query runs.
+    Args:
+        query: The SQL query to execute.
+    Returns:
+        A row-count header followed by the rows as compact columnar JSON
+        ({"columns": [...], "types": [...], "rows": [[...], ...]}), or an error message.
+    """
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("Tool: execute_sql_async", attributes={"query": query}) as span:
+        # Registration and replica refreshes copy data; do them before touching the engine
+        await prepare_database_async()
+        cached, cache_slot = _cache_lookup(query_cache, query, span)
+        if cached is not None:
+            return cached
+
+        # 1. Validate first
+        validation = await validate_sql_async(query)
+        if validation != "VALID":
+            span.set_status(Status(StatusCode.ERROR, validation))
+            return validation
+
+        # Aggregate side tables are small and DuckDB is embedded; both are only reachable synchronously
+        if await asyncio.to_thread(_runs_synchronously, query):
+            # Straight to execution: the cache lookup and validation above are not repeated
+            return await asyncio.to_thread(_execute_validated, query, span, cache_slot)
+
         # 2. Execute
-        session = get_session()
+        session = get_async_session()
+        budget = StatementBudget(get_statement_timeout())
         try:
-            print(f"\n--- EXECUTING SQL ---\n{query}\n---------------------\n")
-            result = session.execute(text(query))
-            
-            # 3. Format Results
-            keys = result.keys()
-            rows = result.fetchall()
-            
-            if not rows:
-                return "Query executed successfully but returned no results."
-                
-            # Return as a simple dictionary or formatted string
-            limited_rows = rows[:50]
-            data = [dict(zip(keys, row)) for row in limited_rows]
-            
-            output = f"Returned {len(limited_rows)} rows"
-            if len(rows) > 50:
-                output += " (truncated from total)."
-            output += ":\n" + str(data)
-            
-            # Add result summary to span
-            span.set_attribute("row_count", len(rows))
-            
+            # Cost estimation needs the sync engine; skip the thread hop when no limits apply
+            sql, note = query, None
+            if get_cost_limits() is not None:
+                error, sql, note = await asyncio.to_thread(_gate_query, query, span)
+                if error:
+                    span.set_status(Status(StatusCode.ERROR, error))
+                    return error
+
+            logger.debug(f"Executing SQL: {sql}")
+            # stream() uses a server-side cursor so only the preview rows are fetched
+            result = await session.stream(text(sql), execution_options={BUDGET_OPTION: budget})
+
+            # 3. Fetch only the preview (plus one row to detect truncation)
+            keys = list(result.keys())
+            rows = await result.fetchmany(MAX_RESULT_ROWS + 1)
+
+            total_rows, result_handle = len(rows), None
+            await result.close()
+            if total_rows > MAX_RESULT_ROWS:
+                try:
+                    total_rows = (await session.execute(text(_count_sql(sql)), execution_options={BUDGET_OPTION: budget})).scalar()
+                except Exception as count_err:
+                    logger.warning(f"Row count failed, reporting preview only: {count_err}")
+                    total_rows = None
+                db_id = resolve_database_id()
+                result_handle = _defer_result(keys, total_rows, _result_loader(db_id, sql, get_data_version(db_id)))
+
+            span.set_attribute("row_count", total_rows if total_rows is not None else len(rows))
+            span.set_attribute("row_count_exact", total_rows is not None)
+            span.set_attribute("result.spilled", result_handle is not None)
+
+            output = (note or "") + _format_results(keys, rows, total_rows, result_handle)
+            if cache_slot and result_handle is None:
+                query_cache.put(cache_slot[0], query, cache_slot[1], output)
             return output
 
         except Exception as e:
+            budget_error = budget.error_message()
+            if budget_error:
+                logger.warning(f"SQL Execution aborted ({budget.outcome}): {query}")
+                span.set_attribute("budget.outcome", budget.outcome)
+                span.set_status(Status(StatusCode.ERROR, budget_error))
+                return budget_error
             logger.error(f"SQL Execution failed: {e}")
             span.record_exception(e)
             span.set_status(Status(StatusCode.ERROR))
             return f"Database Error: {str(e)}"
         finally:
-            session.close()
+            await session.close()
+
+def _timed(fn, query: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    output = fn(query)
+    return output, (time.perf_counter() - start) * 1000
+
+def _submit(fn, query: str):
+    # Worker threads do not inherit ContextVars (active database, cancel event, current span)
+    return _batch_executor.submit(contextvars.copy_context().run, _timed, fn, query)
+
+def execute_sql_batch(queries: List[str]) -> str:
+    """
+    Executes several independent READ-ONLY SQL queries concurrently.
+    Use it instead of repeated execute_sql calls when a question needs more
+    than one query (e.g. "average budget by genre and count movies by rating").
+    Args:
+        queries: The SQL queries to execute (at most 8). They must not depend on each other.
+    Returns:
+        One section per query, in order, with its timing and its execute_sql output
+        (or its validation error).
+    """
+    tracer = trace.get_tracer(__name__)
+
+    with tracer.start_as_current_span("Tool: execute_sql_batch", attributes={"query_count": len(queries)}) as span:
+        if not queries:
+            return "Error: No SQL statement found."
+        if len(queries) > MAX_BATCH_QUERIES:
+            span.set_status(Status(StatusCode.ERROR, "batch too large"))
+            return f"Error: A batch can hold at most {MAX_BATCH_QUERIES} queries, got {len(queries)}."
+
+        start = time.perf_counter()
+        # 1. Validate the whole batch up front; execute_sql then hits the validation cache
+        validations = [f.result() for f in [_submit(validate_sql, q) for q in queries]]
+
+        # 2. Run the valid queries concurrently, each on its own session
+        futures = {i: _submit(execute_sql, q) for i, (q, (v, _)) in enumerate(zip(queries, validations)) if v == "VALID"}
+        results = [futures[i].result() if i in futures else validations[i] for i in range(len(queries))]
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        failed = sum(1 for output, _ in results if output.startswith(ERROR_PREFIXES))
+        span.set_attribute("failed_count", failed)
+        span.set_attribute("wall_ms", round(wall_ms, 1))
+        if failed:
+            span.set_status(Status(StatusCode.ERROR, f"{failed} of {len(queries)} queries failed"))
+
+        sections = [f"Batch of {len(queries)} queries ({failed} failed) in {wall_ms:.0f} ms."]
+        for i, (query, (output, elapsed_ms)) in enumerate(zip(queries, results), start=1):
+            sections.append(f"--- Query {i} ({elapsed_ms:.0f} ms) ---\n{query}\n{output}")
+        return "\n\n".join(sections)
+
+async def execute_sql_batch_async(queries: List[str]) -> str:
+    """
+    Executes several independent READ-ONLY SQL queries concurrently.
+    Use it instead of repeated execute_sql_async calls when a question needs more
+    than one query (e.g. "average budget by genre and count movies by rating").
+    Args:
+        queries: The SQL queries to execute (at most 8). They must not depend on each other.
+    Returns:
+        One section per query, in order, with its timing and its execute_sql output
+        (or its validation error).
+    """
+    # to_thread copies the context, so the batch sees the active database
+    return await asyncio.to_thread(execute_sql_batch, queries)
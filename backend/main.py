@@ -4,18 +4,33 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from typing import Literal
+from contextlib import asynccontextmanager
+import asyncio
 import logging
-import os
-import yaml
 
 from backend.core.agent_manager import agent_manager
 from backend.core.telemetry import setup_telemetry, instrument_adk_agents
+from backend.core.database import get_pool_status, prepare_database_async, resolve_database_id, database_context_var, get_engine, get_database_type
+from backend.core.export import stream_query, stream_table, EXPORT_MEDIA_TYPES
+from backend.core.result_store import result_store
+from backend.core.plan_advisor import plan_recorder, advise
+from backend.core.question_cache import question_cache
+from backend.core.tools.sql_tools import validate_sql_async
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Database Agentic System API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hot reload databases.yaml for the lifetime of the server
+    watch_task = asyncio.create_task(agent_manager.config_watcher.watch())
+    # Aggregates are materialized in the background on each database's first query
+    yield
+    watch_task.cancel()
+
+app = FastAPI(title="Database Agentic System API", lifespan=lifespan)
 setup_telemetry(app)
 instrument_adk_agents()
 
@@ -33,40 +48,102 @@ class ChatRequest(BaseModel):
     message: str
     database_id: str = "flights"
 
+class ExportRequest(BaseModel):
+    query: str
+    format: Literal["ndjson", "arrow"] = "ndjson"
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 @app.get("/databases")
 async def list_databases():
-    """Returns the list of available databases."""
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_path = os.path.join(base_dir, "data", "databases.yaml")
-    
-    print(f"DEBUG: resolving databases from {config_path}")
-    
-    if os.path.exists(config_path):
+    """Returns the list of available databases (reflects hot reloads of databases.yaml)."""
+    # Pick up a just-edited databases.yaml without waiting for the next poll
+    agent_manager.config_watcher.check()
+    agent_manager.config_watcher.drain_retired()
+    return agent_manager.config_watcher.list_databases()
+
+@app.get("/databases/{database_id}/pool")
+async def database_pool_status(database_id: str):
+    """Returns live connection pool statistics for a database."""
+    try:
+        return get_pool_status(database_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/databases/{database_id}/question-cache")
+async def question_cache_status(database_id: str):
+    """Returns size and hit-rate statistics of a database's question-to-SQL cache."""
+    if resolve_database_id(database_id) != database_id:
+        raise HTTPException(status_code=404, detail=f"Database ID '{database_id}' not registered.")
+    return {"database_id": database_id, **question_cache.stats(database_id)}
+
+@app.get("/databases/{database_id}/query-plans")
+async def query_plan_report(database_id: str):
+    """
+    Recorded query plans of a database grouped by fingerprint, with full scans of
+    large tables flagged and recommended indexes. The "queries" list is the workload
+    file expected by backend/scripts/index_advisor.py.
+    """
+    if resolve_database_id(database_id) != database_id:
+        raise HTTPException(status_code=404, detail=f"Database ID '{database_id}' not registered.")
+    if get_database_type(database_id) != "sqlite":
+        raise HTTPException(status_code=400, detail="Query plan analysis is only available for SQLite databases.")
+    engine = get_engine(database_id)
+
+    def analyze():
+        conn = engine.raw_connection()
         try:
-            with open(config_path, "r") as f:
-                config = yaml.safe_load(f)
-                # Return only public info (hide schema path or connection string if sensitive, 
-                # but for this internal tool it's likely fine to return name/id).
-                # Let's filter to be safe/clean.
-                dbs = []
-                for db in config.get("databases", []):
-                    dbs.append({
-                        "id": db["id"],
-                        "name": db["name"],
-                        "type": db["type"]
-                    })
-                print(f"DEBUG: found {len(dbs)} databases")
-                return dbs
-        except Exception as e:
-            logger.error(f"Error reading databases.yaml: {e}")
-            raise HTTPException(status_code=500, detail="Configuration error")
-    
-    print("DEBUG: databases.yaml not found")
-    return []
+            return advise(conn.driver_connection, plan_recorder.workload(database_id))
+        finally:
+            conn.close()
+
+    report = await asyncio.to_thread(analyze)
+    return {"database_id": database_id, **report}
+
+@app.post("/databases/{database_id}/export")
+async def export_query(database_id: str, request: ExportRequest):
+    """
+    Streams the full result of a read-only query as NDJSON or an Arrow IPC stream.
+    The query goes through the same validation as the agent's execute_sql.
+    """
+    if resolve_database_id(database_id) != database_id:
+        raise HTTPException(status_code=404, detail=f"Database ID '{database_id}' not registered.")
+    await prepare_database_async(database_id)
+    if get_database_type(database_id) == "duckdb":
+        raise HTTPException(status_code=400, detail="Export is not available for DuckDB databases.")
+
+    token = database_context_var.set(database_id)
+    try:
+        validation = await validate_sql_async(request.query)
+    finally:
+        database_context_var.reset(token)
+    if validation != "VALID":
+        raise HTTPException(status_code=400, detail=validation)
+
+    extension = "arrows" if request.format == "arrow" else "ndjson"
+    return StreamingResponse(
+        stream_query(request.query, database_id, request.format),
+        media_type=EXPORT_MEDIA_TYPES[request.format],
+        headers={"Content-Disposition": f'attachment; filename="{database_id}-export.{extension}"'},
+    )
+
+@app.get("/results/{result_handle}/export")
+async def export_result(result_handle: str, format: Literal["ndjson", "arrow"] = "ndjson"):
+    """Streams a spilled query result (see execute_sql's result_handle) from its memory-mapped file."""
+    try:
+        # The first open of a handle runs its query into the spill file
+        table = await asyncio.to_thread(result_store.open_table, result_handle)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+    extension = "arrows" if format == "arrow" else "ndjson"
+    return StreamingResponse(
+        stream_table(table, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{result_handle}.{extension}"'},
+    )
 
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
@@ -0,0 +1,171 @@
+"""
+SQLite vs DuckDB benchmark for analytical queries.
+
+Builds scaled-up copies of data/movies.db (movies and movie_actors repeated
+--scale times) and data/flights.db (flights repeated --scale * 1000 times),
+then runs an analytical query mix on each engine:
+
+  sqlite       the file through sqlite3 (what `type: sqlite` databases use)
+  duckdb copy  the tables loaded into DuckDB (attach_mode: copy)
+  duckdb scan  the file attached through DuckDB's sqlite extension
+               (attach_mode: scan; skipped when the extension cannot be loaded)
+
+Each query runs --repeat times per engine; the median is reported.
+
+Usage:
+    python backend/scripts/benchmark_duckdb.py
+    python backend/scripts/benchmark_duckdb.py --scale 40 --repeat 5
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core.duckdb_database import DuckDBDatabase
+
+DATASETS = {
+    "movies": {
+        "source": "data/movies.db",
+        # table -> (key column, {other tables whose column references the key})
+        "scale": {"movies": ("id", {"movie_actors": "movie_id"})},
+        "factor": 1,
+        "queries": {
+            "gross by genre": (
+                "SELECT major_genre, COUNT(*), SUM(worldwide_gross), AVG(production_budget), AVG(imdb_rating) "
+                "FROM movies GROUP BY major_genre"
+            ),
+            "roi by rating": (
+                "SELECT mpaa_rating, AVG(CAST(worldwide_gross AS REAL) / production_budget) FROM movies "
+                "WHERE production_budget > 0 GROUP BY mpaa_rating"
+            ),
+            "top directors by gross": (
+                "SELECT d.name, SUM(m.worldwide_gross) AS gross FROM movies m JOIN directors d ON d.id = m.director_id "
+                "GROUP BY d.name ORDER BY gross DESC LIMIT 10"
+            ),
+            "actor gross": (
+                "SELECT a.name, SUM(m.worldwide_gross) AS gross FROM movie_actors ma "
+                "JOIN movies m ON m.id = ma.movie_id JOIN actors a ON a.id = ma.actor_id "
+                "GROUP BY a.name ORDER BY gross DESC LIMIT 10"
+            ),
+            "cast size by genre": (
+                "SELECT m.major_genre, COUNT(*) * 1.0 / COUNT(DISTINCT m.id) FROM movies m "
+                "JOIN movie_actors ma ON ma.movie_id = m.id GROUP BY m.major_genre"
+            ),
+        },
+    },
+    "flights": {
+        "source": "data/flights.db",
+        "scale": {"flights": ("id", {})},
+        "factor": 1000,
+        "queries": {
+            "flights per route": "SELECT origin, destination, COUNT(*) FROM flights GROUP BY origin, destination",
+            "seats by origin": (
+                "SELECT f.origin, SUM(p.capacity) FROM flights f JOIN planes p ON p.id = f.plane_id GROUP BY f.origin"
+            ),
+            "pilot activity": (
+                "SELECT pi.name, COUNT(*), COUNT(DISTINCT f.destination) FROM flights f "
+                "JOIN pilots pi ON pi.id = f.pilot_id GROUP BY pi.name"
+            ),
+        },
+    },
+}
+
+def build_copy(dataset, target, scale):
+    src = sqlite3.connect(f"file:{dataset['source']}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    src.backup(dst)
+    src.close()
+    copies = scale * dataset["factor"]
+    # Offsets 1 .. copies - 1, so ids stay unique across the copies
+    offsets = f"(WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < {copies - 1}) SELECT i FROM r) n"
+    for table, (key, children) in dataset["scale"].items():
+        if copies <= 1:
+            break
+        max_id = dst.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0]
+        # Children first, while the parent table still only holds the original ids
+        for child, column in children.items():
+            other = [row[1] for row in dst.execute(f"PRAGMA table_info({child})") if row[1] != column]
+            dst.execute(
+                f"INSERT INTO {child} ({column}, {', '.join(other)}) "
+                f"SELECT {column} + n.i * {max_id}, {', '.join(other)} FROM {child}, {offsets}"
+            )
+        other = [row[1] for row in dst.execute(f"PRAGMA table_info({table})") if row[1] != key]
+        dst.execute(
+            f"INSERT INTO {table} ({key}, {', '.join(other)}) "
+            f"SELECT {key} + n.i * {max_id}, {', '.join(other)} FROM {table}, {offsets}"
+        )
+    dst.commit()
+    scaled = [t for table, (_, children) in dataset["scale"].items() for t in (table, *children)]
+    rows = {t: dst.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in scaled}
+    dst.execute("VACUUM")
+    dst.close()
+    return rows
+
+def time_queries(execute, queries, repeat):
+    timings = {}
+    for name, query in queries.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            execute(query)
+            runs.append((time.perf_counter() - start) * 1000)
+        timings[name] = statistics.median(runs)
+    return timings
+
+def bench_dataset(name, dataset, workdir, scale, repeat):
+    path = os.path.join(workdir, f"{name}.db")
+    rows = build_copy(dataset, path, scale)
+    print(f"== {name}: {os.path.getsize(path) / 1024 / 1024:.1f} MB, " + ", ".join(f"{t} {n:,} rows" for t, n in rows.items()))
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    results = {"sqlite": time_queries(lambda q: conn.execute(q).fetchall(), dataset["queries"], repeat)}
+    conn.close()
+
+    for mode in ("copy", "scan"):
+        start = time.perf_counter()
+        database = DuckDBDatabase(name, attach=path, attach_mode=mode)
+        load_ms = (time.perf_counter() - start) * 1000
+        if database.mode != mode:
+            print(f"   duckdb {mode}: skipped (sqlite extension unavailable)")
+            continue
+        print(f"   duckdb {mode}: opened in {load_ms:.0f} ms")
+        cursor = database.cursor()
+        results[f"duckdb {mode}"] = time_queries(lambda q: cursor.execute(q).fetchall(), dataset["queries"], repeat)
+        cursor.close()
+
+    engines = list(results)
+    width = max(len(q) for q in dataset["queries"])
+    header = f"{'query (ms)':<{width}} | " + " | ".join(f"{e:>12}" for e in engines)
+    print(header)
+    print("-" * len(header))
+    for query in dataset["queries"]:
+        print(f"{query:<{width}} | " + " | ".join(f"{results[e][query]:>12.2f}" for e in engines))
+    totals = {e: sum(results[e].values()) for e in engines}
+    print("-" * len(header))
+    print(f"{'total':<{width}} | " + " | ".join(f"{totals[e]:>12.2f}" for e in engines))
+    print(f"{'vs sqlite':<{width}} | " + " | ".join(f"{totals['sqlite'] / totals[e]:>11.2f}x" for e in engines))
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=20, help="scale factor for the datasets")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query and engine")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), action="append", help="dataset(s) to run (default: all)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="duckdb_bench_")
+    try:
+        for name in args.dataset or DATASETS:
+            bench_dataset(name, DATASETS[name], workdir, args.scale, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
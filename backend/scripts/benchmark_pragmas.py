@@ -0,0 +1,152 @@
+"""
+SQLite PRAGMA profile benchmark for read-mostly workloads.
+
+Runs a fixed query mix against a copy of data/movies.db under several
+`pragmas` profiles (the databases.yaml section) and reports, per profile,
+the first pass on a fresh connection (empty page cache, as after a pool
+recycle) and the median of the warm passes.
+
+movies.db (~1.4 MB) fits in SQLite's default 2 MB page cache, so --scale N
+builds a copy with the movies and movie_actors tables repeated N times to
+see how the profiles behave once the data outgrows the cache.
+
+Usage:
+    python backend/scripts/benchmark_pragmas.py
+    python backend/scripts/benchmark_pragmas.py --scale 40 --connections 4 --repeat 5
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core.pragmas import SqlitePragmas
+
+SOURCE_DB = "data/movies.db"
+
+PROFILES = {
+    "default": SqlitePragmas(),
+    "mmap 256MB": SqlitePragmas(mmap_size=256 * 1024 * 1024),
+    "cache 64MB": SqlitePragmas(cache_size=-64 * 1024),
+    "temp_store memory": SqlitePragmas(temp_store="memory"),
+    "all of the above": SqlitePragmas(mmap_size=256 * 1024 * 1024, cache_size=-64 * 1024, temp_store="memory", query_only=True),
+    # The profile databases.yaml ships with
+    "mmap + query_only": SqlitePragmas(mmap_size=256 * 1024 * 1024, query_only=True),
+}
+
+QUERY_MIX = {
+    "genre stats": "SELECT major_genre, COUNT(*), AVG(imdb_rating), SUM(worldwide_gross) FROM movies GROUP BY major_genre",
+    "top grossing + director": (
+        "SELECT m.title, d.name, m.worldwide_gross FROM movies m JOIN directors d ON d.id = m.director_id "
+        "ORDER BY m.worldwide_gross DESC LIMIT 20"
+    ),
+    "busiest actors": (
+        "SELECT a.name, COUNT(*) AS n FROM movie_actors ma JOIN actors a ON a.id = ma.actor_id "
+        "GROUP BY a.name ORDER BY n DESC LIMIT 20"
+    ),
+    "title search": "SELECT title, release_date FROM movies WHERE title LIKE '%star%'",
+    "distinct actors": "SELECT COUNT(DISTINCT actor_id) FROM movie_actors",
+    "cast sizes by genre": (
+        "SELECT m.major_genre, COUNT(*) * 1.0 / COUNT(DISTINCT m.id) FROM movies m "
+        "JOIN movie_actors ma ON ma.movie_id = m.id GROUP BY m.major_genre"
+    ),
+}
+
+def build_copy(target, scale):
+    src = sqlite3.connect(f"file:{SOURCE_DB}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    src.backup(dst)
+    src.close()
+    if scale > 1:
+        max_id = dst.execute("SELECT MAX(id) FROM movies").fetchone()[0]
+        columns = [row[1] for row in dst.execute("PRAGMA table_info(movies)") if row[1] != "id"]
+        for i in range(1, scale):
+            offset = i * max_id
+            dst.execute(
+                f"INSERT INTO movies (id, {', '.join(columns)}) SELECT id + {offset}, {', '.join(columns)} "
+                f"FROM movies WHERE id <= {max_id}"
+            )
+            dst.execute(f"INSERT INTO movie_actors SELECT movie_id + {offset}, actor_id FROM movie_actors WHERE movie_id <= {max_id}")
+        dst.commit()
+    dst.execute("VACUUM")
+    dst.close()
+    return os.path.getsize(target)
+
+def run_mix(conn):
+    timings = {}
+    for name, query in QUERY_MIX.items():
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+def bench_connection(path, pragmas, repeat):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for statement in pragmas.statements():
+            conn.execute(statement).fetchall()
+        return run_mix(conn), [run_mix(conn) for _ in range(repeat)]
+    finally:
+        conn.close()
+
+def bench_profiles(path, connections, repeat):
+    """Per profile: (median first pass, median warm pass) per query."""
+    first = {name: [] for name in PROFILES}
+    warm = {name: [] for name in PROFILES}
+    names = list(PROFILES)
+    for round_ in range(connections):
+        # Rotate the order every round so machine drift does not favour one profile
+        for name in names[round_ % len(names):] + names[:round_ % len(names)]:
+            cold, passes = bench_connection(path, PROFILES[name], repeat)
+            first[name].append(cold)
+            warm[name].extend(passes)
+    median = lambda runs, query: statistics.median(r[query] for r in runs)
+    return {
+        name: ({q: median(first[name], q) for q in QUERY_MIX}, {q: median(warm[name], q) for q in QUERY_MIX})
+        for name in PROFILES
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="repeat movies/movie_actors N times")
+    parser.add_argument("--connections", type=int, default=5, help="fresh connections per profile")
+    parser.add_argument("--repeat", type=int, default=5, help="warm passes per connection")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pragma_bench_")
+    try:
+        path = os.path.join(workdir, "movies.db")
+        size = build_copy(path, args.scale)
+        print(f"Database copy: {size / 1024 / 1024:.1f} MB (scale {args.scale}), "
+              f"{args.connections} connections x (1 cold + {args.repeat} warm) passes per profile\n")
+
+        # Warm the OS page cache so profiles are compared on SQLite-side effects only
+        bench_connection(path, SqlitePragmas(), 1)
+
+        results = bench_profiles(path, args.connections, args.repeat)
+
+        width = max(len(q) for q in QUERY_MIX)
+        for label, index in (("first pass on a fresh connection (ms)", 0), ("warm passes, median (ms)", 1)):
+            print(label)
+            header = f"{'query':<{width}} | " + " | ".join(f"{p:>17}" for p in PROFILES)
+            print(header)
+            print("-" * len(header))
+            for query in QUERY_MIX:
+                print(f"{query:<{width}} | " + " | ".join(f"{results[p][index][query]:>17.2f}" for p in PROFILES))
+            totals = {p: sum(results[p][index].values()) for p in PROFILES}
+            print("-" * len(header))
+            print(f"{'total':<{width}} | " + " | ".join(f"{totals[p]:>17.2f}" for p in PROFILES))
+            baseline = totals["default"]
+            print(f"{'vs default':<{width}} | " + " | ".join(f"{baseline / totals[p]:>16.2f}x" for p in PROFILES))
+            print()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
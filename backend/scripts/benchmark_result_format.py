@@ -0,0 +1,75 @@
+"""
+Payload benchmark: legacy list-of-dicts vs compact columnar result encoding.
+
+Runs typical agent queries against data/movies.db, encodes the preview rows
+(MAX_RESULT_ROWS) both ways and reports characters, an approximate LLM
+token count and encoding time.
+
+Token counts are approximations (no tokenizer ships with the repo): the
+larger of chars/4 and the number of word/punctuation pieces.
+
+Usage:
+    python backend/scripts/benchmark_result_format.py
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core.result_format import encode_columnar, encode_records
+from backend.core.tools.sql_tools import MAX_RESULT_ROWS
+
+DB_PATH = os.path.join("data", "movies.db")
+
+QUERIES = {
+    "movies per genre": "SELECT major_genre, COUNT(*) AS movie_count FROM movies GROUP BY major_genre",
+    "avg budget by rating": "SELECT mpaa_rating, AVG(production_budget) AS avg_budget, AVG(worldwide_gross) AS avg_gross FROM movies GROUP BY mpaa_rating",
+    "top grossing movies": "SELECT title, production_budget, worldwide_gross, imdb_rating FROM movies ORDER BY worldwide_gross DESC",
+    "movie listing": "SELECT id, title, release_date, mpaa_rating, distributor, major_genre, imdb_rating FROM movies",
+    "actors per movie": "SELECT m.title, COUNT(ma.actor_id) AS actor_count FROM movies m JOIN movie_actors ma ON ma.movie_id = m.id GROUP BY m.id ORDER BY actor_count DESC",
+}
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def approx_tokens(text):
+    return max(len(text) // 4, len(TOKEN_PATTERN.findall(text)))
+
+def measure(encoder, keys, rows, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = encoder(keys, rows)
+    elapsed_us = (time.perf_counter() - start) / repeat * 1e6
+    return payload, elapsed_us
+
+def main():
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    header = f"{'query':<22} {'rows':>4} | {'records chars':>13} {'tokens':>7} {'us':>7} | {'columnar chars':>14} {'tokens':>7} {'us':>7} | {'saved':>6}"
+    print(header)
+    print("-" * len(header))
+
+    totals = [0, 0, 0, 0]
+    for name, query in QUERIES.items():
+        cursor = conn.execute(query)
+        keys = [d[0] for d in cursor.description]
+        rows = cursor.fetchmany(MAX_RESULT_ROWS)
+
+        records, records_us = measure(encode_records, keys, rows)
+        columnar, columnar_us = measure(encode_columnar, keys, rows)
+        r_tokens, c_tokens = approx_tokens(records), approx_tokens(columnar)
+        totals[0] += len(records)
+        totals[1] += r_tokens
+        totals[2] += len(columnar)
+        totals[3] += c_tokens
+
+        print(f"{name:<22} {len(rows):>4} | {len(records):>13} {r_tokens:>7} {records_us:>7.0f} | "
+              f"{len(columnar):>14} {c_tokens:>7} {columnar_us:>7.0f} | {1 - c_tokens / r_tokens:>6.0%}")
+
+    print("-" * len(header))
+    print(f"{'total':<22} {'':>4} | {totals[0]:>13} {totals[1]:>7} {'':>7} | {totals[2]:>14} {totals[3]:>7} {'':>7} | {1 - totals[3] / totals[1]:>6.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Startup-time benchmark: eager vs lazy database/schema registration.
+
+Simulates N tenant databases (each with its own schema file) and measures
+how long AgentManager-style initialization takes with the old eager
+registration versus lazy declaration, plus first-use cost with and
+without the compiled schema cache.
+
+Usage:
+    python backend/scripts/benchmark_startup.py --tenants 200
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core import database
+from backend.core.database import register_database, register_async_database, declare_database, get_engine
+from backend.core.schema_parser import SchemaParser
+from backend.core.schema_registry import schema_registry
+
+SOURCE_SCHEMA = os.path.join("data", "movies_schema.yaml")
+CONNECTION_STRING = "sqlite:///data/movies.db"
+
+def reset_registries():
+    database._engines.clear()
+    database._session_makers.clear()
+    database._async_engines.clear()
+    database._async_session_makers.clear()
+    database._database_specs.clear()
+    schema_registry._schemas.clear()
+    schema_registry._schema_files.clear()
+
+def make_tenants(work_dir, count):
+    tenants = []
+    for i in range(count):
+        schema_file = os.path.join(work_dir, f"tenant_{i}_schema.yaml")
+        shutil.copy(SOURCE_SCHEMA, schema_file)
+        tenants.append((f"tenant_{i}", schema_file))
+    return tenants
+
+def eager_startup(tenants):
+    for db_id, schema_file in tenants:
+        register_database(db_id, CONNECTION_STRING)
+        register_async_database(db_id, CONNECTION_STRING)
+        schema_registry.load_schema(db_id, SchemaParser.parse_yaml(schema_file))
+
+def lazy_startup(tenants):
+    for db_id, schema_file in tenants:
+        declare_database(db_id, CONNECTION_STRING)
+        schema_registry.declare_schema(db_id, schema_file)
+
+def first_use(tenants):
+    for db_id, _ in tenants:
+        get_engine(db_id)
+        schema_registry.get_tables(db_id)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs lazy database registration.")
+    parser.add_argument("--tenants", type=int, default=200, help="Number of simulated tenant databases.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="dbagent_startup_")
+    os.environ["SCHEMA_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    try:
+        tenants = make_tenants(work_dir, args.tenants)
+
+        reset_registries()
+        eager_ms = timed(eager_startup, tenants)
+
+        reset_registries()
+        lazy_ms = timed(lazy_startup, tenants)
+        cold_use_ms = timed(first_use, tenants)
+
+        # Second boot: the compiled schema cache is now warm
+        reset_registries()
+        lazy_startup(tenants)
+        warm_use_ms = timed(first_use, tenants)
+
+        print(f"Tenants: {args.tenants}")
+        print(f"Eager startup:                     {eager_ms:10.1f} ms")
+        print(f"Lazy startup:                      {lazy_ms:10.1f} ms  ({eager_ms / max(lazy_ms, 1e-6):.0f}x faster)")
+        print(f"First use of all DBs (cold cache): {cold_use_ms:10.1f} ms")
+        print(f"First use of all DBs (warm cache): {warm_use_ms:10.1f} ms")
+    finally:
+        reset_registries()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Per-delegation overhead of the router's sub-agent runs.
+
+Runs delegations against a stub model that answers instantly, so the
+timings are the framework overhead only:
+
+  rebuilt  agent, Runner and InMemorySessionService built for every
+           delegation (the previous run_sub_agent)
+  pooled   run_sub_agent on the SubAgentRunnerPool (runner built once,
+           one session per delegation)
+
+for the SchemaExplorer agent and the four-agent SqlSequenceWorkflow.
+
+Usage:
+    python backend/scripts/benchmark_sub_agents.py
+    python backend/scripts/benchmark_sub_agents.py --delegations 500
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import AsyncGenerator
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from opentelemetry import trace
+from backend.agents.adk.router import run_sub_agent
+from backend.agents.adk.schema import create_schema_agent
+from backend.agents.adk.sql_sequence import create_sql_sequence_agent
+from backend.core.tools.format_tools import ensure_chart_tags
+
+STUB_MODEL = "stub-instant"
+
+class InstantLlm(BaseLlm):
+    """Answers every request with a fixed text and no tool calls."""
+
+    @classmethod
+    def supported_models(cls):
+        return [r"stub-.*"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+LLMRegistry.register(InstantLlm)
+
+SUB_AGENTS = {
+    "SchemaExplorer": create_schema_agent,
+    "SqlSequenceWorkflow": create_sql_sequence_agent,
+}
+
+def build_runner(agent_creator, app_name: str) -> Runner:
+    return Runner(
+        agent=agent_creator(STUB_MODEL),
+        session_service=InMemorySessionService(),
+        app_name=app_name,
+        auto_create_session=True
+    )
+
+async def rebuilt_delegation(agent_creator, query: str, app_name: str) -> str:
+    with trace.get_tracer(__name__).start_as_current_span(f"SubAgent: {app_name}", attributes={"query": query}):
+        runner = build_runner(agent_creator, app_name)
+        user_msg = types.Content(role="user", parts=[types.Part(text=query)])
+        text = ""
+        async for event in runner.run_async(new_message=user_msg, user_id="router_delegate", session_id="ephemeral_session"):
+            if event.content and event.content.parts:
+                text += "".join(part.text or "" for part in event.content.parts)
+        return ensure_chart_tags(text)
+
+async def pooled_delegation(agent_creator, query: str, app_name: str) -> str:
+    return await run_sub_agent(agent_creator, query, app_name, model_name=STUB_MODEL)
+
+async def bench(delegate, agent_creator, app_name, delegations):
+    timings = []
+    for i in range(delegations):
+        start = time.perf_counter()
+        await delegate(agent_creator, f"question {i}", app_name)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def build_cost_ms(agent_creator, builds: int = 500) -> float:
+    start = time.perf_counter()
+    for _ in range(builds):
+        build_runner(agent_creator, "BuildCost")
+    return (time.perf_counter() - start) * 1000 / builds
+
+async def main_async(delegations: int, concurrency: int):
+    print("Building agent + Runner + session service (what pooling saves per delegation):")
+    for name, creator in SUB_AGENTS.items():
+        print(f"  {name:<20} {build_cost_ms(creator):.3f} ms")
+    print(f"\n{delegations} delegations per sub-agent and variant, stub model '{STUB_MODEL}'\n")
+    header = f"{'sub-agent':<20} | {'variant':<8} | {'median ms':>9} | {'p95 ms':>8} | {'first ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, creator in SUB_AGENTS.items():
+        medians = {}
+        for variant, delegate in (("rebuilt", rebuilt_delegation), ("pooled", pooled_delegation)):
+            timings = await bench(delegate, creator, f"{name}Bench", delegations)
+            # The first pooled delegation builds the runner
+            steady = timings[1:] or timings
+            medians[variant] = statistics.median(steady)
+            p95 = statistics.quantiles(steady, n=20)[-1] if len(steady) >= 20 else max(steady)
+            print(f"{name:<20} | {variant:<8} | {medians[variant]:>9.3f} | {p95:>8.3f} | {timings[0]:>8.3f}")
+        print(f"{'':<20} | {'speedup':<8} | {medians['rebuilt'] / medians['pooled']:>8.2f}x |")
+
+    # Throughput with overlapping delegations (as when several chats delegate at once)
+    print(f"\n{concurrency} concurrent SqlSequenceWorkflow delegations x {delegations // concurrency or 1} rounds")
+    for variant, delegate in (("rebuilt", rebuilt_delegation), ("pooled", pooled_delegation)):
+        start = time.perf_counter()
+        for r in range(delegations // concurrency or 1):
+            await asyncio.gather(*[delegate(create_sql_sequence_agent, f"q{r}.{i}", "SqlSequenceWorkflowBench") for i in range(concurrency)])
+        elapsed = time.perf_counter() - start
+        print(f"  {variant:<8} {delegations / elapsed:>8.0f} delegations/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delegations", type=int, default=200, help="delegations per sub-agent and variant")
+    parser.add_argument("--concurrency", type=int, default=8, help="delegations in flight for the throughput run")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.delegations, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Validation latency benchmark: sqlparse keyword walk vs SQLite authorizer.
+
+Generates large read-only queries against data/movies.db and times the
+uncached validation path (_run_validation) in two setups:
+  before: plain engine, keyword walk + EXPLAIN QUERY PLAN
+  after:  read-only engine (authorizer installed), EXPLAIN QUERY PLAN only
+
+Usage:
+    python backend/scripts/benchmark_validation.py
+"""
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core.database import register_database, database_context_var
+from backend.core.tools import sql_tools
+
+DB_URL = "sqlite:///data/movies.db"
+
+def wide_select(n):
+    columns = ", ".join(f"ROUND(imdb_rating * {i}, 2) AS c{i}" for i in range(n))
+    return f"SELECT {columns} FROM movies WHERE imdb_rating > 5"
+
+def in_list(n):
+    ids = ", ".join(str(i) for i in range(n))
+    return f"SELECT title, worldwide_gross FROM movies WHERE id IN ({ids}) ORDER BY worldwide_gross DESC"
+
+def union_all(n):
+    branch = "SELECT major_genre, COUNT(*) AS n FROM movies WHERE mpaa_rating = 'R{i}' AND title NOT LIKE '%update%' GROUP BY major_genre"
+    return " UNION ALL ".join(branch.format(i=i) for i in range(n))
+
+def case_ladder(n):
+    cases = " ".join(f"WHEN production_budget < {i * 1000000} THEN 'tier {i}'" for i in range(1, n + 1))
+    return f"SELECT title, CASE {cases} ELSE 'blockbuster' END AS tier FROM movies"
+
+QUERIES = {
+    "wide select (300 cols)": wide_select(300),
+    "IN list (5000 ids)": in_list(5000),
+    "UNION ALL (100 branches)": union_all(100),
+    "CASE ladder (500 arms)": case_ladder(500),
+}
+
+def measure(query, repeat):
+    try:
+        outcome = sql_tools._run_validation(query)
+    except Exception as e:
+        # e.g. sqlparse's token limit on very long queries
+        return f"{type(e).__name__}: {e}", None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        sql_tools._run_validation(query)
+    return outcome, (time.perf_counter() - start) / repeat * 1000
+
+def main(repeat=20):
+    register_database("bench_plain", DB_URL)
+    register_database("bench_guarded", DB_URL, read_only=True)
+
+    header = f"{'query':<26} {'chars':>7} | {'before ms':>9} {'after ms':>9} | {'speedup':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, query in QUERIES.items():
+        token = database_context_var.set("bench_plain")
+        sql_tools.KEYWORD_CHECK = "always"
+        before_outcome, before_ms = measure(query, repeat)
+        database_context_var.reset(token)
+
+        token = database_context_var.set("bench_guarded")
+        sql_tools.KEYWORD_CHECK = "auto"
+        after_outcome, after_ms = measure(query, repeat)
+        database_context_var.reset(token)
+
+        assert after_outcome == "VALID", after_outcome
+        if before_ms is None:
+            print(f"{name:<26} {len(query):>7} | {'failed':>9} {after_ms:>9.2f} | {'n/a':>7}   ({before_outcome})")
+            continue
+        print(f"{name:<26} {len(query):>7} | {before_ms:>9.2f} {after_ms:>9.2f} | {before_ms / after_ms:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
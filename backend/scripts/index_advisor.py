@@ -0,0 +1,112 @@
+"""
+Index advisor: builds recommended indexes on a copy of a SQLite database and
+benchmarks a recorded workload before and after.
+
+The workload is either the JSON report of GET /databases/{id}/query-plans
+(its "queries" list, as recorded from agent traffic) or a plain SQL file with
+one statement per ";". The original database is never modified; the
+recommended CREATE INDEX statements are printed for review.
+
+Usage:
+    curl -s localhost:8000/databases/movies/query-plans > workload.json
+    python backend/scripts/index_advisor.py data/movies.db --workload workload.json
+    python backend/scripts/index_advisor.py data/movies.db --queries queries.sql --keep /tmp/movies_indexed.db
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.core.plan_advisor import advise
+
+def load_workload(args):
+    if args.workload:
+        with open(args.workload) as f:
+            data = json.load(f)
+        items = data["queries"] if isinstance(data, dict) else data
+        return [{"query": i["query"], "count": i.get("count", 1)} for i in items]
+    with open(args.queries) as f:
+        statements = [s.strip() for s in f.read().split(";")]
+    return [{"query": s, "count": 1} for s in statements if s]
+
+def copy_database(source, target):
+    # The backup API gives a consistent copy even while the server is writing
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    src.backup(dst)
+    src.close()
+    return dst
+
+def time_query(conn, query, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def run_workload(conn, workload, repeat):
+    return [time_query(conn, item["query"], repeat) for item in workload]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", help="SQLite database file")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--workload", help="JSON workload (query-plans report or list of {query, count})")
+    source.add_argument("--queries", help="SQL file, statements separated by ';'")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (median is reported)")
+    parser.add_argument("--keep", help="keep the indexed copy at this path")
+    args = parser.parse_args()
+
+    workload = load_workload(args)
+    workdir = tempfile.mkdtemp(prefix="index_advisor_")
+    copy_path = os.path.join(workdir, os.path.basename(args.database))
+    conn = copy_database(args.database, copy_path)
+    try:
+        before = run_workload(conn, workload, args.repeat)
+
+        report = advise(conn, workload)
+        recommendations = report["recommendations"]
+        print(f"{len(workload)} queries, {sum(1 for q in report['queries'] if q['full_scans'])} with full scans of large tables")
+        print(f"{len(recommendations)} recommended indexes:")
+        for rec in recommendations:
+            print(f"  {rec['sql']};  -- queries: {len(rec['queries'])}, weight: {rec['weight']}")
+        if not recommendations:
+            return
+
+        for rec in recommendations:
+            conn.execute(rec["sql"])
+        conn.execute("ANALYZE")
+        conn.commit()
+        after = run_workload(conn, workload, args.repeat)
+
+        print()
+        header = f"{'#':>3} {'count':>5} | {'before ms':>9} {'after ms':>9} {'speedup':>7} | query"
+        print(header)
+        print("-" * len(header))
+        for i, (item, b, a) in enumerate(zip(workload, before, after), start=1):
+            query = " ".join(item["query"].split())
+            print(f"{i:>3} {item['count']:>5} | {b:>9.2f} {a:>9.2f} {b / a if a else 0:>6.1f}x | {query[:70]}")
+        total_before = sum(b * item["count"] for item, b in zip(workload, before))
+        total_after = sum(a * item["count"] for item, a in zip(workload, after))
+        print("-" * len(header))
+        print(f"weighted workload: {total_before:.1f} ms -> {total_after:.1f} ms ({total_before / total_after:.1f}x)")
+
+        if args.keep:
+            conn.close()
+            shutil.copy(copy_path, args.keep)
+            print(f"Indexed copy written to {args.keep}")
+    finally:
+        conn.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
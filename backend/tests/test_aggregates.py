@@ -0,0 +1,118 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import time
+from sqlalchemy import text
+from backend.core.aggregates import AggregateDefinition, AggregateStore, rewrite_for_aggregate
+from backend.core.database import register_database, register_async_database, get_engine, database_context_var
+from backend.core.query_cache import query_cache
+from backend.core.tools import sql_tools
+from backend.core.tools.sql_tools import execute_sql, execute_sql_async
+
+GENRES = AggregateDefinition(
+    name="films_by_genre", table="films", group_by=["genre"],
+    measures={"film_count": "COUNT(*)", "avg_rating": "AVG(rating)"},
+)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def films_db(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'films.db'}"
+    register_database("agg_films", url)
+    register_async_database("agg_films", url)
+    with get_engine("agg_films").begin() as conn:
+        conn.execute(text("CREATE TABLE films (id INTEGER PRIMARY KEY, title TEXT, genre TEXT, rating REAL)"))
+        conn.execute(text(
+            "INSERT INTO films (title, genre, rating) VALUES "
+            "('a', 'Drama', 8), ('b', 'Drama', 6), ('c', 'Comedy', 7), ('d', NULL, 5)"
+        ))
+    store = AggregateStore(base_dir=str(tmp_path / "aggregates"))
+    store.configure("agg_films", [GENRES])
+    monkeypatch.setattr(sql_tools, "aggregate_store", store)
+    query_cache.invalidate("agg_films")
+    token = database_context_var.set("agg_films")
+    yield store
+    database_context_var.reset(token)
+    store.drop("agg_films")
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT genre, COUNT(*) AS n FROM films GROUP BY genre",
+     "SELECT genre, film_count AS n FROM agg_films_by_genre"),
+    ("select f.Genre, count( * ) from films f group by f.genre order by count(*) desc limit 5;",
+     'SELECT Genre, film_count AS "count( * )" FROM agg_films_by_genre ORDER BY film_count DESC LIMIT 5'),
+    ("SELECT genre, AVG(rating) FROM films WHERE genre IN ('Drama', 'GROUP BY x') GROUP BY genre HAVING COUNT(*) > 1",
+     "SELECT genre, avg_rating AS \"AVG(rating)\" FROM agg_films_by_genre WHERE (genre IN ('Drama', 'GROUP BY x')) AND (film_count > 1)"),
+])
+def test_rewrite_matching_queries(query, expected):
+    assert rewrite_for_aggregate(query, GENRES) == expected
+
+@pytest.mark.parametrize("query", [
+    "SELECT genre, COUNT(*) FROM films WHERE rating > 5 GROUP BY genre",  # filter on a non-group column
+    "SELECT genre, MAX(rating) FROM films GROUP BY genre",  # measure not precomputed
+    "SELECT genre, COUNT(*) FROM films GROUP BY genre ORDER BY SUM(rating)",
+    "SELECT title, COUNT(*) FROM films GROUP BY title",
+    "SELECT genre, COUNT(*) FROM films f JOIN cast c ON c.film_id = f.id GROUP BY genre",
+    "SELECT genre, COUNT(DISTINCT title) FROM films GROUP BY genre",
+    "SELECT genre, COUNT(*) FROM other GROUP BY genre",
+    "SELECT COUNT(*) FROM films",
+    'SELECT genre, COUNT(*) FROM films WHERE "rating" > 5 GROUP BY genre',  # quoted identifiers are not checked
+    'SELECT "genre", COUNT(*) FROM films GROUP BY "genre"',
+])
+def test_rewrite_rejects_other_queries(query):
+    assert rewrite_for_aggregate(query, GENRES) is None
+
+def test_refresh_reuses_file_for_same_version(films_db, tmp_path):
+    assert films_db.refresh("agg_films")
+    path = tmp_path / "aggregates" / "agg_films.db"
+    mtime = os.stat(path).st_mtime_ns
+
+    # A restart with the same data and definitions keeps the side file
+    store = AggregateStore(base_dir=str(tmp_path / "aggregates"))
+    store.configure("agg_films", [GENRES])
+    assert store.refresh("agg_films")
+    assert os.stat(path).st_mtime_ns == mtime
+    store.drop("agg_films")
+
+def test_first_query_materializes_in_background(films_db):
+    query = "SELECT genre, COUNT(*) AS n FROM films GROUP BY genre"
+    assert films_db.rewrite("agg_films", query) is None
+    deadline = time.monotonic() + 5
+    while films_db.rewrite("agg_films", query) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert films_db.rewrite("agg_films", query) is not None
+
+def test_execute_sql_reads_side_table(films_db):
+    query = "SELECT genre, COUNT(*) AS n FROM films GROUP BY genre ORDER BY genre"
+    expected = execute_sql(query)  # no side tables yet: base tables, build starts in background
+    assert films_db.refresh("agg_films")
+    query_cache.invalidate("agg_films")
+
+    assert films_db.rewrite("agg_films", query) is not None
+    assert execute_sql(query) == expected
+
+def test_stale_side_tables_are_bypassed_and_rebuilt(films_db):
+    assert films_db.refresh("agg_films")
+    time.sleep(0.01)
+    with get_engine("agg_films").begin() as conn:
+        conn.execute(text("INSERT INTO films (title, genre, rating) VALUES ('e', 'Drama', 9)"))
+
+    query = "SELECT genre, COUNT(*) AS n FROM films WHERE genre = 'Drama' GROUP BY genre"
+    assert films_db.rewrite("agg_films", query) is None
+    assert '"Drama",3' in execute_sql(query).replace(" ", "")
+
+    assert films_db.refresh("agg_films")
+    assert films_db.rewrite("agg_films", query) is not None
+    query_cache.invalidate("agg_films")
+    assert '"Drama",3' in execute_sql(query).replace(" ", "")
+
+@pytest.mark.anyio
+async def test_execute_sql_async_uses_side_table(films_db):
+    assert films_db.refresh("agg_films")
+    query = "SELECT genre, AVG(rating) AS r FROM films WHERE genre = 'Drama' GROUP BY genre"
+    assert films_db.rewrite("agg_films", query) is not None
+    output = await execute_sql_async(query)
+    assert '["Drama",7]' in output.replace(" ", "")
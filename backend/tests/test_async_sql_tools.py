@@ -0,0 +1,54 @@
+import pytest
+import asyncio
+from sqlalchemy import text
+from backend.core.database import register_async_database, get_async_engine, get_async_session
+from backend.core.tools.sql_tools import validate_sql_async, execute_sql_async
+
+@pytest.fixture
+def anyio_backend():
+    # aiosqlite is asyncio-only
+    return "asyncio"
+
+@pytest.mark.unit
+def test_async_url_uses_aiosqlite():
+    register_async_database("async_test_db", "sqlite:///:memory:")
+    engine = get_async_engine("async_test_db")
+    assert engine.url.drivername == "sqlite+aiosqlite"
+
+@pytest.mark.integration
+@pytest.mark.anyio
+async def test_async_session_connection():
+    session = get_async_session()
+    try:
+        result = await session.execute(text("SELECT 1"))
+        assert result.scalar() == 1
+    finally:
+        await session.close()
+
+@pytest.mark.unit
+@pytest.mark.anyio
+async def test_validate_sql_async_safety():
+    assert await validate_sql_async("SELECT * FROM flights") == "VALID"
+    assert "Error: Mutable operation" in await validate_sql_async("DROP TABLE flights")
+    assert "Syntax Error" in await validate_sql_async("SELEC * FROM flights")
+
+@pytest.mark.integration
+@pytest.mark.anyio
+async def test_execute_sql_async_overlaps_event_loop():
+    """The event loop keeps ticking while queries are awaited."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    tick_task = asyncio.create_task(ticker())
+    try:
+        results = await asyncio.gather(*[execute_sql_async("SELECT id FROM flights") for _ in range(5)])
+    finally:
+        tick_task.cancel()
+
+    assert all("Returned" in r or "no results" in r for r in results)
+    assert ticks > 0
@@ -0,0 +1,124 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import asyncio
+import yaml
+from sqlalchemy import text
+from backend.core import database
+from backend.core.database import get_engine, unregister_database, dispose_when_drained, register_database
+from backend.core.config_watcher import DatabaseConfigWatcher
+from backend.core.pooling import PoolConfig
+from backend.core.aggregates import aggregate_store
+from backend.core.question_cache import SchemaFingerprint, question_cache
+from backend.core.schema_registry import schema_registry
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def write_config(path, databases):
+    with open(path, "w") as f:
+        yaml.safe_dump({"databases": databases}, f)
+    # Force a distinct stamp even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def entry(db_id, name, tmp_path):
+    return {
+        "id": db_id,
+        "name": name,
+        "type": "sqlite",
+        "connection_string": f"sqlite:///{tmp_path}/{db_id}.db",
+        "schema_file": "data/flight_schema.yaml",
+    }
+
+def test_reload_applies_only_differences(tmp_path):
+    config_path = tmp_path / "databases.yaml"
+    write_config(config_path, [entry("hot_a", "A", tmp_path), entry("hot_b", "B", tmp_path)])
+
+    watcher = DatabaseConfigWatcher(str(config_path), os.getcwd(), poll_interval=0)
+    assert watcher.reload() == {"added": ["hot_a", "hot_b"], "changed": [], "removed": []}
+    engine_a = get_engine("hot_a")
+    get_engine("hot_b")
+
+    # Unchanged file: nothing to do
+    assert watcher.check() is None
+
+    write_config(config_path, [entry("hot_a", "A", tmp_path), entry("hot_c", "C", tmp_path)])
+    diff = watcher.check()
+    assert diff == {"added": ["hot_c"], "changed": [], "removed": ["hot_b"]}
+
+    # Untouched database keeps its warm engine
+    assert get_engine("hot_a") is engine_a
+    assert "hot_b" not in database._engines
+    assert "hot_b" not in database._database_specs
+    assert [db["id"] for db in watcher.list_databases()] == ["hot_a", "hot_c"]
+    assert "flights" in schema_registry.get_table_names("hot_c")
+
+    renamed = entry("hot_a", "A renamed", tmp_path)
+    write_config(config_path, [renamed, entry("hot_c", "C", tmp_path)])
+    assert watcher.check()["changed"] == ["hot_a"]
+    assert get_engine("hot_a") is not engine_a
+
+def test_settings_change_keeps_derived_state(tmp_path):
+    config_path = tmp_path / "databases.yaml"
+    aggregates = [{"name": "per_origin", "table": "flights", "group_by": ["origin"], "measures": {"flight_count": "COUNT(*)"}}]
+    base = dict(entry("hot_derived", "Derived", tmp_path), aggregates=aggregates)
+    write_config(config_path, [base])
+    watcher = DatabaseConfigWatcher(str(config_path), os.getcwd(), poll_interval=0)
+    watcher.reload()
+    engine = get_engine("hot_derived")
+    fingerprint = SchemaFingerprint(signature="v1", terms={"flights", "origin"})
+    question_cache.put("hot_derived", "How many flights per origin?", "SELECT origin, COUNT(*) FROM flights GROUP BY origin", fingerprint)
+
+    # Pool and timeout edits re-register the engine on the same data
+    write_config(config_path, [dict(base, statement_timeout_seconds=5, pool={"size": 2})])
+    assert watcher.check()["changed"] == ["hot_derived"]
+    assert get_engine("hot_derived") is not engine
+    assert database.get_statement_timeout("hot_derived") == 5
+    assert question_cache.stats("hot_derived")["entries"] == 1
+    assert [d.name for d in aggregate_store.definitions("hot_derived")] == ["per_origin"]
+    assert "flights" in schema_registry.get_table_names("hot_derived")
+
+    # A new connection string means different data
+    write_config(config_path, [dict(base, connection_string=f"sqlite:///{tmp_path}/moved.db")])
+    assert watcher.check()["changed"] == ["hot_derived"]
+    assert question_cache.stats("hot_derived")["entries"] == 0
+    assert [d.name for d in aggregate_store.definitions("hot_derived")] == ["per_origin"]
+
+def test_invalid_entry_keeps_running_configuration(tmp_path):
+    config_path = tmp_path / "databases.yaml"
+    good = entry("hot_keep", "Keep", tmp_path)
+    write_config(config_path, [good])
+    watcher = DatabaseConfigWatcher(str(config_path), os.getcwd(), poll_interval=0)
+    watcher.reload()
+    engine = get_engine("hot_keep")
+
+    broken = dict(good, pool={"size": "notanint"})
+    write_config(config_path, [broken, entry("hot_new", "New", tmp_path)])
+    assert watcher.check() is None
+
+    # Nothing was retired or declared: the last good configuration keeps serving
+    assert get_engine("hot_keep") is engine
+    assert "hot_new" not in database._database_specs
+    assert [db["id"] for db in watcher.list_databases()] == ["hot_keep"]
+
+@pytest.mark.anyio
+async def test_retired_engine_disposed_after_drain(tmp_path):
+    register_database("drain_db", f"sqlite:///{tmp_path}/drain.db", PoolConfig())
+    engine = get_engine("drain_db")
+    conn = engine.connect()
+    conn.execute(text("SELECT 1"))
+
+    retired_engine, _, _ = unregister_database("drain_db")
+    assert retired_engine is engine
+
+    dispose_task = asyncio.create_task(dispose_when_drained(retired_engine, None, timeout=5, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    # Still waiting on the in-flight connection
+    assert not dispose_task.done()
+
+    conn.close()
+    await asyncio.wait_for(dispose_task, timeout=1)
+    assert engine.pool.checkedin() == 0
@@ -0,0 +1,116 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import sqlite3
+from backend.core.cost_estimator import CostLimits, CostEstimate, estimate_cost, cost_action, limit_query
+from backend.core.database import register_database, register_async_database, database_context_var
+from backend.core.plan_advisor import column_usage
+from backend.core.query_cache import cost_cache, report_cache
+from backend.core.tools.sql_tools import execute_sql, execute_sql_async
+
+SCHEMA = """
+CREATE TABLE movies (id INTEGER PRIMARY KEY, title TEXT, genre TEXT, director_id INTEGER);
+CREATE TABLE directors (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE cast_members (movie_id INTEGER, person TEXT);
+CREATE INDEX idx_movies_genre ON movies (genre);
+"""
+ROWS = {"movies": 3000, "directors": 500, "cast_members": 20000}
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def _estimate(query, index_stats=None):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    plan = [(row[0], row[1], row[3]) for row in conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+    aliases, _ = column_usage(query, {t: [] for t in ROWS})
+    return estimate_cost(plan, ROWS, index_stats, aliases)
+
+def test_full_scan():
+    estimate = _estimate("SELECT * FROM cast_members WHERE person = 'x'")
+    assert estimate.estimated_rows == 20000
+    assert estimate.full_scans == ["cast_members"]
+
+def test_key_lookups_are_cheap():
+    estimate = _estimate("SELECT * FROM movies m JOIN directors d ON d.id = m.director_id WHERE m.genre = 'Drama'")
+    assert estimate.estimated_rows == 10  # unanalyzed index: SQLite's default of 10 rows per value
+    assert estimate.full_scans == []
+    assert _estimate("SELECT * FROM directors WHERE name = 'x'").estimated_rows == 1
+
+def test_index_statistics_refine_lookups():
+    estimate = _estimate("SELECT * FROM movies WHERE genre = 'Drama'", {"idx_movies_genre": [3000, 250]})
+    assert estimate.estimated_rows == 250
+
+def test_cartesian_join_fanout():
+    estimate = _estimate("SELECT * FROM movies m, directors d")
+    assert estimate.estimated_rows == 3000 * 500
+    assert estimate.join_fanout == 500
+    assert set(estimate.full_scans) == {"movies", "directors"}
+
+def test_correlated_subquery_runs_per_row():
+    estimate = _estimate("SELECT (SELECT COUNT(*) FROM cast_members c WHERE c.movie_id = m.id) FROM movies m")
+    assert estimate.estimated_rows == 3000 * 20000
+
+def test_cost_action_thresholds():
+    limits = CostLimits(limit_rows=1000, reject_rows=100000)
+    assert cost_action(CostEstimate(estimated_rows=10), limits) == "run"
+    assert cost_action(CostEstimate(estimated_rows=5000), limits) == "limit"
+    assert cost_action(CostEstimate(estimated_rows=10 ** 6), limits) == "reject"
+    assert cost_action(CostEstimate(estimated_rows=10 ** 9), None) == "run"
+
+def test_limit_query_handles_comments():
+    conn = sqlite3.connect(":memory:")
+    sql = limit_query("SELECT 1 UNION ALL SELECT 2 -- two rows\n; -- done", 1)
+    assert conn.execute(sql).fetchall() == [(1,)]
+
+@pytest.fixture
+def gated_db(tmp_path):
+    path = tmp_path / "gated.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO movies (title, director_id) VALUES (?, ?)", [(f"m{i}", i % 50 + 1) for i in range(300)])
+    conn.executemany("INSERT INTO directors (name) VALUES (?)", [(f"d{i}",) for i in range(50)])
+    conn.commit()
+    conn.close()
+    url = f"sqlite:///{path}"
+    limits = CostLimits(limit_rows=1000, reject_rows=100000, forced_limit=100)
+    register_database("gated_db", url, cost_limits=limits)
+    register_async_database("gated_db", url, cost_limits=limits)
+    cost_cache.invalidate("gated_db")
+    report_cache.invalidate("gated_db")
+    token = database_context_var.set("gated_db")
+    yield
+    database_context_var.reset(token)
+
+def test_execute_sql_runs_cheap_queries(gated_db):
+    output = execute_sql("SELECT m.title, d.name FROM movies m JOIN directors d ON d.id = m.director_id")
+    assert output.startswith("Returned 50 rows (truncated from 300 total")
+
+def test_execute_sql_forces_limit(gated_db):
+    output = execute_sql("SELECT m.title, d.name FROM movies m, directors d")  # 15,000 rows
+    assert output.startswith("Note: LIMIT 100 was enforced")
+    assert "truncated from 100 total" in output
+
+def test_execute_sql_rejects_expensive_queries(gated_db):
+    output = execute_sql("SELECT * FROM movies a, movies b, directors d")
+    assert output.startswith("Error: Query too expensive to run")
+    assert "full scan of movies, directors" in output
+
+@pytest.mark.anyio
+async def test_execute_sql_async_gates(gated_db):
+    output = await execute_sql_async("SELECT m.title, d.name FROM movies m, directors d")
+    assert output.startswith("Note: LIMIT 100 was enforced")
+    output = await execute_sql_async("SELECT * FROM movies a, movies b, directors d")
+    assert output.startswith("Error: Query too expensive to run")
+
+@pytest.mark.anyio
+async def test_failed_estimate_returns_error(gated_db, monkeypatch):
+    from backend.core.tools import sql_tools
+
+    def broken_estimate(query):
+        raise RuntimeError("statistics unavailable")
+
+    monkeypatch.setattr(sql_tools, "_estimate_cost", broken_estimate)
+    assert execute_sql("SELECT title FROM movies").startswith("Database Error: statistics unavailable")
+    assert (await execute_sql_async("SELECT name FROM directors")).startswith("Database Error: statistics unavailable")
@@ -0,0 +1,157 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import asyncio
+import sqlite3
+import duckdb
+from backend.core import duckdb_database
+from backend.core.database import declare_database, register_duckdb_database, unregister_database, dispose_when_drained, get_database_type, get_duckdb_database, database_context_var
+from backend.core.duckdb_database import DuckDBDatabase
+from backend.core.query_cache import query_cache, validation_cache, report_cache
+from backend.core.read_only_guard import READ_ONLY_ERROR
+from backend.core.tools.report_tools import generate_summary_report
+from backend.core.tools.sql_tools import validate_sql, execute_sql, execute_sql_async
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "films.db"
+    conn = sqlite3.connect(path)
+    # rating is declared INTEGER but holds REALs, as in movies.db
+    conn.execute("CREATE TABLE films (id INTEGER PRIMARY KEY, title TEXT, genre TEXT, rating INTEGER, gross INTEGER)")
+    conn.executemany(
+        "INSERT INTO films (title, genre, rating, gross) VALUES (?, ?, ?, ?)",
+        [(f"f{i}", ["Drama", "Comedy", "Action"][i % 3], 7 if i % 2 else 6.5, i * 1000) for i in range(120)],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def films_db(source):
+    register_duckdb_database("films_olap", "duckdb:///:memory:", read_only=True, attach=str(source), attach_mode="copy")
+    for cache in (query_cache, validation_cache, report_cache):
+        cache.invalidate("films_olap")
+    token = database_context_var.set("films_olap")
+    yield source
+    database_context_var.reset(token)
+
+def test_copy_keeps_dynamically_typed_values(source):
+    database = DuckDBDatabase("films_copy", attach=str(source), attach_mode="copy")
+    assert database.mode == "copy"
+    cursor = database.cursor()
+    assert cursor.execute("SELECT typeof(rating), AVG(rating) FROM films GROUP BY 1").fetchall() == [("DOUBLE", 6.75)]
+    cursor.close()
+
+def test_lazy_registration_from_url(source):
+    # Copying is the default attach mode
+    declare_database("films_lazy", "duckdb:///:memory:", read_only=True, attach=str(source))
+    assert get_database_type("films_lazy") == "duckdb"
+    assert get_duckdb_database("films_lazy").mode == "copy"
+
+def test_copy_in_batches_keeps_column_types(source, monkeypatch):
+    monkeypatch.setattr(duckdb_database, "COPY_BATCH_ROWS", 7)
+    conn = sqlite3.connect(source)
+    # Integers only in the first batches, a REAL in the last one
+    conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER, note TEXT)")
+    conn.executemany("INSERT INTO scores (score, note) VALUES (?, ?)", [(i, None) for i in range(20)] + [(2.5, "x")])
+    conn.execute("CREATE TABLE empty (id INTEGER)")
+    conn.commit()
+    conn.close()
+
+    cursor = DuckDBDatabase("films_batches", attach=str(source)).cursor()
+    try:
+        assert cursor.execute("SELECT typeof(score), COUNT(*), SUM(score) FROM scores GROUP BY 1").fetchall() == [("DOUBLE", 21, 192.5)]
+        assert cursor.execute("SELECT COUNT(*) FROM films").fetchone() == (120,)
+        assert cursor.execute("SELECT COUNT(*) FROM empty").fetchone() == (0,)
+    finally:
+        cursor.close()
+
+@pytest.mark.anyio
+async def test_retired_database_closed_after_drain(source):
+    register_duckdb_database("films_gone", "duckdb:///:memory:", read_only=True, attach=str(source))
+    cursor = get_duckdb_database("films_gone").cursor()
+    _, _, database = unregister_database("films_gone")
+    assert database.in_flight() == 1
+
+    dispose_task = asyncio.create_task(dispose_when_drained(None, None, database, timeout=5, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    # The in-flight query still runs
+    assert not dispose_task.done()
+    assert cursor.execute("SELECT COUNT(*) FROM films").fetchone() == (120,)
+
+    cursor.close()
+    await asyncio.wait_for(dispose_task, timeout=1)
+    with pytest.raises(duckdb.ConnectionException):
+        database._connection.conn.execute("SELECT 1")
+
+def test_reload_closes_replaced_connection_when_drained(source):
+    database = DuckDBDatabase("films_reload", attach=str(source))
+    cursor = database.cursor()
+    old = database._connection.conn
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    database.cursor().close()
+    assert database._connection.conn is not old
+
+    # Still serving the cursor opened before the reload, closed after it
+    assert cursor.execute("SELECT COUNT(*) FROM films").fetchone() == (120,)
+    cursor.close()
+    with pytest.raises(duckdb.ConnectionException):
+        old.execute("SELECT 1")
+
+def test_execute_sql_runs_on_duckdb(films_db):
+    output = execute_sql("SELECT genre, COUNT(*) AS n, SUM(gross) AS gross FROM films GROUP BY genre ORDER BY genre")
+    assert output.startswith("Returned 3 rows")
+    assert '["Action",40,' in output
+
+    output = execute_sql("SELECT * FROM films")
+    assert output.startswith("Returned 50 rows (truncated from 120 total")
+
+def test_only_reads_are_valid(films_db):
+    assert validate_sql("WITH g AS (SELECT genre FROM films) SELECT COUNT(*) FROM g") == "VALID"
+    assert validate_sql("CREATE TABLE t AS SELECT * FROM films") == READ_ONLY_ERROR
+    assert validate_sql("SELECT 1; DROP TABLE films") != "VALID"
+    assert validate_sql("SELECT * FROM read_csv('/etc/passwd')") != "VALID"
+    assert validate_sql("SELECT nope FROM films").startswith("Syntax Error")
+
+def test_statement_timeout_interrupts(source):
+    register_duckdb_database("films_slow", "duckdb:///:memory:", statement_timeout=0.2, read_only=True, attach=str(source), attach_mode="copy")
+    token = database_context_var.set("films_slow")
+    try:
+        output = execute_sql("SELECT COUNT(*) FROM range(100000000000) a WHERE a.range % 7 = 3")
+    finally:
+        database_context_var.reset(token)
+    assert output.startswith("Error: Query exceeded budget")
+
+def test_copy_reloaded_when_file_changes(films_db):
+    assert execute_sql("SELECT COUNT(*) FROM films").endswith("[[120]]}")
+    conn = sqlite3.connect(films_db)
+    conn.execute("DELETE FROM films WHERE genre = 'Drama'")
+    conn.commit()
+    conn.close()
+    stat = os.stat(films_db)
+    os.utime(films_db, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert execute_sql("SELECT COUNT(*) FROM films").endswith("[[80]]}")
+
+def test_summary_report_dispatches(films_db):
+    report = generate_summary_report()
+    assert report["dialect"] == "duckdb"
+    assert report["table_counts"] == {"films": 120}
+    assert report["tables"]["films"]["row_count_source"] == "statistics"
+    exact = generate_summary_report(exact_counts=True)
+    assert exact["tables"]["films"]["row_count_source"] == "exact"
+    assert exact["table_counts"] == {"films": 120}
+
+@pytest.mark.anyio
+async def test_execute_sql_async_dispatches(films_db):
+    misses = query_cache.stats()["misses"]
+    output = await execute_sql_async("SELECT MAX(rating) FROM films")
+    assert output.startswith("Returned 1 rows")
+    # The thread hop to DuckDB does not look the query up a second time
+    assert query_cache.stats()["misses"] == misses + 1
+    assert await execute_sql_async("SELECT MAX(rating) FROM films") == output
@@ -0,0 +1,51 @@
+import pytest
+pytestmark = pytest.mark.integration
+
+import json
+import pyarrow as pa
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core.export import stream_query, ArrowStreamEncoder
+
+client = TestClient(app)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def test_export_ndjson_full_result():
+    with client.stream("POST", "/databases/movies/export", json={"query": "SELECT id, title FROM movies ORDER BY id"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+    # Not capped at the agent's 50-row preview
+    assert len(rows) == 3201
+    assert set(rows[0]) == {"id", "title"}
+
+def test_export_arrow_stream():
+    response = client.post("/databases/movies/export", json={"query": "SELECT id, imdb_rating FROM movies", "format": "arrow"})
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3201
+    assert table.column_names == ["id", "imdb_rating"]
+    assert pa.types.is_integer(table.schema.field("id").type)
+
+def test_export_rejects_invalid_queries():
+    assert client.post("/databases/movies/export", json={"query": "DELETE FROM movies"}).status_code == 400
+    assert client.post("/databases/nope/export", json={"query": "SELECT 1"}).status_code == 404
+
+@pytest.mark.anyio
+async def test_rows_streamed_in_chunks():
+    chunks = [chunk async for chunk in stream_query("SELECT id FROM movies", "movies", chunk_rows=500)]
+    assert len(chunks) == 7
+    assert sum(chunk.count(b"\n") for chunk in chunks) == 3201
+
+def test_arrow_schema_fixed_by_first_chunk():
+    encoder = ArrowStreamEncoder(["value", "note"])
+    data = encoder.encode([(1, None), (2, None)])
+    data += encoder.encode([(3.5, "x"), ("text", 7)])
+    data += encoder.close()
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.schema.field("value").type == pa.int64()
+    assert table.schema.field("note").type == pa.string()
+    assert table.column("note").to_pylist() == [None, None, "x", "7"]
@@ -0,0 +1,44 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import shutil
+from backend.core import database
+from backend.core.database import declare_database, get_engine, get_pool_status
+from backend.core.schema_parser import SchemaParser
+from backend.core.schema_registry import schema_registry
+
+def test_engine_created_on_first_use():
+    declare_database("lazy_db", "sqlite:///:memory:")
+    assert "lazy_db" not in database._engines
+    assert get_pool_status("lazy_db")["materialized"] is False
+
+    engine = get_engine("lazy_db")
+    assert engine is database._engines["lazy_db"]
+    assert "lazy_db" in database._async_engines
+    assert get_engine("lazy_db") is engine
+
+def test_schema_loaded_on_first_use(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCHEMA_CACHE_DIR", str(tmp_path / "cache"))
+    schema_registry.declare_schema("lazy_schema_db", os.path.join("data", "flight_schema.yaml"))
+    assert "lazy_schema_db" not in schema_registry._schemas
+
+    assert "flights" in schema_registry.get_table_names("lazy_schema_db")
+    assert "lazy_schema_db" in schema_registry._schemas
+
+def test_schema_cache_reused_until_file_changes(tmp_path):
+    schema_file = tmp_path / "schema.yaml"
+    shutil.copy(os.path.join("data", "flight_schema.yaml"), schema_file)
+    cache_dir = tmp_path / "cache"
+
+    first = SchemaParser.parse_yaml_cached(str(schema_file), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 1
+
+    second = SchemaParser.parse_yaml_cached(str(schema_file), str(cache_dir))
+    assert second == first
+
+    # Editing the file produces a new cache entry with the new content
+    schema_file.write_text("tables:\n- name: only_table\n  columns: []\n")
+    os.utime(schema_file, ns=(0, 1))
+    third = SchemaParser.parse_yaml_cached(str(schema_file), str(cache_dir))
+    assert [t.name for t in third.tables] == ["only_table"]
@@ -0,0 +1,88 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import sqlite3
+from sqlalchemy import text
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core.database import register_database, register_async_database, get_engine, database_context_var
+from backend.core.plan_advisor import plan_recorder, column_usage, full_scans, advise, load_schema
+from backend.core.query_cache import validation_cache
+from backend.core.tools.sql_tools import validate_sql
+
+client = TestClient(app)
+
+GENRE_QUERY = "SELECT title, rating FROM films WHERE genre = 'Drama' ORDER BY rating DESC"
+
+@pytest.fixture
+def films_db(tmp_path):
+    path = tmp_path / "films.db"
+    url = f"sqlite:///{path}"
+    register_database("films_db", url)
+    register_async_database("films_db", url)
+    with get_engine("films_db").begin() as conn:
+        conn.execute(text("CREATE TABLE films (id INTEGER PRIMARY KEY, title TEXT, genre TEXT, rating REAL)"))
+        conn.execute(text("CREATE TABLE cast_members (film_id INTEGER, person TEXT)"))
+        conn.execute(text(
+            "WITH RECURSIVE s(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM s WHERE x < 2000) "
+            "INSERT INTO films (title, genre, rating) SELECT 'film ' || x, CASE x % 4 WHEN 0 THEN 'Drama' ELSE 'Comedy' END, x % 10 FROM s"
+        ))
+        conn.execute(text("INSERT INTO cast_members SELECT id, 'person ' || (id % 50) FROM films"))
+    plan_recorder.reset("films_db")
+    token = database_context_var.set("films_db")
+    yield path
+    database_context_var.reset(token)
+
+def test_column_usage():
+    schema = {"films": ["id", "title", "genre", "rating"], "cast_members": ["film_id", "person"]}
+    aliases, usage = column_usage(
+        "SELECT f.title FROM films AS f JOIN cast_members c ON c.film_id = f.id "
+        "WHERE f.genre = 'Drama' AND rating > 5 ORDER BY f.title", schema)
+    assert aliases["f"] == "films" and aliases["c"] == "cast_members"
+    assert usage["films"]["eq"] == ["genre"]
+    assert usage["films"]["range"] == ["rating"]
+    assert usage["films"]["order"] == ["title"]
+    assert usage["cast_members"]["join"] == ["film_id"]
+
+def test_full_scans_resolve_aliases():
+    plan = ["SCAN f", "SEARCH c USING INDEX idx (film_id=?)", "SCAN films USING COVERING INDEX idx2"]
+    assert full_scans(plan, {"f": "films", "c": "cast_members"}) == ["films"]
+
+def test_plans_recorded_and_aggregated_by_fingerprint(films_db):
+    validation_cache.invalidate("films_db")
+    validate_sql(GENRE_QUERY)
+    validate_sql(GENRE_QUERY)  # validation cache hit, still counted
+    validate_sql(GENRE_QUERY.lower().replace("'drama'", "'Drama'"))  # same fingerprint, different text
+    [entry] = plan_recorder.workload("films_db")
+    assert entry["count"] == 3
+    assert entry["plan"][0].startswith("SCAN films")
+
+def test_advise_recommends_indexes_the_planner_uses(films_db):
+    conn = sqlite3.connect(f"file:{films_db}?mode=ro", uri=True)
+    workload = [
+        {"query": GENRE_QUERY, "count": 5},
+        {"query": "SELECT f.title FROM films f JOIN cast_members c ON c.film_id = f.id WHERE c.person = 'person 7'", "count": 2},
+        {"query": "SELECT * FROM films WHERE id = 3", "count": 9},
+    ]
+    report = advise(conn, workload)
+    by_query = {q["query"]: q for q in report["queries"]}
+    assert by_query[GENRE_QUERY]["full_scans"] == [{"table": "films", "rows": 2000}]
+    # Primary key lookups are fine; small tables are not flagged
+    assert by_query["SELECT * FROM films WHERE id = 3"]["full_scans"] == []
+
+    columns = {(r["table"], tuple(r["columns"][:1])) for r in report["recommendations"]}
+    assert ("films", ("genre",)) in columns
+    assert report["recommendations"][0]["weight"] == 5
+    assert all(r["sql"].startswith("CREATE INDEX IF NOT EXISTS") for r in report["recommendations"])
+    # The database itself is untouched
+    assert "advisor_" not in str(conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall())
+    assert set(load_schema(conn)) == {"films", "cast_members"}
+
+def test_query_plans_endpoint(films_db):
+    validate_sql(GENRE_QUERY)
+    response = client.get("/databases/films_db/query-plans")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["queries"][0]["query"] == GENRE_QUERY
+    assert report["recommendations"]
+    assert client.get("/databases/nope/query-plans").status_code == 404
@@ -0,0 +1,48 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from backend.main import app
+from backend.core.database import register_database, get_engine, get_pool_status
+from backend.core.pooling import PoolConfig, apply_uri_flags
+
+client = TestClient(app)
+
+def test_apply_uri_flags():
+    url = apply_uri_flags("sqlite:///data/movies.db", {"mode": "ro"})
+    assert url.startswith("sqlite:///file:data/movies.db?")
+    assert "mode=ro" in url
+    assert "uri=true" in url
+
+    # In-memory and flag-less URLs are untouched
+    assert apply_uri_flags("sqlite:///:memory:", {"mode": "ro"}) == "sqlite:///:memory:"
+    assert apply_uri_flags("sqlite:///data/movies.db", {}) == "sqlite:///data/movies.db"
+
+def test_read_only_pool_settings():
+    config = PoolConfig(size=2, max_overflow=1, pre_ping=True, uri_flags={"mode": "ro"})
+    register_database("pool_test_db", "sqlite:///data/flights.db", config)
+    engine = get_engine("pool_test_db")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        with pytest.raises(Exception):
+            conn.execute(text("CREATE TABLE should_fail (id INTEGER)"))
+
+        status = get_pool_status("pool_test_db")["sync"]
+        assert status["pool_class"] == "InstrumentedQueuePool"
+        assert status["size"] == 2
+        assert status["checked_out"] == 1
+        assert status["max_overflow"] == 1
+        assert status["checkouts"] >= 1
+
+def test_pool_endpoint():
+    register_database("pool_test_db", "sqlite:///data/flights.db", PoolConfig())
+    response = client.get("/databases/pool_test_db/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["database_id"] == "pool_test_db"
+    assert "checked_out" in data["sync"]
+    assert "avg_wait_ms" in data["sync"]
+
+    assert client.get("/databases/ghost_db/pool").status_code == 404
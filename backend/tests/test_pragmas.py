@@ -0,0 +1,62 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from backend.core.database import register_database, register_async_database, get_engine, get_async_engine
+from backend.core.pragmas import SqlitePragmas
+
+PROFILE = SqlitePragmas(mmap_size=1048576, cache_size=-4096, temp_store="memory", query_only=True)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def _read(conn, name):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+def test_statements():
+    assert PROFILE.statements() == [
+        "PRAGMA mmap_size = 1048576",
+        "PRAGMA cache_size = -4096",
+        "PRAGMA temp_store = memory",
+        "PRAGMA query_only = ON",
+    ]
+    assert SqlitePragmas().statements() == []
+
+def test_values_are_validated():
+    with pytest.raises(ValidationError):
+        SqlitePragmas(journal_mode="wal; DROP TABLE movies")
+    with pytest.raises(ValidationError):
+        SqlitePragmas(mmap_size="lots")
+
+def test_applied_on_connect_before_read_only_guard(tmp_path):
+    # The guard's authorizer denies PRAGMAs with a value, so ordering matters
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    register_database("tuned_db", url, read_only=True, pragmas=PROFILE)
+    with get_engine("tuned_db").connect() as conn:
+        assert _read(conn, "mmap_size") == 1048576
+        assert _read(conn, "cache_size") == -4096
+        assert _read(conn, "temp_store") == 2
+        assert _read(conn, "query_only") == 1
+
+@pytest.mark.anyio
+async def test_applied_on_async_connect(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned_async.db'}"
+    register_async_database("tuned_async_db", url, read_only=True, pragmas=PROFILE)
+    async with get_async_engine("tuned_async_db").connect() as conn:
+        assert (await conn.execute(text("PRAGMA mmap_size"))).scalar() == 1048576
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+
+def test_unsupported_setting_does_not_block_connections(tmp_path):
+    path = tmp_path / "ro.db"
+    register_database("ro_seed", f"sqlite:///{path}")
+    with get_engine("ro_seed").begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    # WAL cannot be enabled through a read-only file handle
+    url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    register_database("ro_tuned", url, pragmas=SqlitePragmas(journal_mode="wal", mmap_size=65536))
+    with get_engine("ro_tuned").connect() as conn:
+        assert _read(conn, "mmap_size") == 65536
+        assert conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 0
@@ -0,0 +1,48 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import time
+import threading
+from backend.core.database import register_database, register_async_database, database_context_var
+from backend.core.query_budget import cancel_event_var
+from backend.core.tools.sql_tools import execute_sql, execute_sql_async
+
+# Never terminates on its own
+RUNAWAY_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c"
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def budget_db(tmp_path):
+    url = f"sqlite:///{tmp_path}/budget.db"
+    register_database("budget_db", url, statement_timeout=0.2)
+    register_async_database("budget_db", url, statement_timeout=0.2)
+    token = database_context_var.set("budget_db")
+    yield
+    database_context_var.reset(token)
+
+def test_statement_timeout(budget_db):
+    start = time.monotonic()
+    result = execute_sql(RUNAWAY_QUERY)
+    assert "Query exceeded budget" in result
+    assert time.monotonic() - start < 5
+
+    # Normal queries are unaffected
+    assert "Returned 1 rows" in execute_sql("SELECT 1 AS one")
+
+@pytest.mark.anyio
+async def test_async_statement_timeout(budget_db):
+    result = await execute_sql_async(RUNAWAY_QUERY)
+    assert "Query exceeded budget" in result
+
+def test_cancelled_by_disconnect(budget_db):
+    cancel_event = threading.Event()
+    token = cancel_event_var.set(cancel_event)
+    try:
+        threading.Timer(0.05, cancel_event.set).start()
+        result = execute_sql("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT SUM(x) FROM c")
+        assert "cancelled" in result
+    finally:
+        cancel_event_var.reset(token)
@@ -0,0 +1,59 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import time
+from sqlalchemy import text
+from backend.core.database import register_database, get_engine, get_data_version, database_context_var
+from backend.core.query_cache import QueryResultCache, query_cache
+from backend.core.sql_fingerprint import normalize_sql, fingerprint_sql
+from backend.core.tools.sql_tools import execute_sql
+
+def test_fingerprint_normalization():
+    a = "select title,  COUNT(*) from movies -- comment\n group by title;"
+    b = "SELECT title, count(*) FROM movies GROUP BY title"
+    assert normalize_sql(a) == b
+    assert fingerprint_sql(a) == fingerprint_sql(b)
+    # Literals keep their case and spacing
+    assert fingerprint_sql("SELECT 'A  b'") != fingerprint_sql("SELECT 'a b'")
+
+def test_lru_and_ttl():
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("db", "SELECT 1", 1, "one")
+    cache.put("db", "SELECT 2", 1, "two")
+    assert cache.get("db", "select 1", 1) == "one"
+    cache.put("db", "SELECT 3", 1, "three")
+    # SELECT 2 was least recently used
+    assert cache.get("db", "SELECT 2", 1) is None
+    assert cache.get("db", "SELECT 1", 1) == "one"
+
+    # A different data version is a miss
+    assert cache.get("db", "SELECT 1", 2) is None
+
+    expiring = QueryResultCache(max_entries=2, ttl_seconds=0.01)
+    expiring.put("db", "SELECT 1", 1, "one")
+    time.sleep(0.02)
+    assert expiring.get("db", "SELECT 1", 1) is None
+
+def test_execute_sql_invalidated_by_data_change(tmp_path):
+    register_database("cache_db", f"sqlite:///{tmp_path}/cache.db")
+    with get_engine("cache_db").begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO items (id) VALUES (1)"))
+
+    token = database_context_var.set("cache_db")
+    try:
+        query_cache.invalidate("cache_db")
+        first = execute_sql("SELECT COUNT(*) AS n FROM items")
+        hits = query_cache.stats()["hits"]
+        assert execute_sql("select count(*) as n from items") == first
+        assert query_cache.stats()["hits"] == hits + 1
+
+        version = get_data_version("cache_db")
+        with get_engine("cache_db").begin() as conn:
+            conn.execute(text("INSERT INTO items (id) VALUES (2), (3)"))
+        assert get_data_version("cache_db") != version
+
+        refreshed = execute_sql("SELECT COUNT(*) AS n FROM items")
+        assert refreshed.endswith('"rows":[[3]]}')
+    finally:
+        database_context_var.reset(token)
@@ -0,0 +1,122 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from collections import Counter
+from typing import AsyncGenerator
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from backend.agents.adk.router import delegate_to_sql_agent
+from backend.agents.adk.runner_pool import sub_agent_runners
+from backend.core.database import database_context_var
+from backend.core.question_cache import QuestionSqlCache, SchemaFingerprint, question_cache, tokenize_question
+from backend.core.schema_parser import SchemaParser
+from backend.core.schema_registry import schema_registry
+
+SCHEMA = SchemaFingerprint(signature="v1", terms=set(tokenize_question("flights origin destination pilots name")))
+ORIGIN_SQL = "SELECT origin, COUNT(*) AS flight_count FROM flights GROUP BY origin"
+
+# Model calls per workflow step
+calls = Counter()
+
+class ScriptedSqlLlm(BaseLlm):
+    """Plays the model stages of the SQL workflow: plan, write ORIGIN_SQL, report."""
+
+    @classmethod
+    def supported_models(cls):
+        return [r"scripted-sql"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        instruction = str(llm_request.config.system_instruction)
+        if "SQL writing expert" in instruction:
+            calls["generator"] += 1
+            part = types.Part(text=ORIGIN_SQL)
+        elif "list_tables" in instruction:
+            calls["planner"] += 1
+            part = types.Part(text="flights: origin")
+        else:
+            calls["reporter"] += 1
+            part = types.Part(text="Flights per origin.")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+LLMRegistry.register(ScriptedSqlLlm)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def cache(tmp_path):
+    return QuestionSqlCache(str(tmp_path))
+
+def test_paraphrases_hit(cache):
+    cache.put("db", "How many flights are there per origin?", ORIGIN_SQL, SCHEMA)
+    for question in ["how many flights per origin", "Count of flights by origin", "number of flights for each origin"]:
+        hit = cache.lookup("db", question, SCHEMA)
+        assert hit is not None and hit.sql == ORIGIN_SQL
+    assert cache.lookup("other_db", "how many flights per origin", SCHEMA) is None
+
+@pytest.mark.parametrize("question", [
+    "How many flights per origin last year?",
+    "How many flights per origin excluding weekends?",
+    "How many flights per origin in the morning?",
+    "How many international flights per origin?",
+    "How many flights per destination?",
+    "How many pilots per origin?",
+    "Show flights from LAX to JFK",
+    "Show flights to JFK",
+    "Show flights from JFK",
+    "Show the top 10 flights from JFK to LAX",
+])
+def test_different_questions_miss(cache, question):
+    cache.put("db", "How many flights are there per origin?", ORIGIN_SQL, SCHEMA)
+    cache.put("db", "Show flights from JFK to LAX", "SELECT * FROM flights WHERE origin = 'JFK' AND destination = 'LAX'", SCHEMA)
+    assert cache.lookup("db", question, SCHEMA) is None
+
+@pytest.mark.parametrize("cached, question", [
+    ("Average budget of movies per genre excluding sequels", "average budget of movies per genre"),
+    ("Top movies by gross", "movies by gross"),
+    ("Top 10 movies by gross", "movies by gross"),
+    ("How many flights per origin last year?", "How many flights are there per origin?"),
+])
+def test_dropped_filters_and_limits_miss(cache, cached, question):
+    cache.put("db", cached, "SELECT 1", SCHEMA)
+    assert cache.lookup("db", question, SCHEMA) is None
+
+def test_persisted_and_dropped_on_schema_change(cache):
+    cache.put("db", "How many flights are there per origin?", ORIGIN_SQL, SCHEMA)
+    cache.lookup("db", "how many flights per origin", SCHEMA)
+    cache.lookup("db", "list pilots", SCHEMA)
+    assert cache.stats("db") == {"entries": 1, "lookups": 2, "hits": 1, "misses": 1, "stores": 1, "hit_rate": 0.5}
+
+    restarted = QuestionSqlCache(cache.cache_dir)
+    assert restarted.lookup("db", "how many flights per origin", SCHEMA).sql == ORIGIN_SQL
+
+    changed = SCHEMA.model_copy(update={"signature": "v2"})
+    assert restarted.lookup("db", "how many flights per origin", changed) is None
+    assert QuestionSqlCache(cache.cache_dir).stats("db")["entries"] == 0
+
+@pytest.mark.anyio
+async def test_cache_hit_skips_planner_and_generator(tmp_path, monkeypatch):
+    schema_registry.load_schema("flights", SchemaParser().parse_yaml("data/flight_schema.yaml"))
+    monkeypatch.setattr(question_cache, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(question_cache, "_entries", {})
+    monkeypatch.setattr(question_cache, "_stats", {})
+    monkeypatch.setattr(sub_agent_runners, "default_model", "scripted-sql")
+    calls.clear()
+    token = database_context_var.set("flights")
+    try:
+        first = await delegate_to_sql_agent("How many flights are there per origin?")
+        assert calls == Counter(generator=1, reporter=1)
+
+        calls.clear()
+        second = await delegate_to_sql_agent("Count flights by origin")
+        assert calls == Counter(reporter=1)
+    finally:
+        database_context_var.reset(token)
+
+    # Delegations return the text of every step; the cached run has no generator output
+    assert first.startswith(ORIGIN_SQL) and first.endswith("Flights per origin.")
+    assert second.startswith("Returned") and second.endswith("Flights per origin.")
+    assert question_cache.stats("flights")["hits"] == 1
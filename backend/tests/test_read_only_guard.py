@@ -0,0 +1,64 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from sqlalchemy import text
+from backend.core.database import register_database, register_async_database, get_engine, is_read_only_guarded, database_context_var
+from backend.core.read_only_guard import READ_ONLY_ERROR
+from backend.core.tools import sql_tools
+from backend.core.tools.sql_tools import validate_sql, validate_sql_async, execute_sql
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def guarded_db(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/guarded.db"
+    # Seed through a plain engine, then register the guarded one
+    register_database("guard_seed", url)
+    with get_engine("guard_seed").begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)"))
+        conn.execute(text("INSERT INTO notes (body) VALUES ('please update me'), ('drop by later')"))
+
+    register_database("guarded", url, read_only=True)
+    register_async_database("guarded", url, read_only=True)
+    monkeypatch.setattr(sql_tools, "KEYWORD_CHECK", "auto")
+    token = database_context_var.set("guarded")
+    yield
+    database_context_var.reset(token)
+
+def test_writes_denied_by_authorizer(guarded_db):
+    assert is_read_only_guarded()
+    for query in [
+        "DELETE FROM notes",
+        "INSERT INTO notes (body) VALUES ('x')",
+        "UPDATE notes SET body = 'x'",
+        "DROP TABLE notes",
+        "CREATE TABLE other (id INTEGER)",
+        "ATTACH DATABASE ':memory:' AS other",
+        "PRAGMA user_version = 3",
+    ]:
+        assert validate_sql(query) == READ_ONLY_ERROR, query
+
+    # The guard holds even if a statement skips validation
+    with pytest.raises(Exception, match="not authorized"):
+        with get_engine().begin() as conn:
+            conn.execute(text("DELETE FROM notes"))
+
+def test_reads_allowed(guarded_db):
+    # Keyword-looking literals are no longer rejected
+    assert validate_sql("SELECT * FROM notes WHERE body LIKE '%update%' OR body = 'drop by later'") == "VALID"
+    assert validate_sql("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3) SELECT x FROM c") == "VALID"
+    assert validate_sql("PRAGMA table_info(notes)") == "VALID"
+    assert "Returned 1 rows" in execute_sql("SELECT body FROM notes WHERE body LIKE '%update%'")
+    assert validate_sql("   ") == "Error: No SQL statement found."
+
+@pytest.mark.anyio
+async def test_async_writes_denied(guarded_db):
+    assert await validate_sql_async("DELETE FROM notes WHERE id = 1") == READ_ONLY_ERROR
+    assert await validate_sql_async("SELECT body FROM notes") == "VALID"
+
+def test_keyword_walk_for_unguarded_databases():
+    # conftest registers flights without the guard
+    assert not is_read_only_guarded("flights")
+    assert "Mutable operation 'DELETE'" in validate_sql("DELETE FROM flights")
@@ -0,0 +1,112 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import sqlite3
+import threading
+from sqlalchemy import text
+from backend.core.database import register_database, register_async_database, declare_database, unregister_database, prepare_database_async, get_engine, get_async_engine, get_database_type, get_data_version
+from backend.core.pooling import PoolConfig
+from backend.core.pragmas import SqlitePragmas
+from backend.core.replica import MemoryReplica
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    conn.commit()
+    conn.close()
+    return path
+
+def _append(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM t")).scalar()
+
+def test_snapshot_is_served_from_memory(source):
+    replica = MemoryReplica("snap", str(source))
+    conn = replica.connect()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 10
+    assert conn.execute("PRAGMA database_list").fetchone()[2] == ""  # no backing file
+    conn.close()
+
+def test_refresh_only_on_file_change(source):
+    replica = MemoryReplica("refresh", str(source))
+    assert replica.refresh_if_changed() is False
+    _append(source, 10)
+    assert replica.refresh_if_changed() is True
+    assert replica.generation == 2
+    assert replica.connect().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 11
+
+def test_sessions_follow_file_changes(source):
+    url = f"sqlite:///{source}"
+    register_database("replica_db", url, pool_config=PoolConfig(size=2), read_only=True, replica="memory")
+    engine = get_engine("replica_db")
+    assert _count(engine) == 10
+
+    version = get_data_version("replica_db")
+    _append(source, 10)
+    # Data versions track the file, so caches keyed on them are invalidated too
+    assert get_data_version("replica_db") != version
+    # The pooled connection is on the old snapshot and gets replaced on checkout
+    assert _count(engine) == 11
+
+def test_read_only_guard_and_pragmas_apply(source):
+    url = f"sqlite:///{source}"
+    register_database("replica_guarded", url, read_only=True, pragmas=SqlitePragmas(query_only=True), replica="memory")
+    with get_engine("replica_guarded").connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(Exception):
+            conn.execute(text("DELETE FROM t"))
+    assert _count(get_engine("replica_guarded")) == 10
+
+@pytest.mark.anyio
+async def test_async_sessions_use_the_replica(source):
+    url = f"sqlite:///{source}"
+    register_database("replica_async", url, replica="memory")
+    register_async_database("replica_async", url, replica="memory")
+    engine = get_async_engine("replica_async")
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar() == 10
+        assert (await conn.execute(text("PRAGMA database_list"))).fetchone()[2] == ""
+
+    _append(source, 10)
+    # Async checkouts never copy the file on the event loop; prepare_database_async refreshes in a thread
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar() == 10
+    await prepare_database_async("replica_async")
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar() == 11
+
+@pytest.mark.anyio
+async def test_declared_database_registers_off_the_event_loop(source, monkeypatch):
+    from backend.core import database
+
+    threads = []
+    register = database.register_database
+    monkeypatch.setattr(database, "register_database", lambda *args, **kwargs: (threads.append(threading.get_ident()), register(*args, **kwargs)))
+    declare_database("replica_declared", f"sqlite:///{source}", replica="memory")
+    try:
+        assert await prepare_database_async("replica_declared") == "replica_declared"
+        assert threads and threading.get_ident() not in threads
+        assert get_database_type("replica_declared") == "sqlite"
+    finally:
+        unregister_database("replica_declared")
+
+def test_unsupported_mode_is_rejected(source):
+    with pytest.raises(ValueError, match="Unsupported replica mode"):
+        register_database("replica_bad", f"sqlite:///{source}", replica="disk")
@@ -0,0 +1,78 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import time
+import sqlite3
+from sqlalchemy import text
+from backend.core.database import register_database, get_engine, database_context_var
+from backend.core.query_cache import report_cache
+from backend.core.read_only_guard import READ_ONLY_ERROR
+from backend.core.tools.report_tools import generate_summary_report
+from backend.core.tools.sql_tools import execute_sql
+
+@pytest.fixture
+def shop_db(tmp_path):
+    path = tmp_path / "shop.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total REAL)")
+    conn.execute("CREATE INDEX idx_orders_customer ON orders (customer_id)")
+    conn.execute("CREATE INDEX idx_orders_total ON orders (total)")
+    conn.executemany("INSERT INTO customers (name) VALUES (?)", [(f"c{i}",) for i in range(30)])
+    conn.executemany("INSERT INTO orders (customer_id, total) VALUES (?, ?)", [(i % 30, i) for i in range(200)])
+    conn.commit()
+    conn.close()
+    register_database("shop_db", f"sqlite:///{path}")
+    report_cache.invalidate("shop_db")
+    token = database_context_var.set("shop_db")
+    yield path
+    database_context_var.reset(token)
+
+def test_exact_counts_without_statistics(shop_db):
+    report = generate_summary_report()
+    assert report["status"] == "success"
+    assert report["table_counts"] == {"customers": 30, "orders": 200}
+    orders = report["tables"]["orders"]
+    assert orders["row_count_source"] == "exact"
+    assert orders["index_count"] == 2
+    assert orders["size_bytes"] > 0
+    assert orders["refreshed_at"]
+
+def test_statistics_used_after_analyze(shop_db):
+    conn = sqlite3.connect(shop_db)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    report = generate_summary_report()
+    assert report["tables"]["orders"]["row_count_source"] == "statistics"
+    assert report["table_counts"]["orders"] == 200
+
+    exact = generate_summary_report(exact_counts=True)
+    assert exact["tables"]["orders"]["row_count_source"] == "exact"
+
+def test_report_cached_until_data_changes(shop_db):
+    first = generate_summary_report()
+    assert generate_summary_report() is first
+
+    time.sleep(0.01)
+    with get_engine("shop_db").begin() as conn:
+        conn.execute(text("INSERT INTO customers (name) VALUES ('new')"))
+    second = generate_summary_report()
+    assert second is not first
+    assert second["table_counts"]["customers"] == 31
+
+def test_sizes_keep_read_only_guard(tmp_path):
+    path = tmp_path / "guarded.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+    register_database("guarded_report_db", f"sqlite:///{path}", read_only=True)
+    token = database_context_var.set("guarded_report_db")
+    try:
+        report = generate_summary_report()
+        assert report["tables"]["t"]["size_bytes"] > 0
+        assert execute_sql("DELETE FROM t") == READ_ONLY_ERROR
+    finally:
+        database_context_var.reset(token)
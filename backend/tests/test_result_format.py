@@ -0,0 +1,39 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import json
+import datetime
+from backend.core.result_format import encode_columnar, encode_records, decode_columnar
+from backend.core.tools.format_tools import ensure_chart_tags
+
+def test_columnar_encoding():
+    keys = ["genre", "avg_budget", "released", "rating"]
+    rows = [
+        ("Action", 53123456.789, datetime.date(1998, 6, 12), 6.1),
+        ("Drama", None, None, 0.123456789),
+    ]
+    payload = json.loads(encode_columnar(keys, rows))
+
+    assert payload["columns"] == keys
+    assert payload["types"] == ["text", "float", "datetime", "float"]
+    assert payload["rows"][0] == ["Action", 53123456.79, "1998-06-12", 6.1]
+    assert payload["rows"][1] == ["Drama", None, None, 0.1235]
+
+def test_columnar_is_smaller_than_records():
+    keys = ["title", "production_budget", "worldwide_gross"]
+    rows = [(f"Movie {i}", 1000000 * i, 2500000 * i) for i in range(50)]
+    columnar = encode_columnar(keys, rows)
+    assert len(columnar) < len(encode_records(keys, rows)) * 0.7
+    assert decode_columnar(columnar)[3] == {"title": "Movie 3", "production_budget": 3000000, "worldwide_gross": 7500000}
+
+def test_chart_tags_skip_result_payload():
+    result = encode_columnar(["origin", "n"], [("JFK", 10), ("LHR", 5)])
+    chart = '{"chart": {"type": "bar"}, "series": [{"data": [10, 5]}], "xaxis": {"categories": ["JFK", "LHR"]}}'
+    text = f"Returned 2 rows:\n{result}\nHere is your chart:\n```json\n{chart}\n```"
+
+    tagged = ensure_chart_tags(text)
+    assert "[CHART_JSON]" in tagged
+    assert "[CHART_JSON]" not in tagged.split("Here is your chart")[0]
+
+    # Result payloads alone are never mistaken for charts
+    assert ensure_chart_tags(f"Returned 2 rows:\n{result}") == f"Returned 2 rows:\n{result}"
@@ -0,0 +1,45 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from sqlalchemy import text
+from backend.core.database import register_database, register_async_database, get_engine, database_context_var
+from backend.core.tools.sql_tools import execute_sql, execute_sql_async, MAX_RESULT_ROWS
+from backend.core.result_format import decode_columnar
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def preview_db(tmp_path):
+    url = f"sqlite:///{tmp_path}/preview.db"
+    register_database("preview_db", url)
+    register_async_database("preview_db", url)
+    with get_engine("preview_db").begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("WITH RECURSIVE s(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM s WHERE x < 500) INSERT INTO items (id) SELECT x FROM s"))
+    token = database_context_var.set("preview_db")
+    yield
+    database_context_var.reset(token)
+
+def test_preview_is_bounded_with_exact_total(preview_db):
+    result = execute_sql("SELECT id FROM items;")
+    assert result.startswith(f"Returned {MAX_RESULT_ROWS} rows (truncated from 500 total; full result stored as result_handle res_")
+    rows = decode_columnar(result.split(":\n", 1)[1])
+    assert [r["id"] for r in rows] == list(range(1, MAX_RESULT_ROWS + 1))
+
+def test_small_results_not_truncated(preview_db):
+    result = execute_sql(f"SELECT id FROM items WHERE id <= {MAX_RESULT_ROWS}")
+    assert result.startswith(f"Returned {MAX_RESULT_ROWS} rows:")
+
+@pytest.mark.anyio
+async def test_async_preview_is_bounded(preview_db):
+    result = await execute_sql_async("SELECT id FROM items ORDER BY id DESC")
+    assert result.startswith(f"Returned {MAX_RESULT_ROWS} rows (truncated from 500 total; full result stored as result_handle res_")
+    assert decode_columnar(result.split(":\n", 1)[1])[0] == {"id": 500}
+
+def test_total_counted_when_spilling_disabled(preview_db, monkeypatch):
+    from backend.core.tools import sql_tools
+    monkeypatch.setattr(sql_tools, "SPILL_MAX_ROWS", 0)
+    result = execute_sql("SELECT id FROM items WHERE id > 10")
+    assert result.startswith(f"Returned {MAX_RESULT_ROWS} rows (truncated from 490 total).")
@@ -0,0 +1,130 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+from sqlalchemy import text
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core.database import register_database, register_async_database, get_engine, database_context_var
+from backend.core.result_store import ResultStore, result_store
+from backend.core.tools import sql_tools
+from backend.core.tools.sql_tools import execute_sql, execute_sql_async
+from backend.core.tools.result_tools import describe_result, chart_from_result
+
+client = TestClient(app)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def sales_db(tmp_path):
+    url = f"sqlite:///{tmp_path}/sales.db"
+    register_database("sales_db", url)
+    register_async_database("sales_db", url)
+    with get_engine("sales_db").begin() as conn:
+        conn.execute(text("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, amount REAL)"))
+        conn.execute(text(
+            "WITH RECURSIVE s(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM s WHERE x < 3000) "
+            "INSERT INTO sales (region, amount) SELECT CASE x % 3 WHEN 0 THEN 'north' WHEN 1 THEN 'south' ELSE NULL END, x FROM s"
+        ))
+    token = database_context_var.set("sales_db")
+    yield
+    database_context_var.reset(token)
+
+def _handle(output):
+    return re.search(r"result_handle (res_\w+)", output).group(1)
+
+def test_large_result_spilled_and_summarized(sales_db):
+    output = execute_sql("SELECT region, amount FROM sales")
+    assert "truncated from 3000 total" in output
+    summary = json.loads(describe_result(_handle(output)))
+    assert summary["row_count"] == 3000
+    assert summary["columns"]["amount"]["sum"] == 3000 * 3001 / 2
+    assert summary["columns"]["region"]["distinct"] == 2
+
+def test_chart_from_full_result(sales_db):
+    handle = _handle(execute_sql("SELECT region, amount FROM sales"))
+    chart = chart_from_result(handle, "region", "amount", chart_type="pie", aggregate="count")
+    config = json.loads(chart.removeprefix("[CHART_JSON]\n").removesuffix("\n[/CHART_JSON]"))
+    assert sorted(config["labels"]) == ["Unknown", "north", "south"]
+    assert config["series"] == [1000, 1000, 1000]
+    assert "Column 'nope'" in chart_from_result(handle, "nope", "amount")
+
+@pytest.mark.anyio
+async def test_async_spill_and_export(sales_db):
+    handle = _handle(await execute_sql_async("SELECT id, amount FROM sales ORDER BY id"))
+    response = client.get(f"/results/{handle}/export", params={"format": "arrow"})
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3000
+    assert table.column("id").to_pylist()[:3] == [1, 2, 3]
+
+    lines = client.get(f"/results/{handle}/export").text.splitlines()
+    assert len(lines) == 3000 and json.loads(lines[0]) == {"id": 1, "amount": 1.0}
+
+def test_spilled_only_when_handle_opened(sales_db):
+    output = execute_sql("SELECT id, amount FROM sales WHERE id > 10")
+    handle = _handle(output)
+    assert "truncated from 2990 total" in output
+    assert result_store.info(handle)["row_count"] == 2990
+    assert not os.path.exists(result_store._path(handle))
+
+    assert result_store.open_table(handle).num_rows == 2990
+    assert os.path.exists(result_store._path(handle))
+
+def test_outputs_with_handles_not_cached(sales_db):
+    first = execute_sql("SELECT region FROM sales")
+    second = execute_sql("SELECT region FROM sales")
+    assert _handle(first) != _handle(second)
+
+def test_handle_refused_after_data_change(sales_db):
+    handle = _handle(execute_sql("SELECT id FROM sales"))
+    with get_engine("sales_db").begin() as conn:
+        conn.execute(text("DELETE FROM sales WHERE id > 2000"))
+    assert "data changed" in describe_result(handle)
+
+def test_oversized_results_not_spilled(sales_db, monkeypatch):
+    monkeypatch.setattr(sql_tools, "SPILL_MAX_ROWS", 1000)
+    output = execute_sql("SELECT id FROM sales")
+    assert "truncated from 3000 total)" in output and "result_handle" not in output
+
+def test_store_expiry_and_limits(tmp_path):
+    store = ResultStore(str(tmp_path), ttl_seconds=3600, max_files=2)
+    handles = []
+    for i in range(3):
+        writer = store.writer(["n"])
+        writer.write([(i,)])
+        handles.append(writer.commit())
+    # Oldest file evicted
+    assert store.info(handles[0]) is None
+    assert store.open_table(handles[2]).column("n").to_pylist() == [2]
+    assert len(list(tmp_path.iterdir())) == 2
+    assert "not found" in describe_result("res_missing")
+    assert client.get("/results/res_missing/export").status_code == 404
+
+def test_deferred_loads_lock_per_handle(tmp_path):
+    store = ResultStore(str(tmp_path))
+    # Both loaders must be inside at once to pass the barrier, so a shared lock would time out
+    barrier = threading.Barrier(2, timeout=5)
+    runs = []
+
+    def loader(value):
+        def load(writer):
+            runs.append(value)
+            barrier.wait()
+            writer.write([(value,)])
+        return load
+
+    first, second = store.defer(["n"], 1, loader(1)), store.defer(["n"], 1, loader(2))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        tables = list(pool.map(store.open_table, [first, second, first, second]))
+    assert [t.column("n").to_pylist() for t in tables] == [[1], [2], [1], [2]]
+    # Each query ran once even though its handle was opened twice concurrently
+    assert sorted(runs) == [1, 2]
+    assert store._load_locks == {}
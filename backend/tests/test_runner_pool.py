@@ -0,0 +1,65 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import asyncio
+from typing import AsyncGenerator
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from backend.agents.adk.router import run_sub_agent, create_root_router, SUB_AGENTS
+from backend.agents.adk.runner_pool import SubAgentRunnerPool, sub_agent_runners
+from backend.agents.adk.schema import create_schema_agent
+
+class EchoLlm(BaseLlm):
+    """Answers with the last user message and how many user messages the session holds."""
+
+    @classmethod
+    def supported_models(cls):
+        return [r"echo-.*"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        user_texts = [p.text for c in llm_request.contents if c.role == "user" for p in c.parts if p.text]
+        await asyncio.sleep(0.01)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"{user_texts[-1]} ({len(user_texts)})")]))
+
+LLMRegistry.register(EchoLlm)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def test_runner_built_once_per_app_and_model():
+    pool = SubAgentRunnerPool("echo-a")
+    first = pool.get(create_schema_agent, "Schema", "echo-a")
+    assert pool.get(create_schema_agent, "Schema", "echo-a") is first
+    assert pool.get(create_schema_agent, "Schema", "echo-b") is not first
+    assert pool.stats() == {"runners": 2, "built": 2, "reused": 1}
+
+def test_root_router_prebuilds_sub_agent_runners():
+    create_root_router("echo-router")
+    stats = sub_agent_runners.stats()
+    create_root_router("echo-router")
+    assert sub_agent_runners.stats()["built"] == stats["built"]
+    assert sub_agent_runners.default_model == "echo-router"
+    for app_name in SUB_AGENTS:
+        assert (app_name, "echo-router") in sub_agent_runners._runners
+
+@pytest.mark.anyio
+async def test_delegations_reuse_runner_with_isolated_sessions():
+    first = await run_sub_agent(create_schema_agent, "list tables", "SchemaPoolTest", model_name="echo-pool")
+    second = await run_sub_agent(create_schema_agent, "describe flights", "SchemaPoolTest", model_name="echo-pool")
+    # Each delegation only sees its own message
+    assert first == "list tables (1)"
+    assert second == "describe flights (1)"
+
+    runner = sub_agent_runners._runners[("SchemaPoolTest", "echo-pool")]
+    assert runner.session_service.sessions.get("SchemaPoolTest", {}).get("router_delegate", {}) == {}
+
+@pytest.mark.anyio
+async def test_concurrent_delegations_do_not_share_history():
+    queries = [f"question {i}" for i in range(5)]
+    answers = await asyncio.gather(*[
+        run_sub_agent(create_schema_agent, q, "SchemaConcurrentTest", model_name="echo-concurrent") for q in queries
+    ])
+    assert answers == [f"{q} (1)" for q in queries]
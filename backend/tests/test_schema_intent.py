@@ -0,0 +1,95 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import json
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core.agent_manager import agent_manager
+from backend.core.schema_parser import SchemaParser
+from backend.core.schema_registry import schema_registry
+from backend.core.schema_intent import SchemaIntent, detect_schema_intent, answer_schema_intent
+
+client = TestClient(app)
+
+TABLES = ["flights", "airports", "airlines"]
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_schema():
+    metadata = SchemaParser().parse_yaml("data/flight_schema.yaml")
+    schema_registry.load_schema("flights", metadata)
+
+@pytest.mark.parametrize("message", [
+    "What tables are there?",
+    "which tables are available in the database",
+    "Can you list the tables please",
+    "show me all tables",
+    "hi, what tables do you have?",
+])
+def test_detects_table_listing(message):
+    assert detect_schema_intent(message, TABLES) == SchemaIntent(kind="list_tables")
+
+@pytest.mark.parametrize("message, table", [
+    ("Describe the flights table", "flights"),
+    ("describe airport", "airports"),
+    ("What columns does the airlines table have?", "airlines"),
+    ("show me the columns of flights", "flights"),
+    ("What's the schema of the Flights table?", "flights"),
+])
+def test_detects_table_description(message, table):
+    assert detect_schema_intent(message, TABLES) == SchemaIntent(kind="describe_table", tables=[table])
+
+def test_detects_whole_schema_description():
+    intent = detect_schema_intent("Describe the database", TABLES)
+    assert intent == SchemaIntent(kind="describe_table", tables=TABLES)
+
+@pytest.mark.parametrize("message", [
+    "How many flights are there?",
+    "Describe the passengers table",
+    "Describe the flights table and chart delays by airline",
+    "What tables have more than a million rows?",
+    "list the flights from JFK",
+])
+def test_other_questions_go_to_the_agents(message):
+    assert detect_schema_intent(message, TABLES) is None
+
+def test_answers_in_schema_explorer_layout():
+    table = schema_registry.get_tables("flights")[0]
+    listing = answer_schema_intent(SchemaIntent(kind="list_tables"), "flights")
+    assert listing.startswith("### Available Tables")
+    assert f"- **{table.name}**" in listing
+
+    description = answer_schema_intent(SchemaIntent(kind="describe_table", tables=[table.name]), "flights")
+    assert description.startswith(f"### Table: {table.name}")
+    assert "| Name | Type | Description |" in description
+    for column in table.columns:
+        assert f"| {column.name} | {column.type} |" in description
+
+def test_chat_answers_schema_question_without_runner():
+    original_runner = agent_manager.runner
+
+    class FailingRunner:
+        turns = []
+
+        def run_stream(self, **kwargs):
+            raise AssertionError("schema questions must not reach the agents")
+
+        async def record_turn(self, *turn):
+            self.turns.append(turn)
+
+    agent_manager.runner = FailingRunner()
+    try:
+        payload = {"message": "Describe the flights table", "user_id": "intent_tester", "session_id": "intent_session", "database_id": "flights"}
+        with client.stream("POST", "/chat", json=payload) as response:
+            assert response.status_code == 200
+            events = [json.loads(line[6:]) for line in response.iter_lines() if line.startswith("data: ")]
+    finally:
+        agent_manager.runner = original_runner
+
+    assert not any("error" in e for e in events)
+    assert {"tool": "describe_table", "input": {"table_name": "flights"}} in [e.get("thought") for e in events]
+    text = "".join(e.get("text", "") for e in events)
+    assert text.startswith("### Table: flights")
+    assert any(e.get("complete") for e in events)
+    span_names = [e["trace"]["data"]["name"] for e in events if "trace" in e and e["trace"]["event"] == "start"]
+    assert "SchemaFastPath" in span_names
+    assert FailingRunner.turns == [("intent_tester", "intent_session", "Describe the flights table", text)]
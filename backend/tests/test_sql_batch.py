@@ -0,0 +1,72 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+import threading
+from sqlalchemy import text
+from backend.core.database import register_database, register_async_database, get_engine, database_context_var
+from backend.core.tools import sql_tools
+from backend.core.tools.sql_tools import execute_sql_batch, execute_sql_batch_async, MAX_BATCH_QUERIES
+from backend.core.result_format import decode_columnar
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def batch_db(tmp_path):
+    url = f"sqlite:///{tmp_path}/batch.db"
+    register_database("batch_db", url)
+    register_async_database("batch_db", url)
+    with get_engine("batch_db").begin() as conn:
+        conn.execute(text("CREATE TABLE movies (id INTEGER PRIMARY KEY, genre TEXT, rating TEXT, budget REAL)"))
+        conn.execute(text("INSERT INTO movies (genre, rating, budget) VALUES ('Drama', 'R', 10), ('Drama', 'PG', 30), ('Comedy', 'R', 5)"))
+    token = database_context_var.set("batch_db")
+    yield
+    database_context_var.reset(token)
+
+def _sections(output):
+    return output.split("\n\n--- Query ")[1:]
+
+def test_batch_results_in_order(batch_db):
+    output = execute_sql_batch([
+        "SELECT genre, AVG(budget) AS avg_budget FROM movies GROUP BY genre ORDER BY genre",
+        "SELECT rating, COUNT(*) AS n FROM movies GROUP BY rating ORDER BY rating",
+    ])
+    assert output.startswith("Batch of 2 queries (0 failed)")
+    first, second = _sections(output)
+    assert first.startswith("1 (") and " ms) ---" in first
+    assert decode_columnar(first.split(":\n", 1)[1]) == [{"genre": "Comedy", "avg_budget": 5}, {"genre": "Drama", "avg_budget": 20}]
+    assert decode_columnar(second.split(":\n", 1)[1]) == [{"rating": "PG", "n": 1}, {"rating": "R", "n": 2}]
+
+def test_invalid_queries_reported_without_blocking_others(batch_db):
+    output = execute_sql_batch(["DELETE FROM movies", "SELECT COUNT(*) AS n FROM movies", "SELECT nope FROM movies"])
+    assert output.startswith("Batch of 3 queries (2 failed)")
+    deleted, counted, broken = _sections(output)
+    assert "Mutable operation" in deleted
+    assert '"rows":[[3]]' in counted
+    assert "Syntax Error" in broken
+
+def test_batch_runs_concurrently_in_active_database(batch_db, monkeypatch):
+    # Both queries must be in flight at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    seen = []
+
+    def fake_execute(query):
+        seen.append(database_context_var.get())
+        barrier.wait()
+        return "Returned 0 rows"
+
+    monkeypatch.setattr(sql_tools, "execute_sql", fake_execute)
+    output = execute_sql_batch(["SELECT 1", "SELECT 2"])
+    assert "(0 failed)" in output
+    assert seen == ["batch_db", "batch_db"]
+
+def test_batch_limits(batch_db):
+    assert execute_sql_batch([]) == "Error: No SQL statement found."
+    assert "at most" in execute_sql_batch(["SELECT 1"] * (MAX_BATCH_QUERIES + 1))
+
+@pytest.mark.anyio
+async def test_async_batch(batch_db):
+    output = await execute_sql_batch_async(["SELECT COUNT(*) AS n FROM movies", "SELECT MAX(budget) AS top FROM movies"])
+    assert output.startswith("Batch of 2 queries (0 failed)")
+    assert '"rows":[[30]]' in output
@@ -0,0 +1,181 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from collections import Counter
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.utils.instructions_utils import inject_session_state
+from google.genai import types
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from backend.agents.adk import sql_sequence
+from backend.agents.adk.reporter import SQL_RESULT_STATE_KEY, create_reporter_agent
+from backend.agents.adk.router import delegate_to_sql_agent
+from backend.agents.adk.runner_pool import sub_agent_runners
+from backend.agents.adk.sql_sequence import (
+    schema_fits_prompt, _schema_prompted_instruction, extract_sql, extract_sql_statements, SqlExecutorAgent, SQL_STATE_KEY,
+)
+from backend.core.database import database_context_var
+from backend.core.question_cache import question_cache
+from backend.core.schema_parser import SchemaParser
+from backend.core.schema_registry import schema_registry
+from backend.tests.test_question_cache import calls
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def flights(tmp_path, monkeypatch):
+    schema_registry.load_schema("flights", SchemaParser().parse_yaml("data/flight_schema.yaml"))
+    monkeypatch.setattr(question_cache, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(question_cache, "_entries", {})
+    monkeypatch.setattr(sub_agent_runners, "default_model", "scripted-sql")
+    calls.clear()
+    token = database_context_var.set("flights")
+    yield
+    database_context_var.reset(token)
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(trace, "get_tracer", provider.get_tracer)
+    return exporter
+
+def test_schema_digest():
+    schema_registry.load_schema("flights", SchemaParser().parse_yaml("data/flight_schema.yaml"))
+    digest = schema_registry.get_schema_digest("flights")
+    assert digest.splitlines()[0] == "pilots(id INTEGER PK, name VARCHAR, license_type VARCHAR) -- Contains information about registered pilots."
+    assert "pilot_id INTEGER -> pilots.id" in digest
+
+def test_generator_instruction_holds_active_schema(flights):
+    instruction = _schema_prompted_instruction(None)
+    assert instruction.startswith(sql_sequence.GENERATOR_INSTRUCTION)
+    assert schema_registry.get_schema_digest("flights") in instruction
+
+def test_schema_fits_prompt_budget(flights, monkeypatch):
+    assert schema_fits_prompt("flights")
+    monkeypatch.setattr(sql_sequence, "SCHEMA_PROMPT_TOKEN_BUDGET", 50)
+    assert not schema_fits_prompt("flights")
+
+@pytest.mark.anyio
+async def test_small_schema_skips_planner(flights, spans):
+    await delegate_to_sql_agent("How many flights are there per origin?")
+    assert calls == Counter(generator=1, reporter=1)
+    workflow = next(s for s in spans.get_finished_spans() if s.name == "SqlWorkflow")
+    assert workflow.attributes["workflow"] == "schema_prompt"
+    assert workflow.attributes["llm_calls"] == 2
+    assert workflow.attributes["llm_calls.saved"] == sql_sequence.PLANNER_CALLS_SAVED + sql_sequence.EXECUTOR_CALLS_SAVED
+
+@pytest.mark.anyio
+async def test_large_schema_keeps_planner(flights, spans, monkeypatch):
+    monkeypatch.setattr(sql_sequence, "SCHEMA_PROMPT_TOKEN_BUDGET", 50)
+    await delegate_to_sql_agent("How many flights are there per origin?")
+    assert calls == Counter(planner=1, generator=1, reporter=1)
+    workflow = next(s for s in spans.get_finished_spans() if s.name == "SqlWorkflow")
+    assert workflow.attributes["workflow"] == "full"
+    assert workflow.attributes["llm_calls"] == 3
+    assert workflow.attributes["llm_calls.saved"] == sql_sequence.EXECUTOR_CALLS_SAVED
+
+@pytest.mark.parametrize("text, sql", [
+    ("SELECT origin FROM flights;", "SELECT origin FROM flights"),
+    ("```sql\nSELECT origin\nFROM flights\n```", "SELECT origin\nFROM flights"),
+    ("The validated query is:\nWITH f AS (SELECT 1) SELECT * FROM f", "WITH f AS (SELECT 1) SELECT * FROM f"),
+    ("select origin\nfrom flights\n\nThis counts nothing.", "select origin\nfrom flights"),
+    ("Here is the query with the filter: SELECT origin FROM flights", None),
+    ("Show flights with delays", None),
+    ("with delays, select the late ones", None),
+    ("Sorry, I could not select a valid query.", None),
+    ("I could not write a query.", None),
+    (None, None),
+])
+def test_extract_sql(text, sql):
+    assert extract_sql(text) == sql
+
+def test_extract_sql_statements():
+    text = "SELECT origin FROM flights;\nSELECT COUNT(*) FROM pilots WHERE name = 'a;b';"
+    assert extract_sql_statements(text) == ["SELECT origin FROM flights", "SELECT COUNT(*) FROM pilots WHERE name = 'a;b'"]
+    assert extract_sql_statements("```sql\nSELECT 1\n```\nand\n```sql\nSELECT 2;\n```") == ["SELECT 1", "SELECT 2"]
+    assert extract_sql_statements("Show flights with delays") == []
+
+@pytest.mark.parametrize("text, statements", [
+    ("SELECT a FROM t;\n\nSELECT b FROM u;", ["SELECT a FROM t", "SELECT b FROM u"]),
+    ("Here are both queries:\nSELECT a FROM t;\n\nThen:\nSELECT b FROM u;", ["SELECT a FROM t"]),
+    ("SELECT a FROM t;\nSELECT b FROM u;\nBoth were validated.", ["SELECT a FROM t", "SELECT b FROM u"]),
+    ("SELECT a\nFROM t\nThis returns every row.", ["SELECT a\nFROM t"]),
+    ("SELECT a FROM t WHERE note = 'first line.\n\nsecond line.';\nSELECT b FROM u", ["SELECT a FROM t WHERE note = 'first line.\n\nsecond line.'", "SELECT b FROM u"]),
+    ("```sql\nSELECT a FROM t;\n\nSELECT b FROM u;\n```", ["SELECT a FROM t", "SELECT b FROM u"]),
+])
+def test_extract_sql_statements_across_lines(text, statements):
+    assert extract_sql_statements(text) == statements
+
+async def _run_executor(message: str, state=None, generator_output=None):
+    runner = Runner(agent=SqlExecutorAgent(name="SqlExecutor"), session_service=InMemorySessionService(), app_name="ExecutorTest", auto_create_session=True)
+    if generator_output is not None:
+        session = await runner.session_service.create_session(app_name="ExecutorTest", user_id="u", session_id="s")
+        await runner.session_service.append_event(session, Event(
+            author="SqlGenerator", invocation_id="earlier", content=types.Content(role="model", parts=[types.Part(text=generator_output)]),
+        ))
+    events = [e async for e in runner.run_async(
+        user_id="u", session_id="s", new_message=types.Content(role="user", parts=[types.Part(text=message)]), state_delta=state,
+    )]
+    session = await runner.session_service.get_session(app_name="ExecutorTest", user_id="u", session_id="s")
+    return events, session.state
+
+@pytest.mark.anyio
+async def test_executor_runs_sql_from_state_without_model(flights):
+    events, state = await _run_executor("How many pilots are there?", {SQL_STATE_KEY: "SELECT COUNT(*) AS pilot_count FROM pilots"})
+    call, response, answer = events
+    assert call.get_function_calls()[0].name == "execute_sql_async"
+    assert call.get_function_calls()[0].args == {"query": "SELECT COUNT(*) AS pilot_count FROM pilots"}
+    assert response.get_function_responses()[0].id == call.get_function_calls()[0].id
+    output = response.get_function_responses()[0].response["result"]
+    assert "pilot_count" in output
+    assert answer.content.parts[0].text == output
+    assert answer.actions.state_delta == {SQL_RESULT_STATE_KEY: output}
+    assert state[SQL_RESULT_STATE_KEY] == output
+    assert calls == Counter()
+
+@pytest.mark.anyio
+async def test_reporter_instruction_reads_executor_output(flights):
+    _, state = await _run_executor("How many pilots are there?", {SQL_STATE_KEY: "SELECT COUNT(*) AS pilot_count FROM pilots"})
+    session = Session(id="s", app_name="ExecutorTest", user_id="u", state=state)
+    context = ReadonlyContext(InvocationContext(session_service=InMemorySessionService(), invocation_id="i", agent=SqlExecutorAgent(name="SqlExecutor"), session=session))
+    instruction = await inject_session_state(create_reporter_agent("unused").instruction, context)
+    assert state[SQL_RESULT_STATE_KEY] in instruction
+    # The JSON examples in the instruction are left alone
+    assert '{"chart": {"type": "bar"}' in instruction
+
+@pytest.mark.anyio
+async def test_executor_falls_back_to_agent_output(flights):
+    events, state = await _run_executor("List the pilots", generator_output="```sql\nSELECT name FROM pilots\n```")
+    assert events[0].get_function_calls()[0].args == {"query": "SELECT name FROM pilots"}
+    assert events[-1].content.parts[0].text.startswith("Returned")
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("message, generator_output", [
+    ("SELECT name FROM pilots", None),
+    ("Show flights with delays", "Sorry, I could not write a valid query with those columns."),
+])
+async def test_executor_never_runs_user_text_or_prose(flights, message, generator_output):
+    events, state = await _run_executor(message, generator_output=generator_output)
+    assert [e.content.parts[0].text for e in events] == ["Error: No SQL statement found."]
+
+@pytest.mark.anyio
+async def test_executor_batches_independent_queries(flights):
+    sql = "SELECT COUNT(*) AS pilot_count FROM pilots;\nSELECT COUNT(*) AS flight_count FROM flights;"
+    events, state = await _run_executor("How many pilots and how many flights are there?", {SQL_STATE_KEY: sql})
+    call, response, answer = events
+    assert call.get_function_calls()[0].name == "execute_sql_batch_async"
+    assert call.get_function_calls()[0].args == {"queries": ["SELECT COUNT(*) AS pilot_count FROM pilots", "SELECT COUNT(*) AS flight_count FROM flights"]}
+    output = answer.content.parts[0].text
+    assert output.startswith("Batch of 2 queries (0 failed)")
+    assert "pilot_count" in output and "flight_count" in output
+    assert calls == Counter()
@@ -4,6 +4,15 @@ pytestmark = pytest.mark.unit
 from fastapi.testclient import TestClient
 from backend.main import app
 import json
+import anyio
+from typing import AsyncGenerator
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from backend.agents.adk.adapter import AdkRunnerAdapter
+from backend.agents.adk.router import create_root_router
+from backend.core.agent_manager import agent_manager
 from backend.core.schema_parser import SchemaParser
 from backend.core.schema_registry import schema_registry
 
@@ -16,12 +25,26 @@ def setup_schema():
     metadata = parser.parse_yaml("data/flight_schema.yaml")
     schema_registry.load_schema("flights", metadata)
 
-def test_telemetry_streaming():
+class CannedReplyLlm(BaseLlm):
+    """Answers every request with a fixed text so the runner path needs no model key."""
+
+    @classmethod
+    def supported_models(cls):
+        return [r"canned-reply"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="42 flights were delayed.")]))
+
+LLMRegistry.register(CannedReplyLlm)
+
+def test_telemetry_streaming(monkeypatch):
     """
     Verifies that the streaming response includes OpenTelemetry trace data.
     """
+    monkeypatch.setattr(agent_manager, "runner", AdkRunnerAdapter(agent=create_root_router("canned-reply"), app_name=agent_manager.app_name))
     payload = {
-        "message": "Describe the flights table",
+        # Not a schema question, so it goes through the runner rather than SchemaFastPath
+        "message": "How many flights were delayed?",
         "user_id": "telemetry_tester",
         "session_id": "telemetry_session"
     }
@@ -61,6 +84,31 @@ def test_telemetry_streaming():
         assert "session_id" in start_event["data"]["attributes"]
         assert start_event["data"]["attributes"]["session_id"] == "telemetry_session"
 
+def test_schema_fast_path_telemetry():
+    """
+    Verifies that schema questions answered from the registry are traced under
+    SchemaFastPath and still land in the session history.
+    """
+    payload = {
+        "message": "Describe the flights table",
+        "user_id": "telemetry_tester",
+        "session_id": "telemetry_fast_path"
+    }
+
+    with client.stream("POST", "/chat", json=payload) as response:
+        assert response.status_code == 200
+        events = [json.loads(line[6:]) for line in response.iter_lines() if line.startswith("data: ")]
+
+    starts = [e["trace"]["data"] for e in events if "trace" in e and e["trace"]["event"] == "start"]
+    assert [s["name"] for s in starts] == ["SchemaFastPath"]
+    assert starts[0]["attributes"]["session_id"] == "telemetry_fast_path"
+
+    session = anyio.run(agent_manager.runner.get_session, "telemetry_tester", "telemetry_fast_path")
+    turns = [(e.author, e.content.parts[0].text) for e in session.events]
+    assert turns[0] == ("user", "Describe the flights table")
+    assert turns[1][0] == agent_manager.orchestrator.name
+    assert turns[1][1].startswith("### Table: flights")
+
 def test_tool_telemetry(setup_schema):
     """
     Verifies that direct tool calls generate OTel spans with correct attributes.
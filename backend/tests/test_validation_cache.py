@@ -0,0 +1,43 @@
+import pytest
+pytestmark = pytest.mark.unit
+
+from sqlalchemy import text
+from backend.core.database import register_database, get_engine, database_context_var
+from backend.core.query_cache import validation_cache
+from backend.core.sql_fingerprint import collapse_whitespace
+from backend.core.tools import sql_tools
+from backend.core.tools.sql_tools import validate_sql
+
+@pytest.fixture
+def validation_db(tmp_path):
+    register_database("validation_db", f"sqlite:///{tmp_path}/validation.db")
+    token = database_context_var.set("validation_db")
+    validation_cache.invalidate("validation_db")
+    yield
+    database_context_var.reset(token)
+
+def test_collapse_whitespace_keeps_line_comments():
+    assert collapse_whitespace("SELECT  a\n FROM t;") == "SELECT a FROM t"
+    assert collapse_whitespace("SELECT a -- c\nFROM t") != collapse_whitespace("SELECT a -- c FROM t")
+
+def test_repeated_validation_skips_explain(validation_db, monkeypatch):
+    with get_engine("validation_db").begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+
+    assert validate_sql("SELECT id FROM items") == "VALID"
+
+    def fail_session(*args, **kwargs):
+        raise AssertionError("EXPLAIN should not run on a cache hit")
+
+    monkeypatch.setattr(sql_tools, "get_session", fail_session)
+    hits = validation_cache.stats()["hits"]
+    assert validate_sql("SELECT   id\nFROM items;") == "VALID"
+    assert validation_cache.stats()["hits"] == hits + 1
+
+def test_schema_change_invalidates(validation_db):
+    assert "Syntax Error" in validate_sql("SELECT name FROM pilots_new")
+
+    with get_engine("validation_db").begin() as conn:
+        conn.execute(text("CREATE TABLE pilots_new (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    assert validate_sql("SELECT name FROM pilots_new") == "VALID"